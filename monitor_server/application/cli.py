@@ -0,0 +1,215 @@
+"""Maintenance commands of the monitor server.
+
+Usage: python -m monitor_server.application.cli --config CONFIG_DIR rebuild-rollups [--session SESSION_ID]
+       python -m monitor_server.application.cli --config CONFIG_DIR prune [--keep-days N]
+                                                                   [--keep-last K [--per-tag TAG]]
+       python -m monitor_server.application.cli --config CONFIG_DIR partitions [--ahead MONTHS] [--drop-before-days N]
+       python -m monitor_server.application.cli --config CONFIG_DIR archive --older-than-days N [--dry-run]
+       python -m monitor_server.application.cli --config CONFIG_DIR export --to FOLDER [--chunk-size N]
+       python -m monitor_server.application.cli --config CONFIG_DIR import --from FOLDER
+       python -m monitor_server.application.cli --config CONFIG_DIR replay-spool [--follow]
+"""
+
+import argparse
+import pathlib
+import sys
+import time
+import typing as t
+from datetime import UTC, datetime, timedelta
+
+from monitor_server.domain.models.archives import ArchivedSession, ArchivePolicy
+from monitor_server.domain.models.retention import PruningProgress, RetentionPolicy
+from monitor_server.domain.use_cases.sessions.archiving import ArchiveSessions
+from monitor_server.domain.use_cases.sessions.retention import PruneSessions
+from monitor_server.infrastructure.config.app import ApplicationConfig
+from monitor_server.infrastructure.config.service import YamlFileConfigService
+from monitor_server.infrastructure.orm.config import ORMConfig
+from monitor_server.infrastructure.orm.engine import ORMEngine
+from monitor_server.infrastructure.persistence.dumps import DatasetDump, DumpProgress, DumpReport
+from monitor_server.infrastructure.persistence.partitions import MetricPartitions
+from monitor_server.infrastructure.persistence.services import MonitoringMetricsSQLService
+from monitor_server.infrastructure.persistence.spool import IngestionSpool, ReplayReport, SpoolReplayer
+
+
+def _orm_engine(config_dir: pathlib.Path) -> ORMEngine:
+    app_config = ApplicationConfig().declare_config_element(ORMConfig)
+    YamlFileConfigService(config_dir, app_config).resolve()
+    orm_config = app_config[ORMConfig]
+    if orm_config is None:
+        raise SystemExit(f"No '{ORMConfig.declared_as}' configuration found in '{config_dir}'")
+    return ORMEngine(orm_config)
+
+
+def _metrics_service(config_dir: pathlib.Path) -> MonitoringMetricsSQLService:
+    return MonitoringMetricsSQLService(_orm_engine(config_dir))
+
+
+def rebuild_rollups(arguments: argparse.Namespace) -> None:
+    sessions = _metrics_service(arguments.config).rebuild_rollups(arguments.session)
+    print(f'Rollups rebuilt for {sessions} session(s)')
+
+
+def _print_progress(progress: PruningProgress) -> None:
+    print(
+        f'[{progress.sessions_done}/{progress.sessions_total}] {progress.session_id}: '
+        f'{progress.metrics_deleted} metric(s) deleted'
+    )
+
+
+def prune(arguments: argparse.Namespace) -> None:
+    policy = RetentionPolicy(
+        keep_days=arguments.keep_days,
+        keep_last=arguments.keep_last,
+        per_tag=arguments.per_tag,
+        keep_sealed=not arguments.include_sealed,
+        chunk_size=arguments.chunk_size,
+        pause=arguments.pause,
+        dry_run=arguments.dry_run,
+    )
+    report = PruneSessions(_metrics_service(arguments.config), on_progress=_print_progress).execute(policy)
+    if report.dry_run:
+        print(f'{len(report.sessions)} session(s) would be pruned: {", ".join(report.sessions)}')
+    else:
+        print(f'{len(report.sessions)} session(s) and {report.metrics} metric(s) pruned in {report.duration:.1f}s')
+
+
+def maintain_partitions(arguments: argparse.Namespace) -> None:
+    partitions = MetricPartitions(_orm_engine(arguments.config).session)
+    if not partitions.list():
+        print('The metric table is not partitioned')
+        return
+    print(f'Partitions created: {", ".join(partitions.create_ahead(arguments.ahead)) or "none"}')
+    if arguments.drop_before_days is not None:
+        cutoff = datetime.now(tz=UTC) - timedelta(days=arguments.drop_before_days)
+        print(f'Partitions dropped: {", ".join(partitions.drop_before(cutoff)) or "none"}')
+
+
+def _print_archived(archived: ArchivedSession) -> None:
+    print(f'{archived.session_id}: {archived.metrics} metric(s) moved to {archived.location}')
+
+
+def archive(arguments: argparse.Namespace) -> None:
+    engine = _orm_engine(arguments.config)
+    if engine.config.archive is None:
+        raise SystemExit("No 'archive' section in the orm configuration")
+    policy = ArchivePolicy(
+        older_than_days=arguments.older_than_days,
+        chunk_size=arguments.chunk_size or engine.config.archive.chunk_size,
+        dry_run=arguments.dry_run,
+    )
+    report = ArchiveSessions(MonitoringMetricsSQLService(engine), on_archived=_print_archived).execute(policy)
+    if report.dry_run:
+        print(f'{len(report.sessions)} session(s) would be archived')
+    else:
+        metrics = sum(archived.metrics for archived in report.sessions)
+        print(f'{len(report.sessions)} session(s) and {metrics} metric(s) archived in {report.duration:.1f}s')
+
+
+def _print_dump_progress(progress: DumpProgress) -> None:
+    print(f'{progress.kind} part {progress.part}: {progress.records} record(s), {progress.rate:.0f} record(s)/s')
+
+
+def _print_dump_report(action: str, report: DumpReport) -> None:
+    counts = ', '.join(f'{count} {kind}' for kind, count in report.records.items())
+    print(f'{counts} {action} in {report.duration:.1f}s ({report.rate:.0f} record(s)/s)')
+
+
+def export(arguments: argparse.Namespace) -> None:
+    report = DatasetDump(arguments.to).export(
+        _metrics_service(arguments.config), chunk_size=arguments.chunk_size, on_progress=_print_dump_progress
+    )
+    _print_dump_report('exported', report)
+
+
+def restore(arguments: argparse.Namespace) -> None:
+    report = DatasetDump(arguments.source).restore(_metrics_service(arguments.config), on_progress=_print_dump_progress)
+    if report.skipped_parts:
+        print(f'{report.skipped_parts} part(s) already restored by a previous run')
+    _print_dump_report('imported', report)
+
+
+def _print_replay_report(report: ReplayReport) -> None:
+    print(
+        f'{report.added} metric(s) written, {report.duplicates} duplicate(s) and {report.rejected} rejected record(s)'
+        f' in {report.duration:.1f}s'
+    )
+    if report.error:
+        print(f'Replay stopped: {report.error}')
+
+
+def replay_spool(arguments: argparse.Namespace) -> None:
+    engine = _orm_engine(arguments.config)
+    spool_config = engine.config.spool
+    if spool_config is None:
+        raise SystemExit("No 'spool' section in the orm configuration")
+    spool = IngestionSpool(spool_config.folder, sync=spool_config.sync, max_file_size=spool_config.max_file_size)
+    replayer = SpoolReplayer(
+        spool,
+        MonitoringMetricsSQLService(engine),
+        chunk_size=spool_config.chunk_size,
+        interval=spool_config.interval,
+        max_backoff=spool_config.max_backoff,
+        # Idle drains are not worth a line
+        on_report=lambda report: _print_replay_report(report) if report.batches or report.error else None,
+    )
+    if arguments.follow:
+        replayer.start()
+        try:
+            while True:
+                time.sleep(spool_config.interval)
+        except KeyboardInterrupt:
+            replayer.stop()
+        return
+    report = replayer.drain()
+    _print_replay_report(report)
+    if report.error:
+        raise SystemExit(f'{spool.backlog} byte(s) left in the spool')
+
+
+def main(argv: t.Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=t.cast(str, __doc__).splitlines()[0])
+    parser.add_argument('--config', type=pathlib.Path, required=True, help='Folder holding the yaml configuration')
+    commands = parser.add_subparsers(required=True)
+    rebuild = commands.add_parser('rebuild-rollups', help='Recompute session and component rollups from metrics')
+    rebuild.add_argument('--session', default=None, help='Only rebuild this session (all sessions by default)')
+    rebuild.set_defaults(command=rebuild_rollups)
+    pruning = commands.add_parser('prune', help='Delete the sessions a retention policy does not keep')
+    pruning.add_argument('--keep-days', type=int, default=None, help='Keep sessions started within that many days')
+    pruning.add_argument('--keep-last', type=int, default=None, help='Keep the latest sessions of each group')
+    pruning.add_argument('--per-tag', default=None, help='Tag grouping sessions for --keep-last')
+    pruning.add_argument('--include-sealed', action='store_true', help='Prune sealed sessions as well')
+    pruning.add_argument('--chunk-size', type=int, default=1000, help='Metrics deleted per transaction')
+    pruning.add_argument('--pause', type=float, default=0.05, help='Seconds to wait between two chunks')
+    pruning.add_argument('--dry-run', action='store_true', help='Only list the sessions to prune')
+    pruning.set_defaults(command=prune)
+    partitioning = commands.add_parser('partitions', help='Maintain the monthly partitions of the metric table')
+    partitioning.add_argument('--ahead', type=int, default=3, help='Months to create partitions for in advance')
+    partitioning.add_argument(
+        '--drop-before-days', type=int, default=None, help='Drop partitions only holding metrics older than that'
+    )
+    partitioning.set_defaults(command=maintain_partitions)
+    archiving = commands.add_parser('archive', help='Move metrics of old sessions to the cold archive')
+    archiving.add_argument('--older-than-days', type=int, required=True, help='Archive sessions older than that')
+    archiving.add_argument('--chunk-size', type=int, default=None, help='Metrics per archived file')
+    archiving.add_argument('--dry-run', action='store_true', help='Only list the sessions to archive')
+    archiving.set_defaults(command=archive)
+    exporting = commands.add_parser(
+        'export', help='Dump machines, sessions, metrics and snapshots to gzipped NDJSON parts'
+    )
+    exporting.add_argument('--to', type=pathlib.Path, required=True, help='Folder to write the dump to')
+    exporting.add_argument('--chunk-size', type=int, default=10000, help='Records per part')
+    exporting.set_defaults(command=export)
+    importing = commands.add_parser('import', help='Bulk load a dump, resuming an interrupted import if any')
+    importing.add_argument('--from', dest='source', type=pathlib.Path, required=True, help='Folder holding the dump')
+    importing.set_defaults(command=restore)
+    replaying = commands.add_parser('replay-spool', help='Write the metrics waiting in the spool to the database')
+    replaying.add_argument(
+        '--follow', action='store_true', help='Keep replaying every interval seconds of the spool configuration'
+    )
+    replaying.set_defaults(command=replay_spool)
+    arguments = parser.parse_args(argv)
+    arguments.command(arguments)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
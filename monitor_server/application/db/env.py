@@ -23,6 +23,10 @@ target_metadata = None
 # my_important_option = config.get_main_option("my_important_option")
 # ... etc.
 
+# The database url can be overridden from the command line: alembic -x url=sqlite:///metrics.db upgrade head
+if url_override := context.get_x_argument(as_dictionary=True).get('url'):
+    config.set_main_option('sqlalchemy.url', url_override)
+
 
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
@@ -62,7 +66,12 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        # SQLite cannot alter constraints in place: batch operations recreate the table instead
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            render_as_batch=connection.dialect.name == 'sqlite',
+        )
 
         with context.begin_transaction():
             context.run_migrations()
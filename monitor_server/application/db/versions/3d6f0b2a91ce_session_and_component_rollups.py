@@ -0,0 +1,63 @@
+"""Session and component rollups
+
+Revision ID: 3d6f0b2a91ce
+Revises: f78abb3bc794
+Create Date: 2024-02-14 09:41:22.618043
+
+"""
+
+from typing import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+import monitor_server.application.db.nomenclature as naming
+
+# revision identifiers, used by Alembic.
+revision: str = '3d6f0b2a91ce'
+down_revision: str | None = 'f78abb3bc794'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def _aggregate_columns() -> Sequence[sa.Column]:
+    return (
+        sa.Column('count', sa.BigInteger(), nullable=False),
+        sa.Column('total', sa.Double(), nullable=False),
+        sa.Column('squares', sa.Double(), nullable=False),
+        sa.Column('minimum', sa.Double(), nullable=False),
+        sa.Column('maximum', sa.Double(), nullable=False),
+    )
+
+
+def upgrade() -> None:
+    # Tables start empty: rollups of already recorded sessions are backfilled with `just db-rebuild-rollups <config>`
+    op.create_table(
+        'SessionRollup',
+        sa.Column('sid', sa.String(64), nullable=False),
+        sa.Column('attribute', sa.String(16), nullable=False),
+        *_aggregate_columns(),
+        sa.PrimaryKeyConstraint('sid', 'attribute', name=naming.build_primary_key_name('sid', 'attribute')),
+        sa.ForeignKeyConstraint(
+            ('sid',),
+            refcolumns=['Session.uid'],
+            name=naming.build_foreign_key_name('SessionRollup', 'sid', 'Session'),
+            ondelete='CASCADE',
+        ),
+    )
+    op.create_table(
+        'ComponentRollup',
+        sa.Column('sid', sa.String(64), nullable=False),
+        sa.Column('component', sa.String(512), nullable=False),
+        sa.Column('attribute', sa.String(16), nullable=False),
+        *_aggregate_columns(),
+        sa.PrimaryKeyConstraint(
+            'sid', 'component', 'attribute', name=naming.build_primary_key_name('sid', 'component', 'attribute')
+        ),
+        sa.ForeignKeyConstraint(
+            ('sid',),
+            refcolumns=['Session.uid'],
+            name=naming.build_foreign_key_name('ComponentRollup', 'sid', 'Session'),
+            ondelete='CASCADE',
+        ),
+    )
@@ -0,0 +1,60 @@
+"""Monthly partitions of TestMetric
+
+Opt-in, MySQL only: alembic -x partition_metrics=true upgrade head
+
+MySQL does not support foreign keys on partitioned tables and requires the partitioning column to be part of the
+primary key. Once partitioned, TestMetric loses its references to Session and ExecutionContext: the database no longer
+rejects metrics of unknown sessions or machines and deleting a session no longer cascades to its metrics.
+
+The primary key becomes (uid, item_start_time): uid alone is no longer unique and a metric sent again with another
+start time would be stored twice. MetricSQLRepository therefore looks up every uid it inserts on a partitioned table,
+the uid filter being bypassed since it only remembers recent uids. Two writers inserting the same uid concurrently can
+still both succeed.
+
+Revision ID: 5c1e9d7a0f43
+Revises: 8a41c5e7d2b0
+Create Date: 2024-02-19 10:12:37.518210
+
+"""
+
+from datetime import UTC, datetime
+from typing import Sequence
+
+from alembic import context, op
+
+import monitor_server.application.db.nomenclature as naming
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e9d7a0f43'
+down_revision: str | None = '8a41c5e7d2b0'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+MONTHS_AHEAD = 3
+
+
+def _next_month(month: datetime) -> datetime:
+    return month.replace(year=month.year + 1, month=1) if month.month == 12 else month.replace(month=month.month + 1)
+
+
+def upgrade() -> None:
+    if context.get_x_argument(as_dictionary=True).get('partition_metrics', 'false').lower() != 'true':
+        return
+    if op.get_context().dialect.name != 'mysql':
+        return
+    for column, referent in (('sid', 'Session'), ('xid', 'ExecutionContext')):
+        op.drop_constraint(
+            constraint_name=naming.build_foreign_key_name('TestMetric', column, referent),
+            table_name='TestMetric',
+            type_='foreignkey',
+        )
+    op.execute('ALTER TABLE TestMetric DROP PRIMARY KEY, ADD PRIMARY KEY (uid, item_start_time)')
+    # Everything older than the current month goes to p_history, dropped as a whole once expired
+    month = datetime.now(tz=UTC).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    clauses = [f"PARTITION p_history VALUES LESS THAN ('{month:%Y-%m-%d %H:%M:%S}')"]
+    for _ in range(MONTHS_AHEAD + 1):
+        upper_bound = _next_month(month)
+        clauses.append(f"PARTITION p{month:%Y%m} VALUES LESS THAN ('{upper_bound:%Y-%m-%d %H:%M:%S}')")
+        month = upper_bound
+    clauses.append('PARTITION p_future VALUES LESS THAN (MAXVALUE)')
+    op.execute(f'ALTER TABLE TestMetric PARTITION BY RANGE COLUMNS(item_start_time) ({", ".join(clauses)})')
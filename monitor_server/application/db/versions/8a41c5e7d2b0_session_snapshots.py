@@ -0,0 +1,38 @@
+"""Session snapshots
+
+Revision ID: 8a41c5e7d2b0
+Revises: 3d6f0b2a91ce
+Create Date: 2024-02-15 14:07:51.290317
+
+"""
+
+from typing import Sequence
+
+import sqlalchemy as sa
+import sqlalchemy.dialects.mysql as mysql
+from alembic import op
+
+import monitor_server.application.db.nomenclature as naming
+
+# revision identifiers, used by Alembic.
+revision: str = '8a41c5e7d2b0'
+down_revision: str | None = '3d6f0b2a91ce'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'SessionSnapshot',
+        sa.Column('sid', sa.String(64), nullable=False),
+        sa.Column('sealed_at', mysql.DATETIME(fsp=6), nullable=False),
+        sa.Column('metrics', sa.Integer(), nullable=False),
+        sa.Column('payload', sa.LargeBinary().with_variant(mysql.LONGBLOB(), 'mysql'), nullable=False),
+        sa.PrimaryKeyConstraint('sid', name=naming.build_primary_key_name('sid')),
+        sa.ForeignKeyConstraint(
+            ('sid',),
+            refcolumns=['Session.uid'],
+            name=naming.build_foreign_key_name('SessionSnapshot', 'sid', 'Session'),
+            ondelete='CASCADE',
+        ),
+    )
@@ -0,0 +1,28 @@
+"""Index the session and machine of test metrics
+
+MySQL already indexes the columns of a foreign key and silently drops that implicit index once this one can be used
+in its place. SQLite does not index foreign keys: without these, listing the metrics of a session or deleting a
+session (cascading to its metrics) scans the whole table.
+
+Revision ID: 9e3a5f1c7b24
+Revises: e2b4c8a1d9f6
+Create Date: 2024-02-22 14:03:51.227409
+
+"""
+
+from typing import Sequence
+
+from alembic import op
+
+import monitor_server.application.db.nomenclature as naming
+
+# revision identifiers, used by Alembic.
+revision: str = '9e3a5f1c7b24'
+down_revision: str | None = 'e2b4c8a1d9f6'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    for column in ('sid', 'xid'):
+        op.create_index(naming.build_index_name('TestMetric', column), 'TestMetric', [column])
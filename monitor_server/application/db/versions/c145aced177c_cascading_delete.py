@@ -21,30 +21,28 @@ depends_on: str | Sequence[str] | None = None
 
 
 def upgrade() -> None:
-    op.alter_column('TestMetric', 'uid', type_=sa.String(32), nullable=False)
-    op.drop_constraint(
-        constraint_name=naming.build_foreign_key_name('TestMetric', 'sid', 'ExecutionContext'),
-        table_name='TestMetric',
-        type_='foreignkey',
-    )
-    op.create_foreign_key(
-        constraint_name=naming.build_foreign_key_name('TestMetric', 'xid', 'ExecutionContext'),
-        source_table='TestMetric',
-        referent_table='ExecutionContext',
-        local_cols=['xid'],
-        remote_cols=['uid'],
-        ondelete='CASCADE',
-    )
-    op.drop_constraint(
-        constraint_name=naming.build_foreign_key_name('TestMetric', 'sid', 'Session'),
-        table_name='TestMetric',
-        type_='foreignkey',
-    )
-    op.create_foreign_key(
-        constraint_name=naming.build_foreign_key_name('TestMetric', 'sid', 'Session'),
-        source_table='TestMetric',
-        referent_table='Session',
-        local_cols=['sid'],
-        remote_cols=['uid'],
-        ondelete='CASCADE',
-    )
+    # Batch operations are plain ALTER statements on MySQL, a table copy on SQLite which cannot alter constraints
+    with op.batch_alter_table('TestMetric') as batch_op:
+        batch_op.alter_column('uid', type_=sa.String(32), nullable=False)
+        batch_op.drop_constraint(
+            constraint_name=naming.build_foreign_key_name('TestMetric', 'sid', 'ExecutionContext'),
+            type_='foreignkey',
+        )
+        batch_op.create_foreign_key(
+            constraint_name=naming.build_foreign_key_name('TestMetric', 'xid', 'ExecutionContext'),
+            referent_table='ExecutionContext',
+            local_cols=['xid'],
+            remote_cols=['uid'],
+            ondelete='CASCADE',
+        )
+        batch_op.drop_constraint(
+            constraint_name=naming.build_foreign_key_name('TestMetric', 'sid', 'Session'),
+            type_='foreignkey',
+        )
+        batch_op.create_foreign_key(
+            constraint_name=naming.build_foreign_key_name('TestMetric', 'sid', 'Session'),
+            referent_table='Session',
+            local_cols=['sid'],
+            remote_cols=['uid'],
+            ondelete='CASCADE',
+        )
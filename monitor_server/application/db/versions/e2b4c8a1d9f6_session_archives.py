@@ -0,0 +1,38 @@
+"""Session archives
+
+Revision ID: e2b4c8a1d9f6
+Revises: 5c1e9d7a0f43
+Create Date: 2024-02-21 09:48:12.604183
+
+"""
+
+from typing import Sequence
+
+import sqlalchemy as sa
+import sqlalchemy.dialects.mysql as mysql
+from alembic import op
+
+import monitor_server.application.db.nomenclature as naming
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b4c8a1d9f6'
+down_revision: str | None = '5c1e9d7a0f43'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'SessionArchive',
+        sa.Column('sid', sa.String(64), nullable=False),
+        sa.Column('archived_at', mysql.DATETIME(fsp=6), nullable=False),
+        sa.Column('metrics', sa.Integer(), nullable=False),
+        sa.Column('location', sa.String(1024), nullable=False),
+        sa.PrimaryKeyConstraint('sid', name=naming.build_primary_key_name('sid')),
+        sa.ForeignKeyConstraint(
+            ('sid',),
+            refcolumns=['Session.uid'],
+            name=naming.build_foreign_key_name('SessionArchive', 'sid', 'Session'),
+            ondelete='CASCADE',
+        ),
+    )
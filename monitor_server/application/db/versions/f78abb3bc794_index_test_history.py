@@ -0,0 +1,29 @@
+"""Index test history
+
+Revision ID: f78abb3bc794
+Revises: c145aced177c
+Create Date: 2024-02-12 10:14:37.402518
+
+"""
+
+from typing import Sequence
+
+from alembic import op
+
+import monitor_server.application.db.nomenclature as naming
+
+# revision identifiers, used by Alembic.
+revision: str = 'f78abb3bc794'
+down_revision: str | None = 'c145aced177c'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # item_path and variant exceed the maximum length of a MySQL index key: only their prefix is indexed
+    op.create_index(
+        naming.build_index_name('item_path', 'variant', 'item_start_time'),
+        'TestMetric',
+        ['item_path', 'variant', 'item_start_time'],
+        mysql_length={'item_path': 255, 'variant': 255},
+    )
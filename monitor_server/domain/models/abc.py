@@ -16,6 +16,7 @@ class Model(BaseModel):
 class PageableRequest(Model):
     page_no: int = Field(default=0)
     page_size: int = Field(default=0)
+    approximate: bool = Field(default=False)
 
     @property
     def with_pagination(self) -> bool:
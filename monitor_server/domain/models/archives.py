@@ -0,0 +1,21 @@
+import typing as t
+
+from monitor_server.domain.models.abc import Attribute, Model
+
+
+class ArchivePolicy(Model):
+    older_than_days: int = Attribute(ge=0, description='Archive sessions started more than that many days ago')
+    chunk_size: int = Attribute(default=10000, gt=0, description='Maximal number of metrics per archived file')
+    dry_run: bool = Attribute(default=False)
+
+
+class ArchivedSession(Model):
+    session_id: str
+    metrics: int
+    location: str
+
+
+class ArchivingReport(Model):
+    sessions: t.List[ArchivedSession] = Attribute(default_factory=list)
+    dry_run: bool = Attribute(default=False)
+    duration: float = Attribute(default=0.0, description='Seconds')
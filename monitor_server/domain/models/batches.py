@@ -0,0 +1,273 @@
+import datetime
+import pathlib
+import typing as t
+from dataclasses import dataclass
+from uuid import UUID
+
+import numpy as np
+
+from monitor_server.domain.models.metrics import Metric
+
+_MICROSECOND = datetime.timedelta(microseconds=1)
+
+MetricRecord = t.Tuple[
+    UUID | str, str, str, datetime.datetime, str, str, str, str, str, str, float, float, float, float, float
+]
+
+
+@dataclass(frozen=True)
+class DictionaryColumn:
+    """String column stored as integer codes referencing its distinct values."""
+
+    codes: np.ndarray
+    values: t.Tuple[str, ...]
+
+    @classmethod
+    def encode(cls, strings: t.Sequence[str]) -> 'DictionaryColumn':
+        values = tuple(dict.fromkeys(strings))
+        index = {value: code for code, value in enumerate(values)}
+        codes = np.fromiter(map(index.__getitem__, strings), dtype=np.int32, count=len(strings))
+        return cls(codes=codes, values=values)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def decode(self) -> t.List[str]:
+        values = self.values
+        return [values[code] for code in self.codes.tolist()]
+
+    def take(self, indices: np.ndarray) -> 'DictionaryColumn':
+        return DictionaryColumn(codes=self.codes[indices], values=self.values)
+
+    def mask_of(self, value: str) -> np.ndarray:
+        if value not in self.values:
+            return np.zeros(len(self.codes), dtype=bool)
+        return self.codes == self.values.index(value)
+
+    def groups(self) -> t.Dict[str, np.ndarray]:
+        """Indices of the rows holding each distinct value, in row order."""
+        order = np.argsort(self.codes, kind='stable')
+        codes, starts = np.unique(self.codes[order], return_index=True)
+        return {
+            self.values[code]: indices
+            for code, indices in zip(codes.tolist(), np.split(order, starts[1:]), strict=True)
+        }
+
+
+@dataclass(frozen=True)
+class MetricBatch:
+    """Columnar view of a set of metrics: one NumPy array per numeric attribute, dictionary encoded strings."""
+
+    uid: np.ndarray
+    session_id: DictionaryColumn
+    node_id: DictionaryColumn
+    item_start_time: np.ndarray
+    item_path: DictionaryColumn
+    item: DictionaryColumn
+    variant: DictionaryColumn
+    item_path_fs: DictionaryColumn
+    item_type: DictionaryColumn
+    component: DictionaryColumn
+    wall_time: np.ndarray
+    user_time: np.ndarray
+    kernel_time: np.ndarray
+    memory_usage: np.ndarray
+    cpu_usage: np.ndarray
+    timezone: datetime.tzinfo | None = None
+
+    NUMERIC_COLUMNS: t.ClassVar[t.Tuple[str, ...]] = (
+        'wall_time',
+        'user_time',
+        'kernel_time',
+        'memory_usage',
+        'cpu_usage',
+    )
+    STRING_COLUMNS: t.ClassVar[t.Tuple[str, ...]] = (
+        'session_id',
+        'node_id',
+        'item_path',
+        'item',
+        'variant',
+        'item_path_fs',
+        'item_type',
+        'component',
+    )
+
+    @classmethod
+    def empty(cls) -> 'MetricBatch':
+        return cls.from_records([])
+
+    @classmethod
+    def from_records(cls, records: t.Iterable[MetricRecord]) -> 'MetricBatch':
+        """Build a batch out of tuples holding metric attributes in the Metric field order."""
+        return cls.from_columns(list(zip(*records, strict=True)) or [()] * 15)
+
+    @classmethod
+    def from_columns(cls, columns: t.Sequence[t.Sequence[t.Any]]) -> 'MetricBatch':
+        """Build a batch out of one sequence of values per metric attribute, in the Metric field order."""
+        start_times: t.Sequence[datetime.datetime] = columns[3]
+        timezone = start_times[0].tzinfo if start_times else None
+        # Microseconds elapsed since the epoch, the epoch being taken in UTC for timezone aware values
+        epoch = datetime.datetime(1970, 1, 1, tzinfo=None if timezone is None else datetime.UTC)
+        elapsed = np.fromiter(
+            ((value - epoch) // _MICROSECOND for value in start_times), dtype=np.int64, count=len(start_times)
+        )
+        return cls(
+            uid=np.array([value.hex if isinstance(value, UUID) else value for value in columns[0]], dtype='U32'),
+            session_id=DictionaryColumn.encode(columns[1]),
+            node_id=DictionaryColumn.encode(columns[2]),
+            item_start_time=elapsed.astype('datetime64[us]'),
+            item_path=DictionaryColumn.encode(columns[4]),
+            item=DictionaryColumn.encode(columns[5]),
+            variant=DictionaryColumn.encode(columns[6]),
+            item_path_fs=DictionaryColumn.encode(columns[7]),
+            item_type=DictionaryColumn.encode(columns[8]),
+            component=DictionaryColumn.encode(columns[9]),
+            wall_time=np.array(columns[10], dtype=np.float64),
+            user_time=np.array(columns[11], dtype=np.float64),
+            kernel_time=np.array(columns[12], dtype=np.float64),
+            memory_usage=np.array(columns[13], dtype=np.float64),
+            cpu_usage=np.array(columns[14], dtype=np.float64),
+            timezone=None if timezone is None else datetime.UTC,
+        )
+
+    @classmethod
+    def from_metrics(cls, metrics: t.Iterable[Metric]) -> 'MetricBatch':
+        return cls.from_records(
+            (
+                metric.uid,
+                metric.session_id,
+                metric.node_id,
+                metric.item_start_time,
+                metric.item_path,
+                metric.item,
+                metric.variant,
+                metric.item_path_fs.as_posix(),
+                metric.item_type,
+                metric.component,
+                metric.wall_time,
+                metric.user_time,
+                metric.kernel_time,
+                metric.memory_usage,
+                metric.cpu_usage,
+            )
+            for metric in metrics
+        )
+
+    @classmethod
+    def from_arrays(cls, arrays: t.Mapping[str, np.ndarray]) -> 'MetricBatch':
+        """Build a batch back from the arrays produced by to_arrays."""
+        strings: t.Dict[str, t.Any] = {
+            name: DictionaryColumn(
+                codes=arrays[f'{name}.codes'].astype(np.int32), values=tuple(arrays[f'{name}.values'].tolist())
+            )
+            for name in cls.STRING_COLUMNS
+        }
+        numbers: t.Dict[str, t.Any] = {name: arrays[name].astype(np.float64) for name in cls.NUMERIC_COLUMNS}
+        return cls(
+            uid=arrays['uid'].astype('U32'),
+            item_start_time=arrays['item_start_time'].astype('datetime64[us]'),
+            timezone=datetime.UTC if bool(arrays['utc']) else None,
+            **strings,
+            **numbers,
+        )
+
+    def to_arrays(self) -> t.Dict[str, np.ndarray]:
+        """Flat mapping of plain arrays holding the whole batch, as expected by numpy.savez."""
+        arrays = {
+            'uid': self.uid,
+            'item_start_time': self.item_start_time.astype(np.int64),
+            'utc': np.array(self.timezone is not None),
+        }
+        for name in self.STRING_COLUMNS:
+            column = t.cast(DictionaryColumn, getattr(self, name))
+            arrays[f'{name}.codes'] = column.codes
+            arrays[f'{name}.values'] = np.array(column.values, dtype=str)
+        arrays.update({name: getattr(self, name) for name in self.NUMERIC_COLUMNS})
+        return arrays
+
+    def __len__(self) -> int:
+        return len(self.uid)
+
+    def to_metrics(self) -> t.List[Metric]:
+        start_times = self.item_start_time.astype(datetime.datetime).tolist()
+        if self.timezone is not None:
+            start_times = [value.replace(tzinfo=self.timezone) for value in start_times]
+        return [
+            Metric(
+                uid=uid,
+                session_id=session_id,
+                node_id=node_id,
+                item_start_time=item_start_time,
+                item_path=item_path,
+                item=item,
+                variant=variant,
+                item_path_fs=pathlib.Path(item_path_fs),
+                item_type=item_type,
+                component=component,
+                wall_time=wall_time,
+                user_time=user_time,
+                kernel_time=kernel_time,
+                memory_usage=memory_usage,
+                cpu_usage=cpu_usage,
+            )
+            for (
+                uid,
+                session_id,
+                node_id,
+                item_start_time,
+                item_path,
+                item,
+                variant,
+                item_path_fs,
+                item_type,
+                component,
+                wall_time,
+                user_time,
+                kernel_time,
+                memory_usage,
+                cpu_usage,
+            ) in zip(
+                self.uid.tolist(),
+                self.session_id.decode(),
+                self.node_id.decode(),
+                start_times,
+                self.item_path.decode(),
+                self.item.decode(),
+                self.variant.decode(),
+                self.item_path_fs.decode(),
+                self.item_type.decode(),
+                self.component.decode(),
+                self.wall_time.tolist(),
+                self.user_time.tolist(),
+                self.kernel_time.tolist(),
+                self.memory_usage.tolist(),
+                self.cpu_usage.tolist(),
+                strict=True,
+            )
+        ]
+
+    def take(self, indices: np.ndarray) -> 'MetricBatch':
+        """Sub batch made of the rows at the given indices or matching the given boolean mask."""
+        return MetricBatch(
+            uid=self.uid[indices],
+            item_start_time=self.item_start_time[indices],
+            timezone=self.timezone,
+            **{name: getattr(self, name).take(indices) for name in self.STRING_COLUMNS},
+            **{name: getattr(self, name)[indices] for name in self.NUMERIC_COLUMNS},
+        )
+
+    def where(self, **values: str) -> 'MetricBatch':
+        """Sub batch of the rows whose string columns hold the given values."""
+        mask = np.ones(len(self), dtype=bool)
+        for name, value in values.items():
+            mask &= t.cast(DictionaryColumn, getattr(self, name)).mask_of(value)
+        return self.take(mask)
+
+    def group_by(self, name: str) -> t.Dict[str, 'MetricBatch']:
+        """Split the batch per distinct value of the given string column."""
+        column = t.cast(DictionaryColumn, getattr(self, name))
+        return {value: self.take(indices) for value, indices in column.groups().items()}
+
+    def totals(self) -> t.Dict[str, float]:
+        return {name: float(t.cast(np.ndarray, getattr(self, name)).sum()) for name in self.NUMERIC_COLUMNS}
@@ -1,7 +1,8 @@
-from monitor_server.domain.models.abc import Model
+from monitor_server.domain.models.abc import Attribute, Model
 
 
 class CountInfo(Model):
     metrics: int
     sessions: int
     machines: int
+    approximate: bool = Attribute(default=False)
@@ -0,0 +1,36 @@
+import typing as t
+
+from monitor_server.domain.models.abc import Attribute, Model, PageableRequest
+from monitor_server.domain.models.metrics import MetricAttribute
+
+
+class SessionComparisonRequest(PageableRequest):
+    baseline_session_id: str
+    candidate_session_id: str
+    attribute: MetricAttribute = Attribute(default='wall_time')
+    regression_ratio: float = Attribute(default=1.1, gt=0, description='Minimal candidate/baseline ratio to flag')
+    regression_delta: float = Attribute(default=0.0, ge=0, description='Minimal candidate-baseline delta to flag')
+    only_regressions: bool = Attribute(default=False)
+
+
+class ItemComparison(Model):
+    item_path: str
+    variant: str
+    component: str
+    baseline: float
+    candidate: float
+    delta: float
+    ratio: float | None = Attribute(default=None)
+    regression: bool = Attribute(default=False)
+
+
+class SessionComparison(Model):
+    baseline_session_id: str
+    candidate_session_id: str
+    attribute: MetricAttribute
+    compared: int
+    regressions: int
+    only_in_baseline: int
+    only_in_candidate: int
+    data: t.List[ItemComparison]
+    next_page: int | None = Attribute(default=None)
@@ -0,0 +1,36 @@
+import typing as t
+from datetime import datetime
+
+from monitor_server.domain.models.abc import Attribute, Model
+from monitor_server.domain.models.metrics import MetricAttribute
+
+Downsampling = t.Literal['none', 'buckets', 'lttb']
+
+
+class ItemHistoryRequest(Model):
+    item_path: str
+    variant: str
+    node_id: str | None = Attribute(default=None)
+    since: datetime | None = Attribute(default=None)
+    until: datetime | None = Attribute(default=None)
+    attribute: MetricAttribute = Attribute(default='wall_time')
+    downsampling: Downsampling = Attribute(default='none')
+    max_points: int = Attribute(default=1000, gt=2, description='Maximal number of points once downsampled')
+
+
+class HistoryPoint(Model):
+    time: datetime
+    value: float
+    min: float | None = Attribute(default=None)
+    max: float | None = Attribute(default=None)
+    count: int = Attribute(default=1)
+    session_id: str | None = Attribute(default=None)
+
+
+class ItemHistory(Model):
+    item_path: str
+    variant: str
+    attribute: MetricAttribute
+    downsampling: Downsampling
+    total_points: int
+    points: t.List[HistoryPoint]
@@ -45,3 +45,4 @@ class NewMachineCreated(Model):
 class MachineListing(Model):
     data: t.List[Machine]
     next_page: int | None = Attribute(default=None)
+    approximate: bool = Attribute(default=False)
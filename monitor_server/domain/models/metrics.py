@@ -4,6 +4,8 @@ from datetime import datetime
 
 from monitor_server.domain.models.abc import Attribute, Entity, Model
 
+MetricAttribute = t.Literal['wall_time', 'user_time', 'kernel_time', 'cpu_usage', 'memory_usage']
+
 
 class Metric(Entity):
     session_id: str
@@ -56,3 +58,4 @@ class NewMetricCreated(Model):
 class MetricsListing(Model):
     data: t.List[Metric]
     next_page: int | None = Attribute(default=None)
+    approximate: bool = Attribute(default=False)
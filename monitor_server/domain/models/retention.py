@@ -0,0 +1,35 @@
+import typing as t
+
+from monitor_server.domain.models.abc import Attribute, Model
+
+
+class RetentionPolicy(Model):
+    """Sessions to keep: a session is pruned only when no rule keeps it. A policy without any rule keeps everything."""
+
+    keep_days: int | None = Attribute(default=None, ge=0, description='Keep sessions started within that many days')
+    keep_last: int | None = Attribute(default=None, ge=0, description='Keep the latest sessions of each group')
+    per_tag: str | None = Attribute(
+        default=None, description='Tag grouping sessions for keep_last, all sessions form a single group when unset'
+    )
+    keep_sealed: bool = Attribute(default=True, description='Keep sealed sessions, whatever their age')
+    chunk_size: int = Attribute(default=1000, gt=0, description='Maximal number of metrics deleted per transaction')
+    pause: float = Attribute(default=0.05, ge=0, description='Seconds to wait between two chunks')
+    dry_run: bool = Attribute(default=False)
+
+    @property
+    def has_rules(self) -> bool:
+        return self.keep_days is not None or self.keep_last is not None
+
+
+class PruningProgress(Model):
+    session_id: str
+    sessions_done: int
+    sessions_total: int
+    metrics_deleted: int
+
+
+class PruningReport(Model):
+    sessions: t.List[str] = Attribute(default_factory=list)
+    metrics: int = Attribute(default=0)
+    dry_run: bool = Attribute(default=False)
+    duration: float = Attribute(default=0.0, description='Seconds')
@@ -0,0 +1,111 @@
+import math
+import typing as t
+
+from monitor_server.domain.models.abc import Attribute, Model
+from monitor_server.domain.models.metrics import Metric, MetricAttribute
+from monitor_server.domain.models.statistics import MetricStatistics, Statistics
+
+ROLLUP_ATTRIBUTES: t.Tuple[MetricAttribute, ...] = t.get_args(MetricAttribute)
+
+
+class AttributeRollup(Model):
+    """Running aggregates of a metric attribute, from which mean and standard deviation are derived."""
+
+    count: int = Attribute(default=0, ge=0)
+    total: float = Attribute(default=0.0)
+    squares: float = Attribute(default=0.0)
+    minimum: float = Attribute(default=math.inf)
+    maximum: float = Attribute(default=-math.inf)
+
+    @classmethod
+    def of(cls, values: t.Iterable[float]) -> 'AttributeRollup':
+        count, total, squares, minimum, maximum = 0, 0.0, 0.0, math.inf, -math.inf
+        for value in values:
+            count += 1
+            total += value
+            squares += value * value
+            minimum, maximum = min(minimum, value), max(maximum, value)
+        return cls(count=count, total=total, squares=squares, minimum=minimum, maximum=maximum)
+
+    def merge(self, other: 'AttributeRollup') -> 'AttributeRollup':
+        return AttributeRollup(
+            count=self.count + other.count,
+            total=self.total + other.total,
+            squares=self.squares + other.squares,
+            minimum=min(self.minimum, other.minimum),
+            maximum=max(self.maximum, other.maximum),
+        )
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        """Population standard deviation"""
+        if not self.count:
+            return 0.0
+        return math.sqrt(max(self.squares / self.count - self.mean**2, 0.0))
+
+    def to_statistics(self) -> Statistics:
+        return Statistics(sum=self.total, mean=self.mean, min=self.minimum, max=self.maximum)
+
+
+class Rollup(Model):
+    """Aggregates of all metrics of a session, or of a single component of a session."""
+
+    session_id: str
+    component: str | None = Attribute(default=None)
+    attributes: t.Dict[MetricAttribute, AttributeRollup] = Attribute(default_factory=dict)
+
+    @property
+    def count(self) -> int:
+        return max((rollup.count for rollup in self.attributes.values()), default=0)
+
+    @classmethod
+    def of(cls, session_id: str, metrics: t.Sequence[Metric], component: str | None = None) -> 'Rollup':
+        return cls(
+            session_id=session_id,
+            component=component,
+            attributes={
+                attribute: AttributeRollup.of(getattr(metric, attribute) for metric in metrics)
+                for attribute in ROLLUP_ATTRIBUTES
+            },
+        )
+
+    def merge(self, other: 'Rollup') -> 'Rollup':
+        attributes = dict(self.attributes)
+        for attribute, rollup in other.attributes.items():
+            attributes[attribute] = attributes[attribute].merge(rollup) if attribute in attributes else rollup
+        return self.model_copy(update={'attributes': attributes})
+
+    def to_statistics(self) -> MetricStatistics | None:
+        if not self.count:
+            return None
+        return MetricStatistics(
+            count=self.count,
+            **{attribute: rollup.to_statistics() for attribute, rollup in self.attributes.items()},
+        )
+
+
+class SessionRollups(Model):
+    session_id: str
+    overall: Rollup | None = Attribute(default=None)
+    components: t.Dict[str, Rollup] = Attribute(default_factory=dict)
+
+
+def rollups_of(metrics: t.Iterable[Metric]) -> t.Tuple[t.List[Rollup], t.List[Rollup]]:
+    """Session and (session, component) rollups of the given metrics, each group being aggregated once."""
+    by_component: t.Dict[t.Tuple[str, str], t.List[Metric]] = {}
+    for metric in metrics:
+        by_component.setdefault((metric.session_id, metric.component), []).append(metric)
+    components = [
+        Rollup.of(session_id, grouped, component=component) for (session_id, component), grouped in by_component.items()
+    ]
+    sessions: t.Dict[str, Rollup] = {}
+    for rollup in components:
+        session = rollup.model_copy(update={'component': None})
+        sessions[rollup.session_id] = (
+            sessions[rollup.session_id].merge(session) if rollup.session_id in sessions else session
+        )
+    return list(sessions.values()), components
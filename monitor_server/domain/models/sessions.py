@@ -35,3 +35,4 @@ class NewSessionCreated(Model):
 class SessionListing(Model):
     data: t.List[MonitorSession]
     next_page: int | None = Attribute(default=None)
+    approximate: bool = Attribute(default=False)
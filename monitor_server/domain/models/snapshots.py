@@ -0,0 +1,23 @@
+import zlib
+
+from monitor_server.domain.models.abc import Model
+from monitor_server.domain.models.aggregates import ValidationSuite
+
+
+class SealSessionRequest(Model):
+    session_id: str
+
+
+class SealedSession(Model):
+    session_id: str
+    metrics: int
+    size: int
+
+
+def encode_suite(suite: ValidationSuite) -> bytes:
+    """Compressed JSON document of a whole validation suite"""
+    return zlib.compress(suite.model_dump_json().encode())
+
+
+def decode_suite(payload: bytes) -> ValidationSuite:
+    return ValidationSuite.model_validate_json(zlib.decompress(payload))
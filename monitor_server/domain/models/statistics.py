@@ -0,0 +1,112 @@
+import typing as t
+
+import numpy as np
+
+from monitor_server.domain.models.abc import Attribute, Model
+from monitor_server.domain.models.batches import MetricBatch
+
+PERCENTILES = (50, 95, 99)
+
+
+class Statistics(Model):
+    sum: float
+    mean: float
+    min: float
+    max: float
+    p50: float | None = Attribute(default=None)
+    p95: float | None = Attribute(default=None)
+    p99: float | None = Attribute(default=None)
+
+
+class MetricStatistics(Model):
+    count: int
+    wall_time: Statistics
+    user_time: Statistics
+    kernel_time: Statistics
+    cpu_usage: Statistics
+    memory_usage: Statistics
+
+    @classmethod
+    def merge(cls, statistics: t.Iterable['MetricStatistics']) -> t.Optional['MetricStatistics']:
+        """Combine statistics of disjoint sets of metrics. Percentiles cannot be combined and are dropped."""
+        parts = list(statistics)
+        if not parts:
+            return None
+        count = sum(part.count for part in parts)
+        merged: t.Dict[str, t.Any] = {'count': count}
+        for name in MetricBatch.NUMERIC_COLUMNS:
+            columns = [t.cast(Statistics, getattr(part, name)) for part in parts]
+            total = sum(column.sum for column in columns)
+            merged[name] = Statistics(
+                sum=total,
+                mean=total / count,
+                min=min(column.min for column in columns),
+                max=max(column.max for column in columns),
+            )
+        return cls(**merged)
+
+
+class SessionStatisticsRequest(Model):
+    session_id: str
+    with_percentiles: bool = Attribute(default=True)
+
+
+class SessionStatistics(Model):
+    session_id: str
+    overall: MetricStatistics | None = Attribute(default=None)
+    components: t.Dict[str, MetricStatistics] = Attribute(default_factory=dict)
+
+
+def _column_statistics(
+    values: np.ndarray, codes: np.ndarray, counts: np.ndarray, with_percentiles: bool
+) -> t.Dict[str, np.ndarray]:
+    groups = len(counts)
+    sums = np.bincount(codes, weights=values, minlength=groups)
+    mins, maxs = np.full(groups, np.inf), np.full(groups, -np.inf)
+    np.minimum.at(mins, codes, values)
+    np.maximum.at(maxs, codes, values)
+    result = {'sum': sums, 'mean': sums / np.maximum(counts, 1), 'min': mins, 'max': maxs}
+    if with_percentiles:
+        # Values sorted group by group: percentiles of all groups are then interpolated at once
+        ordered = values[np.lexsort((values, codes))]
+        starts = np.cumsum(counts) - counts
+        for percentile in PERCENTILES:
+            position = starts + (counts - 1).clip(min=0) * percentile / 100
+            lower, upper = np.floor(position).astype(np.int64), np.ceil(position).astype(np.int64)
+            lower, upper = lower.clip(max=len(ordered) - 1), upper.clip(max=len(ordered) - 1)
+            weight = position - np.floor(position)
+            result[f'p{percentile}'] = ordered[lower] * (1 - weight) + ordered[upper] * weight
+    return result
+
+
+def _statistics_of(
+    batch: MetricBatch, codes: np.ndarray, labels: t.Sequence[str], with_percentiles: bool
+) -> t.Dict[str, MetricStatistics]:
+    counts = np.bincount(codes, minlength=len(labels))
+    columns = {
+        name: _column_statistics(getattr(batch, name), codes, counts, with_percentiles)
+        for name in MetricBatch.NUMERIC_COLUMNS
+    }
+    return {
+        labels[group]: MetricStatistics(
+            count=int(counts[group]),
+            **{
+                name: Statistics(**{key: float(values[group]) for key, values in aggregates.items()})
+                for name, aggregates in columns.items()
+            },
+        )
+        for group in np.flatnonzero(counts).tolist()
+    }
+
+
+def grouped_statistics(batch: MetricBatch, by: str, with_percentiles: bool = True) -> t.Dict[str, MetricStatistics]:
+    """Statistics of the batch per distinct value of the given string column, all groups being computed at once."""
+    column = getattr(batch, by)
+    return _statistics_of(batch, column.codes, column.values, with_percentiles)
+
+
+def batch_statistics(batch: MetricBatch, with_percentiles: bool = True) -> MetricStatistics | None:
+    """Statistics of the whole batch, None when it is empty."""
+    if not len(batch):
+        return None
+    return _statistics_of(batch, np.zeros(len(batch), dtype=np.int32), ('',), with_percentiles)['']
@@ -0,0 +1,45 @@
+import typing as t
+
+from monitor_server.domain.use_cases.abc import INPUT, OUTPUT, UseCase
+from monitor_server.infrastructure.orm.cache import CacheStatistics, LRUCache
+from monitor_server.infrastructure.orm.config import CacheConfig
+from monitor_server.infrastructure.orm.repositories import CRUDRepositoryABC
+
+ResultKey = t.Tuple[str, int, str]
+
+
+class CachedUseCase(UseCase[INPUT, OUTPUT]):
+    """Serve the results of a read only use case from memory for as long as the repository it reads is unchanged.
+
+    Results are keyed by the use case, the write generation of the repository and the whole input (page parameters
+    and filters). Any write through the repository bumps its generation, so that results computed before are never
+    served again and age out of the bounded cache. Writes the repository does not see, made by other processes or
+    cascaded by the database from deletions in other tables, are caught up with once results expire: the default
+    cache keeps them for the default ttl of the entity cache. Results are copied on read: callers cannot alter the
+    cached state.
+    """
+
+    def __init__(
+        self,
+        use_case: UseCase[INPUT, OUTPUT],
+        repository: CRUDRepositoryABC,
+        cache: LRUCache[ResultKey, OUTPUT] | None = None,
+    ) -> None:
+        super().__init__()
+        self._use_case = use_case
+        self._repository = repository
+        self._cache: LRUCache[ResultKey, OUTPUT] = (
+            cache if cache is not None else LRUCache(max_size=128, ttl=CacheConfig().ttl)
+        )
+
+    @property
+    def statistics(self) -> CacheStatistics:
+        return self._cache.statistics
+
+    def execute(self, input_dto: INPUT) -> OUTPUT:
+        key = (type(self._use_case).__qualname__, self._repository.generation, input_dto.model_dump_json())
+        result = self._cache.get(key)
+        if result is None:
+            result = self._use_case.execute(input_dto)
+            self._cache.put(key, result)
+        return result.model_copy(deep=True)
@@ -1,20 +1,56 @@
 from monitor_server.domain.models.common import CountInfo
-from monitor_server.domain.use_cases.abc import UseCaseWithoutInput
-from monitor_server.domain.use_cases.exceptions import UseCaseError
+from monitor_server.domain.models.statistics import (
+    SessionStatistics,
+    SessionStatisticsRequest,
+    batch_statistics,
+    grouped_statistics,
+)
+from monitor_server.domain.use_cases.abc import UseCase, UseCaseWithoutInput
+from monitor_server.domain.use_cases.exceptions import SessionNotFound, UseCaseError
 from monitor_server.infrastructure.orm.errors import ORMError
+from monitor_server.infrastructure.persistence.exceptions import EntityNotFound
 from monitor_server.infrastructure.persistence.services import MonitoringMetricsService
 
 
 class CollectInfoUseCase(UseCaseWithoutInput[CountInfo]):
-    def __init__(self, metric_service: MonitoringMetricsService) -> None:
+    def __init__(self, metric_service: MonitoringMetricsService, approximate: bool = False) -> None:
         self._service = metric_service
+        self._approximate = approximate
 
     def execute(self) -> CountInfo:
         try:
             return CountInfo(
-                metrics=self._service.count_metrics(),
-                sessions=self._service.count_sessions(),
-                machines=self._service.count_machines(),
+                metrics=self._service.count_metrics(approximate=self._approximate),
+                sessions=self._service.count_sessions(approximate=self._approximate),
+                machines=self._service.count_machines(approximate=self._approximate),
+                approximate=self._approximate,
             )
         except ORMError as e:
             raise UseCaseError(str(e)) from e
+
+
+class CollectSessionStatisticsUseCase(UseCase[SessionStatisticsRequest, SessionStatistics]):
+    def __init__(self, metric_service: MonitoringMetricsService) -> None:
+        self._service = metric_service
+
+    def execute(self, input_dto: SessionStatisticsRequest) -> SessionStatistics:
+        try:
+            self._service.get_session(input_dto.session_id)
+            if input_dto.with_percentiles:
+                batch = self._service.metric_repository().get_batch_of(session_id=input_dto.session_id)
+                overall = batch_statistics(batch)
+                components = grouped_statistics(batch, by='component')
+            else:
+                # Aggregates are read from the rollups maintained on ingestion, metrics are not scanned
+                rollups = self._service.get_rollups(input_dto.session_id)
+                overall = rollups.overall.to_statistics() if rollups.overall else None
+                components = {
+                    component: statistics
+                    for component, rollup in rollups.components.items()
+                    if (statistics := rollup.to_statistics()) is not None
+                }
+            return SessionStatistics(session_id=input_dto.session_id, overall=overall, components=components)
+        except EntityNotFound as e:
+            raise SessionNotFound(str(e)) from e
+        except ORMError as e:
+            raise UseCaseError(str(e)) from e
@@ -18,3 +18,11 @@ class MetricAlreadyExists(UseCaseError):
     """Used to signify that a metric cannot be added because its uid is already taken by another metric.
     This usually tells that a metric is inserted twice for the same session/context.
     """
+
+
+class SessionNotFound(UseCaseError):
+    """Used to signify that the requested session does not exist"""
+
+
+class SessionSealed(UseCaseError):
+    """Used to signify that a session has been sealed: metrics can no longer be added to it"""
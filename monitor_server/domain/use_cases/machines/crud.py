@@ -33,8 +33,10 @@ class ListMachine(UseCase[PageableRequest, MachineListing]):
         try:
             page_info = None
             if input_dto.with_pagination:
-                page_info = PageableStatement(page_no=input_dto.page_no, page_size=input_dto.page_size)
+                page_info = PageableStatement(
+                    page_no=input_dto.page_no, page_size=input_dto.page_size, approximate=input_dto.approximate
+                )
             result = self._repository.list(page_info)
-            return MachineListing(data=result.data, next_page=result.next_page)
+            return MachineListing(data=result.data, next_page=result.next_page, approximate=result.approximate)
         except ORMError as e:
             raise UseCaseError(str(e)) from e
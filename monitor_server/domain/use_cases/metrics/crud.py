@@ -3,28 +3,41 @@ import typing as t
 from monitor_server.domain.models.abc import PageableRequest
 from monitor_server.domain.models.metrics import Metric, MetricsListing, NewMetricCreated
 from monitor_server.domain.use_cases.abc import UseCase
-from monitor_server.domain.use_cases.exceptions import InvalidMetric, MetricAlreadyExists, UseCaseError
+from monitor_server.domain.use_cases.exceptions import InvalidMetric, MetricAlreadyExists, SessionSealed, UseCaseError
 from monitor_server.infrastructure.orm.pageable import PageableStatement
-from monitor_server.infrastructure.persistence.exceptions import EntityAlreadyExists, LinkedEntityMissing, ORMError
+from monitor_server.infrastructure.persistence.exceptions import (
+    EntityAlreadyExists,
+    EntitySealed,
+    LinkedEntityMissing,
+    ORMError,
+)
 from monitor_server.infrastructure.persistence.metrics import MetricRepository
 from monitor_server.infrastructure.persistence.services import MonitoringMetricsService
+from monitor_server.infrastructure.persistence.spool import IngestionSpool
 
 
 class AddMetric(UseCase[Metric, NewMetricCreated]):
-    def __init__(self, metric_service: MonitoringMetricsService) -> None:
+    def __init__(self, metric_service: MonitoringMetricsService, spool: IngestionSpool | None = None) -> None:
         super().__init__()
         self._metric_svc = metric_service
+        # Metrics are acknowledged once spooled when set, a SpoolReplayer writing them afterward
+        self._spool = spool
 
     def execute(self, input_dto: Metric) -> NewMetricCreated:
         try:
             metric = t.cast(Metric, Metric.from_dict(input_dto.to_dict()))
+            if self._spool is not None:
+                self._spool.append([metric])
+                return NewMetricCreated(uid=metric.uid.hex)
             self._metric_svc.add_metric(metric)
             return NewMetricCreated(uid=metric.uid.hex)
         except EntityAlreadyExists as e:
             raise MetricAlreadyExists(str(e)) from e
         except LinkedEntityMissing as e:
             raise InvalidMetric(str(e)) from e
-        except ORMError as e:
+        except EntitySealed as e:
+            raise SessionSealed(str(e)) from e
+        except (ORMError, OSError) as e:
             raise UseCaseError(str(e)) from e
 
 
@@ -37,8 +50,10 @@ class ListMetrics(UseCase[PageableRequest, MetricsListing]):
         try:
             page_info = None
             if input_dto.with_pagination:
-                page_info = PageableStatement(page_no=input_dto.page_no, page_size=input_dto.page_size)
+                page_info = PageableStatement(
+                    page_no=input_dto.page_no, page_size=input_dto.page_size, approximate=input_dto.approximate
+                )
             result = self._repo.list(page_info)
-            return MetricsListing(data=result.data, next_page=result.next_page)
+            return MetricsListing(data=result.data, next_page=result.next_page, approximate=result.approximate)
         except ORMError as e:
             raise UseCaseError(str(e)) from e
@@ -0,0 +1,119 @@
+import typing as t
+from datetime import datetime
+
+import numpy as np
+
+from monitor_server.domain.models.batches import MetricBatch
+from monitor_server.domain.models.history import HistoryPoint, ItemHistory, ItemHistoryRequest
+from monitor_server.domain.use_cases.abc import UseCase
+from monitor_server.domain.use_cases.exceptions import UseCaseError
+from monitor_server.infrastructure.orm.errors import ORMError
+from monitor_server.infrastructure.persistence.metrics import MetricRepository
+
+
+def _lttb(times: np.ndarray, values: np.ndarray, max_points: int) -> np.ndarray:
+    """Indices of the points kept by the Largest-Triangle-Three-Buckets algorithm.
+
+    First and last points are always kept. In between, points are split in max_points - 2 buckets and each bucket
+    keeps the point forming the largest triangle with the previously kept point and the average of the next bucket.
+    """
+    count = len(times)
+    if count <= max_points:
+        return np.arange(count)
+    x = (times - times[0]).astype(np.float64)
+    edges = (np.arange(max_points - 1) * (count - 2) / (max_points - 2)).astype(np.int64) + 1
+    edges[-1] = count - 1
+    kept = np.empty(max_points, dtype=np.int64)
+    kept[0], kept[-1] = 0, count - 1
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else count
+        next_x, next_y = x[end:next_end].mean(), values[end:next_end].mean()
+        areas = np.abs(
+            (x[previous] - next_x) * (values[start:end] - values[previous])
+            - (x[previous] - x[start:end]) * (next_y - values[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        kept[bucket + 1] = previous
+    return kept
+
+
+def _buckets(times: np.ndarray, values: np.ndarray, max_points: int) -> t.Dict[str, np.ndarray]:
+    """Points grouped in max_points buckets of equal duration, each summarized by its mean time, mean, min and max."""
+    elapsed = (times - times[0]).astype(np.int64)
+    buckets = elapsed * max_points // (int(elapsed[-1]) + 1)
+    counts = np.bincount(buckets, minlength=max_points)
+    lows, highs = np.full(max_points, np.inf), np.full(max_points, -np.inf)
+    np.minimum.at(lows, buckets, values)
+    np.maximum.at(highs, buckets, values)
+    filled = counts > 0
+    counts = counts[filled]
+    mean_elapsed = np.bincount(buckets, weights=elapsed, minlength=max_points)[filled] / counts
+    return {
+        'time': times[0] + np.rint(mean_elapsed).astype(np.int64).astype('timedelta64[us]'),
+        'value': np.bincount(buckets, weights=values, minlength=max_points)[filled] / counts,
+        'min': lows[filled],
+        'max': highs[filled],
+        'count': counts,
+    }
+
+
+class GetItemHistory(UseCase[ItemHistoryRequest, ItemHistory]):
+    def __init__(self, metric_repo: MetricRepository) -> None:
+        super().__init__()
+        self._repo = metric_repo
+
+    @staticmethod
+    def _times_of(batch: MetricBatch, times: np.ndarray) -> t.List[datetime]:
+        values = times.astype(datetime).tolist()
+        if batch.timezone is None:
+            return values
+        return [value.replace(tzinfo=batch.timezone) for value in values]
+
+    def execute(self, input_dto: ItemHistoryRequest) -> ItemHistory:
+        try:
+            batch = self._repo.history_of(
+                input_dto.item_path,
+                input_dto.variant,
+                node_id=input_dto.node_id,
+                since=input_dto.since,
+                until=input_dto.until,
+            )
+        except ORMError as e:
+            raise UseCaseError(str(e)) from e
+
+        total_points = len(batch)
+        times, values = batch.item_start_time, getattr(batch, input_dto.attribute)
+        points: t.List[HistoryPoint]
+        if input_dto.downsampling == 'buckets' and len(batch) > input_dto.max_points:
+            summary = _buckets(times, values, input_dto.max_points)
+            points = [
+                HistoryPoint(time=time, value=value, min=low, max=high, count=count)
+                for time, value, low, high, count in zip(
+                    self._times_of(batch, summary['time']),
+                    summary['value'].tolist(),
+                    summary['min'].tolist(),
+                    summary['max'].tolist(),
+                    summary['count'].tolist(),
+                    strict=True,
+                )
+            ]
+        else:
+            if input_dto.downsampling == 'lttb':
+                batch = batch.take(_lttb(times, values, input_dto.max_points))
+                times, values = batch.item_start_time, getattr(batch, input_dto.attribute)
+            points = [
+                HistoryPoint(time=time, value=value, session_id=session_id)
+                for time, value, session_id in zip(
+                    self._times_of(batch, times), values.tolist(), batch.session_id.decode(), strict=True
+                )
+            ]
+        return ItemHistory(
+            item_path=input_dto.item_path,
+            variant=input_dto.variant,
+            attribute=input_dto.attribute,
+            downsampling=input_dto.downsampling,
+            total_points=total_points,
+            points=points,
+        )
@@ -0,0 +1,64 @@
+import time
+import typing as t
+from datetime import UTC, datetime, timedelta
+
+from monitor_server.domain.models.archives import ArchivedSession, ArchivePolicy, ArchivingReport
+from monitor_server.domain.use_cases.abc import UseCase
+from monitor_server.domain.use_cases.exceptions import UseCaseError
+from monitor_server.infrastructure.orm.errors import ORMError
+from monitor_server.infrastructure.persistence.exceptions import EntityNotFound
+from monitor_server.infrastructure.persistence.services import MonitoringMetricsService
+
+
+def _now() -> datetime:
+    return datetime.now(tz=UTC)
+
+
+class ArchiveSessions(UseCase[ArchivePolicy, ArchivingReport]):
+    """Move the metrics of old sessions to the cold archive, oldest sessions first.
+
+    Sealed sessions are baselines and stay where they are, as do sessions already archived.
+    """
+
+    def __init__(
+        self,
+        metric_service: MonitoringMetricsService,
+        on_archived: t.Callable[[ArchivedSession], None] | None = None,
+        clock: t.Callable[[], datetime] = _now,
+    ) -> None:
+        super().__init__()
+        self._service = metric_service
+        self._on_archived = on_archived
+        self._clock = clock
+
+    def candidates(self, policy: ArchivePolicy) -> t.List[str]:
+        threshold = self._clock() - timedelta(days=policy.older_than_days)
+        sessions = sorted(
+            (session for session in self._service.session_repository().stream() if session.start_date < threshold),
+            key=lambda session: session.start_date,
+        )
+        session_ids = [session.uid.hex for session in sessions]
+        excluded = self._service.snapshot_repository().sealed_among(session_ids)
+        excluded |= self._service.archive_repository().archived_among(session_ids)
+        return [session_id for session_id in session_ids if session_id not in excluded]
+
+    def execute(self, input_dto: ArchivePolicy) -> ArchivingReport:
+        started = time.perf_counter()
+        report = ArchivingReport(dry_run=input_dto.dry_run)
+        try:
+            for session_id in self.candidates(input_dto):
+                if input_dto.dry_run:
+                    report.sessions.append(ArchivedSession(session_id=session_id, metrics=0, location=''))
+                    continue
+                try:
+                    archived = self._service.archive_session(session_id, input_dto.chunk_size)
+                except EntityNotFound:
+                    # Removed by someone else meanwhile
+                    continue
+                report.sessions.append(archived)
+                if self._on_archived:
+                    self._on_archived(archived)
+        except ORMError as e:
+            raise UseCaseError(str(e)) from e
+        report.duration = time.perf_counter() - started
+        return report
@@ -0,0 +1,125 @@
+import itertools
+import typing as t
+
+import numpy as np
+
+from monitor_server.domain.models.batches import DictionaryColumn, MetricBatch
+from monitor_server.domain.models.comparisons import ItemComparison, SessionComparison, SessionComparisonRequest
+from monitor_server.domain.use_cases.abc import UseCase
+from monitor_server.domain.use_cases.exceptions import SessionNotFound, UseCaseError
+from monitor_server.infrastructure.orm.errors import ORMError
+from monitor_server.infrastructure.orm.pageable import PageableStatement
+from monitor_server.infrastructure.persistence.exceptions import EntityNotFound
+from monitor_server.infrastructure.persistence.services import MonitoringMetricsService
+
+
+def _shared_codes(columns: t.Sequence[DictionaryColumn]) -> t.Tuple[t.List[np.ndarray], int]:
+    """Codes of the rows of each column in a dictionary of the values of all of them, and its size. Only the distinct
+    values are looked up, rows are recoded at once."""
+    values = dict.fromkeys(itertools.chain.from_iterable(column.values for column in columns))
+    index = {value: code for code, value in enumerate(values)}
+    codes = [
+        np.fromiter(map(index.__getitem__, column.values), dtype=np.int64, count=len(column.values))[column.codes]
+        for column in columns
+    ]
+    return codes, len(index)
+
+
+def _test_keys(*batches: MetricBatch) -> t.List[np.ndarray]:
+    """Integer key of the (item_path, variant) of every row, comparable across batches. Keys are ordered by the first
+    appearance of their item_path, then of their variant, the first batch coming first."""
+    paths, _ = _shared_codes([batch.item_path for batch in batches])
+    variants, n_variants = _shared_codes([batch.variant for batch in batches])
+    return [path * n_variants + variant for path, variant in zip(paths, variants, strict=True)]
+
+
+class _Tests(t.NamedTuple):
+    keys: np.ndarray
+    values: np.ndarray
+    first: np.ndarray
+
+    @classmethod
+    def of(cls, keys: np.ndarray, weights: np.ndarray) -> '_Tests':
+        """Tests of a batch by key, values of tests run several times being averaged."""
+        unique_keys, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(unique_keys))
+        values = np.bincount(inverse, weights=weights, minlength=len(unique_keys)) / counts
+        return cls(keys=unique_keys, values=values, first=first)
+
+
+class CompareSessions(UseCase[SessionComparisonRequest, SessionComparison]):
+    def __init__(self, metric_service: MonitoringMetricsService) -> None:
+        super().__init__()
+        self._service = metric_service
+
+    def _batch_of(self, session_id: str) -> MetricBatch:
+        self._service.get_session(session_id)
+        return self._service.metric_repository().get_batch_of(session_id=session_id)
+
+    def execute(self, input_dto: SessionComparisonRequest) -> SessionComparison:
+        try:
+            baseline_batch = self._batch_of(input_dto.baseline_session_id)
+            candidate_batch = self._batch_of(input_dto.candidate_session_id)
+        except EntityNotFound as e:
+            raise SessionNotFound(str(e)) from e
+        except ORMError as e:
+            raise UseCaseError(str(e)) from e
+
+        baseline_keys, candidate_keys = _test_keys(baseline_batch, candidate_batch)
+        baseline = _Tests.of(baseline_keys, getattr(baseline_batch, input_dto.attribute))
+        candidate = _Tests.of(candidate_keys, getattr(candidate_batch, input_dto.attribute))
+        _, in_baseline, in_candidate = np.intersect1d(
+            baseline.keys, candidate.keys, assume_unique=True, return_indices=True
+        )
+        before, after = baseline.values[in_baseline], candidate.values[in_candidate]
+        deltas = after - before
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratios = np.where(before > 0, after / before, np.nan)
+        regressions = (deltas >= input_dto.regression_delta) & (deltas > 0)
+        regressions &= np.isnan(ratios) | (ratios >= input_dto.regression_ratio)
+
+        # Largest slowdowns first, whatever the comparison is filtered on
+        order = np.argsort(-deltas, kind='stable')
+        if input_dto.only_regressions:
+            order = order[regressions[order]]
+        next_page = None
+        if input_dto.with_pagination:
+            page_info = PageableStatement(page_no=input_dto.page_no, page_size=input_dto.page_size)
+            next_page = page_info.build_response([], elements_count=len(order)).next_page
+            order = order[page_info.offset : page_info.offset + page_info.page_size]
+
+        rows = candidate.first[in_candidate[order]]
+        data = [
+            ItemComparison(
+                item_path=item_path,
+                variant=variant,
+                component=component,
+                baseline=baseline_value,
+                candidate=candidate_value,
+                delta=delta,
+                ratio=None if np.isnan(ratio) else ratio,
+                regression=regression,
+            )
+            for item_path, variant, component, baseline_value, candidate_value, delta, ratio, regression in zip(
+                candidate_batch.item_path.take(rows).decode(),
+                candidate_batch.variant.take(rows).decode(),
+                candidate_batch.component.take(rows).decode(),
+                before[order].tolist(),
+                after[order].tolist(),
+                deltas[order].tolist(),
+                ratios[order].tolist(),
+                regressions[order].tolist(),
+                strict=True,
+            )
+        ]
+        return SessionComparison(
+            baseline_session_id=input_dto.baseline_session_id,
+            candidate_session_id=input_dto.candidate_session_id,
+            attribute=input_dto.attribute,
+            compared=len(deltas),
+            regressions=int(regressions.sum()),
+            only_in_baseline=len(baseline.keys) - len(deltas),
+            only_in_candidate=len(candidate.keys) - len(deltas),
+            data=data,
+            next_page=next_page,
+        )
@@ -35,8 +35,10 @@ class ListSession(UseCase[PageableRequest, SessionListing]):
         try:
             page_info = None
             if input_dto.with_pagination:
-                page_info = PageableStatement(page_no=input_dto.page_no, page_size=input_dto.page_size)
+                page_info = PageableStatement(
+                    page_no=input_dto.page_no, page_size=input_dto.page_size, approximate=input_dto.approximate
+                )
             result = self._session_repo.list(page_info)
-            return SessionListing(data=result.data, next_page=result.next_page)
+            return SessionListing(data=result.data, next_page=result.next_page, approximate=result.approximate)
         except ORMError as e:
             raise UseCaseError(str(e)) from e
@@ -0,0 +1,106 @@
+import collections
+import time
+import typing as t
+from datetime import UTC, datetime, timedelta
+
+from monitor_server.domain.models.retention import PruningProgress, PruningReport, RetentionPolicy
+from monitor_server.domain.models.sessions import MonitorSession
+from monitor_server.domain.use_cases.abc import UseCase
+from monitor_server.domain.use_cases.exceptions import UseCaseError
+from monitor_server.infrastructure.orm.errors import ORMError
+from monitor_server.infrastructure.persistence.exceptions import EntityNotFound
+from monitor_server.infrastructure.persistence.services import MonitoringMetricsService
+
+
+def _now() -> datetime:
+    return datetime.now(tz=UTC)
+
+
+class PruneSessions(UseCase[RetentionPolicy, PruningReport]):
+    """Enforce a retention policy, oldest sessions first.
+
+    Metrics of a pruned session are deleted in small uid ordered chunks, each chunk being its own transaction, so that
+    the metric table is never locked for long. The session row goes last: its rollups and snapshot follow through
+    cascading foreign keys. Progress is reported after each chunk.
+    """
+
+    def __init__(
+        self,
+        metric_service: MonitoringMetricsService,
+        on_progress: t.Callable[[PruningProgress], None] | None = None,
+        sleep: t.Callable[[float], None] = time.sleep,
+        clock: t.Callable[[], datetime] = _now,
+    ) -> None:
+        super().__init__()
+        self._service = metric_service
+        self._on_progress = on_progress
+        self._sleep = sleep
+        self._clock = clock
+
+    def _kept_by_rules(self, sessions: t.List[MonitorSession], policy: RetentionPolicy) -> t.Set[str]:
+        kept: t.Set[str] = set()
+        if policy.keep_days is not None:
+            threshold = self._clock() - timedelta(days=policy.keep_days)
+            kept.update(session.uid.hex for session in sessions if session.start_date >= threshold)
+        if policy.keep_last is not None:
+            groups: t.Dict[str | None, t.List[MonitorSession]] = collections.defaultdict(list)
+            for session in sessions:
+                group = str(session.tags.get(policy.per_tag)) if policy.per_tag in session.tags else None
+                groups[group].append(session)
+            for group_sessions in groups.values():
+                latest = sorted(group_sessions, key=lambda session: session.start_date, reverse=True)
+                kept.update(session.uid.hex for session in latest[: policy.keep_last])
+        return kept
+
+    def expired(self, policy: RetentionPolicy) -> t.List[str]:
+        """Sessions the policy does not keep, oldest first"""
+        if not policy.has_rules:
+            return []
+        sessions = sorted(self._service.session_repository().stream(), key=lambda session: session.start_date)
+        kept = self._kept_by_rules(sessions, policy)
+        expired = [session.uid.hex for session in sessions if session.uid.hex not in kept]
+        if policy.keep_sealed:
+            sealed = self._service.snapshot_repository().sealed_among(expired)
+            expired = [session_id for session_id in expired if session_id not in sealed]
+        return expired
+
+    def _prune(self, session_id: str, policy: RetentionPolicy, done: int, total: int) -> int:
+        deleted = 0
+        while chunk := self._service.metric_repository().delete_chunk_of(session_id, policy.chunk_size):
+            deleted += chunk
+            if self._on_progress:
+                self._on_progress(
+                    PruningProgress(
+                        session_id=session_id, sessions_done=done, sessions_total=total, metrics_deleted=deleted
+                    )
+                )
+            if chunk == policy.chunk_size and policy.pause:
+                self._sleep(policy.pause)
+        self._service.delete_session(session_id)
+        if self._on_progress:
+            self._on_progress(
+                PruningProgress(
+                    session_id=session_id, sessions_done=done + 1, sessions_total=total, metrics_deleted=deleted
+                )
+            )
+        return deleted
+
+    def execute(self, input_dto: RetentionPolicy) -> PruningReport:
+        started = time.perf_counter()
+        try:
+            expired = self.expired(input_dto)
+            report = PruningReport(dry_run=input_dto.dry_run)
+            if input_dto.dry_run:
+                report.sessions = expired
+            else:
+                for done, session_id in enumerate(expired):
+                    try:
+                        report.metrics += self._prune(session_id, input_dto, done, len(expired))
+                    except EntityNotFound:
+                        # Removed by someone else meanwhile
+                        continue
+                    report.sessions.append(session_id)
+        except ORMError as e:
+            raise UseCaseError(str(e)) from e
+        report.duration = time.perf_counter() - started
+        return report
@@ -0,0 +1,20 @@
+from monitor_server.domain.models.snapshots import SealedSession, SealSessionRequest
+from monitor_server.domain.use_cases.abc import UseCase
+from monitor_server.domain.use_cases.exceptions import SessionNotFound, UseCaseError
+from monitor_server.infrastructure.orm.errors import ORMError
+from monitor_server.infrastructure.persistence.exceptions import EntityNotFound
+from monitor_server.infrastructure.persistence.services import MonitoringMetricsService
+
+
+class SealSession(UseCase[SealSessionRequest, SealedSession]):
+    def __init__(self, metric_service: MonitoringMetricsService) -> None:
+        super().__init__()
+        self._service = metric_service
+
+    def execute(self, input_dto: SealSessionRequest) -> SealedSession:
+        try:
+            return self._service.seal_session(input_dto.session_id)
+        except EntityNotFound as e:
+            raise SessionNotFound(str(e)) from e
+        except ORMError as e:
+            raise UseCaseError(str(e)) from e
@@ -0,0 +1,119 @@
+import hashlib
+import math
+import typing as t
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class BloomStatistics(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    capacity: int = Field(gt=0, description='Keys per generation.')
+    entries: int = Field(ge=0, description='Keys added to the current generation.')
+    bits: int = Field(gt=0, description='Bits per generation.')
+    hashes: int = Field(gt=0, description='Bits set per key.')
+    memory: int = Field(ge=0, description='Bytes held by both generations.')
+    estimated_false_positive_rate: float = Field(
+        ge=0, le=1, description='Chances for an absent key to be reported maybe present, given the bits set.'
+    )
+    lookups: int = Field(default=0, ge=0)
+    maybe_present: int = Field(default=0, ge=0, description='Lookups which could not rule the key out.')
+    false_positives: int = Field(default=0, ge=0, description='Keys reported maybe present then found absent.')
+
+    @property
+    def false_positive_rate(self) -> float:
+        """Share of the absent keys looked up which were reported maybe present"""
+        absent = self.lookups - self.maybe_present + self.false_positives
+        return self.false_positives / absent if absent else 0.0
+
+
+class BloomFilter:
+    """Set of strings telling keys either absent, which is always right, or maybe present, which is wrong for
+    error_rate of the absent keys at most.
+
+    Keys are added to a current generation sized for capacity keys. Once full, it becomes the previous generation and
+    an empty one takes over: the filter remembers the last capacity to 2 * capacity keys without its error rate
+    degrading, older keys being forgotten.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.01) -> None:
+        if capacity <= 0:
+            raise ValueError(f'capacity must be strictly positive, got {capacity}')
+        if not 0 < error_rate < 1:
+            raise ValueError(f'error_rate must be between 0 and 1, got {error_rate}')
+        self.capacity = capacity
+        self.error_rate = error_rate
+        # Optimal sizing: -n ln(p) / ln(2)^2 bits and ln(2) bits per key hashes
+        self._bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self._hashes = max(1, round(self._bits / capacity * math.log(2)))
+        self._current = bytearray((self._bits + 7) // 8)
+        self._previous = bytearray(len(self._current))
+        self._entries = 0
+        self._lookups = self._maybe_present = self._false_positives = 0
+
+    def _positions(self, key: str) -> t.List[int]:
+        # Double hashing: all positions derive from the two halves of a single digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self._bits for i in range(self._hashes)]
+
+    @staticmethod
+    def _holds(bits: bytearray, positions: t.List[int]) -> bool:
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in positions)
+
+    def add(self, key: str) -> None:
+        if self._entries >= self.capacity:
+            self._previous, self._current = self._current, bytearray(len(self._current))
+            self._entries = 0
+        for position in self._positions(key):
+            self._current[position >> 3] |= 1 << (position & 7)
+        self._entries += 1
+
+    def update(self, keys: t.Iterable[str]) -> int:
+        """Add all the given keys. Returns the number of keys added."""
+        count = 0
+        for key in keys:
+            self.add(key)
+            count += 1
+        return count
+
+    def __contains__(self, key: object) -> bool:
+        if not isinstance(key, str):
+            return False
+        positions = self._positions(key)
+        return self._holds(self._current, positions) or self._holds(self._previous, positions)
+
+    def might_contain(self, key: str) -> bool:
+        """Same as the in operator, the lookup being accounted for in the statistics"""
+        found = key in self
+        self._lookups += 1
+        self._maybe_present += found
+        return found
+
+    def record_false_positives(self, count: int) -> None:
+        """Account for keys reported maybe present which turned out to be absent"""
+        self._false_positives += count
+
+    def clear(self) -> None:
+        self._current = bytearray(len(self._current))
+        self._previous = bytearray(len(self._previous))
+        self._entries = 0
+
+    @property
+    def statistics(self) -> BloomStatistics:
+        def rate_of(bits: bytearray) -> float:
+            return (int.from_bytes(bits).bit_count() / self._bits) ** self._hashes
+
+        current, previous = rate_of(self._current), rate_of(self._previous)
+        return BloomStatistics(
+            capacity=self.capacity,
+            entries=self._entries,
+            bits=self._bits,
+            hashes=self._hashes,
+            memory=len(self._current) + len(self._previous),
+            estimated_false_positive_rate=1 - (1 - current) * (1 - previous),
+            lookups=self._lookups,
+            maybe_present=self._maybe_present,
+            false_positives=self._false_positives,
+        )
@@ -0,0 +1,158 @@
+import time
+import typing as t
+from collections import OrderedDict
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from monitor_server.infrastructure.orm.pageable import PageableStatement, PaginatedResponse
+from monitor_server.infrastructure.orm.repositories import CRUDRepositoryABC, DomainObject, Model
+
+Key = t.TypeVar('Key', bound=t.Hashable)
+Value = t.TypeVar('Value')
+
+
+class CacheStatistics(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    size: int = Field(ge=0)
+    max_size: int = Field(gt=0)
+    hits: int = Field(default=0, ge=0)
+    misses: int = Field(default=0, ge=0, description='Lookups of absent or expired entries.')
+    evictions: int = Field(default=0, ge=0, description='Entries dropped to make room for new ones.')
+    expirations: int = Field(default=0, ge=0, description='Entries dropped because they outlived the ttl.')
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class LRUCache(t.Generic[Key, Value]):
+    """Bounded mapping evicting the least recently used entry when full. Entries optionally expire ttl seconds
+    after being stored."""
+
+    def __init__(
+        self, max_size: int = 1024, ttl: float | None = None, clock: t.Callable[[], float] = time.monotonic
+    ) -> None:
+        if max_size <= 0:
+            raise ValueError(f'max_size must be strictly positive, got {max_size}')
+        self._max_size = max_size
+        self._ttl = ttl
+        self._clock = clock
+        # Entries with their expiry date, least recently used first
+        self._entries: OrderedDict[Key, t.Tuple[Value, float]] = OrderedDict()
+        self._hits = self._misses = self._evictions = self._expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Key) -> Value | None:
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] <= self._clock():
+            del self._entries[key]
+            self._expirations += 1
+            entry = None
+        if entry is None:
+            self._misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return entry[0]
+
+    def put(self, key: Key, value: Value) -> None:
+        expires_at = self._clock() + self._ttl if self._ttl is not None else float('inf')
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def invalidate(self, key: Key) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    @property
+    def statistics(self) -> CacheStatistics:
+        return CacheStatistics(
+            size=len(self._entries),
+            max_size=self._max_size,
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            expirations=self._expirations,
+        )
+
+
+class CachingRepository(CRUDRepositoryABC[DomainObject, Model]):
+    """Read-through cache in front of a repository: items fetched by uid are kept in an LRU cache.
+
+    Only reads populate the cache, so that a write rolled back afterwards cannot leave a phantom entry. Items are
+    invalidated when updated or deleted through this repository and the whole cache is dropped on truncate. Changes
+    made by other processes are seen once the cached entry expires. Cached items are copied on read: callers cannot
+    alter the cached state.
+    """
+
+    def __init__(self, repository: CRUDRepositoryABC[DomainObject, Model], cache: LRUCache[str, DomainObject]) -> None:
+        self._repository = repository
+        self._cache = cache
+
+    @property
+    def repository(self) -> CRUDRepositoryABC[DomainObject, Model]:
+        return self._repository
+
+    @property
+    def statistics(self) -> CacheStatistics:
+        return self._cache.statistics
+
+    @property
+    def generation(self) -> int:
+        return self._repository.generation
+
+    def invalidate(self) -> None:
+        self._cache.clear()
+        self._repository.invalidate()
+
+    def get(self, uid: str) -> DomainObject:
+        item = self._cache.get(uid)
+        if item is None:
+            item = self._repository.get(uid)
+            self._cache.put(uid, item)
+        return item.model_copy(deep=True)
+
+    def create(self, item: DomainObject) -> DomainObject:
+        return self._repository.create(item)
+
+    def bulk_create(self, items: t.Sequence[DomainObject]) -> int:
+        return self._repository.bulk_create(items)
+
+    def update(self, item: DomainObject) -> DomainObject:
+        try:
+            return self._repository.update(item)
+        finally:
+            self._cache.invalidate(item.uid.hex)
+
+    def delete(self, uid: str) -> None:
+        try:
+            self._repository.delete(uid)
+        finally:
+            self._cache.invalidate(uid)
+
+    def truncate(self) -> None:
+        try:
+            self._repository.truncate()
+        finally:
+            self._cache.clear()
+
+    def list(self, page_info: PageableStatement | None = None) -> PaginatedResponse[t.List[DomainObject]]:
+        return self._repository.list(page_info)
+
+    def count(self) -> int:
+        return self._repository.count()
+
+    def estimate_count(self) -> int:
+        return self._repository.estimate_count()
+
+    def stream(self, chunk_size: int = 1000) -> t.Iterator[DomainObject]:
+        return self._repository.stream(chunk_size)
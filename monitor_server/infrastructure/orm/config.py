@@ -1,4 +1,7 @@
-from pydantic import BaseModel, Field
+import pathlib
+import typing as t
+
+from pydantic import BaseModel, Field, model_validator
 
 from monitor_server.infrastructure.config.base import ConfigurationBase
 
@@ -16,21 +19,155 @@ class SessionConfig(BaseModel):
     )
 
 
+class CacheConfig(BaseModel):
+    enabled: bool = Field(
+        default=False,
+        description='When True, sessions and machines read by uid are cached. Each process has its own cache: the '
+        'updates and deletions made by another one are only seen once the cached entries expire.',
+    )
+    max_size: int = Field(default=1024, gt=0, description='Maximum number of entries kept per cached entity.')
+    ttl: float | None = Field(
+        default=300.0,
+        gt=0,
+        description='Number of seconds after which a cached entry is read again from the database. '
+        'Entries never expire when unset.',
+    )
+
+
+class ArchiveConfig(BaseModel):
+    root: pathlib.Path = Field(description='Folder holding the metrics of archived sessions.')
+    chunk_size: int = Field(default=10000, gt=0, description='Number of metrics per archived file.')
+
+
+class SpoolConfig(BaseModel):
+    folder: pathlib.Path = Field(description='Folder of the spool holding metrics until they are written.')
+    sync: bool = Field(default=True, description='When True, metrics are only acknowledged once on disk.')
+    max_file_size: int = Field(default=64 * 1024 * 1024, gt=0, description='Bytes after which a new file is started.')
+    chunk_size: int = Field(default=5000, gt=0, description='Maximum number of metrics replayed at once.')
+    interval: float = Field(default=1.0, gt=0, description='Seconds between two drains of the spool.')
+    max_backoff: float = Field(
+        default=60.0, gt=0, description='Longest wait, in seconds, between two drains while the database fails.'
+    )
+
+
+class UidFilterConfig(BaseModel):
+    capacity: int = Field(
+        default=1_000_000, gt=0, description='Number of metric uids remembered, up to twice as many once full.'
+    )
+    error_rate: float = Field(
+        default=0.01, gt=0, lt=1, description='Share of new metrics looked up in the database all the same.'
+    )
+    warm_up: bool = Field(default=True, description='When True, uids of the latest metrics are loaded on start.')
+
+
+class SQLiteConfig(BaseModel):
+    journal_mode: t.Literal['WAL', 'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY'] = Field(
+        default='WAL', description='WAL lets readers go on while a single writer appends to the log.'
+    )
+    synchronous: t.Literal['OFF', 'NORMAL', 'FULL', 'EXTRA'] = Field(
+        default='NORMAL', description='NORMAL is durable in WAL mode but for the last commits on power loss.'
+    )
+    mmap_size: int = Field(default=256 * 1024 * 1024, ge=0, description='Bytes of the database file memory-mapped.')
+    cache_size: int = Field(
+        default=-64 * 1024, description='Page cache size per connection: pages when positive, KiB when negative.'
+    )
+    busy_timeout: int = Field(default=5000, ge=0, description='Milliseconds to wait for a lock held by a writer.')
+
+    @property
+    def pragmas(self) -> t.List[str]:
+        """Statements run on each new connection. Foreign keys are always enforced."""
+        return [
+            'PRAGMA foreign_keys = ON',
+            f'PRAGMA journal_mode = {self.journal_mode}',
+            f'PRAGMA synchronous = {self.synchronous}',
+            f'PRAGMA mmap_size = {self.mmap_size}',
+            f'PRAGMA cache_size = {self.cache_size}',
+            f'PRAGMA busy_timeout = {self.busy_timeout}',
+        ]
+
+
+RoutingStrategy = t.Literal['round_robin', 'least_busy']
+
+
+class ReplicaEndpoint(BaseModel):
+    host: str = Field(description='Hostname of the replica.')
+    port: int = Field(description='Port the replica is listening to.')
+    username: str | None = Field(default=None, description='Username for the replica, the primary one when unset.')
+    password: str | None = Field(default=None, description='Password for the replica, the primary one when unset.')
+
+
+class ReplicaConfig(BaseModel):
+    endpoints: t.List[ReplicaEndpoint] = Field(min_length=1, description='Read replicas of the primary database.')
+    strategy: RoutingStrategy = Field(
+        default='round_robin',
+        description='How a replica is picked for a read: in turn, or the one with the fewest connections in use.',
+    )
+    read_your_writes: float = Field(
+        default=0.0,
+        ge=0,
+        description='Number of seconds during which reads of a session go to the primary once it wrote, to hide '
+        'replication lag from the writer.',
+    )
+
+
 class ORMConfig(ConfigurationBase, declared_as='orm'):
     driver: str = Field(description='Driver to use for connecting.', default='mysql+mysqldb')
-    username: str = Field(description='Username with which to connect to the database server.')
-    password: str = Field(description='Password to use for initiating the connection.')
-    host: str = Field(description='Hostname for the database server.')
-    port: int = Field(description='Port the database server is listening to.')
+    username: str | None = Field(default=None, description='Username with which to connect to the database server.')
+    password: str | None = Field(default=None, description='Password to use for initiating the connection.')
+    host: str | None = Field(default=None, description='Hostname for the database server.')
+    port: int | None = Field(default=None, description='Port the database server is listening to.')
     echo: bool = Field(default=False, description='Enable sql instructions to be dumped.')
-    database: str = Field(description='Name of the server to connect to.', default='')
+    database: str = Field(
+        description='Name of the database to connect to, path of the database file for SQLite (in memory if empty).',
+        default='',
+    )
     session: SessionConfig = Field(description='Session maker configuration')
+    cache: CacheConfig = Field(default_factory=CacheConfig, description='Cache of sessions and machines')
+    archive: ArchiveConfig | None = Field(default=None, description='Cold archive of old sessions, none when unset')
+    replicas: ReplicaConfig | None = Field(
+        default=None, description='Read replicas, all reads go to the primary when unset'
+    )
+    sqlite: SQLiteConfig = Field(default_factory=SQLiteConfig, description='Connection pragmas, for SQLite only')
+    spool: SpoolConfig | None = Field(
+        default=None, description='Durable spool of incoming metrics, written to the database directly when unset'
+    )
+    uid_filter: UidFilterConfig | None = Field(
+        default=None, description='Bloom filter of recent metric uids, all uids being looked up on insert when unset'
+    )
+
+    @model_validator(mode='after')
+    def _check_server_settings(self) -> 'ORMConfig':
+        if not self.is_sqlite:
+            missing = [name for name in ('username', 'password', 'host', 'port') if getattr(self, name) is None]
+            if missing:
+                raise ValueError(f'{", ".join(missing)} required to connect to a {self.driver} server')
+        return self
+
+    @property
+    def is_sqlite(self) -> bool:
+        return self.driver.split('+')[0] == 'sqlite'
 
     def __repr__(self) -> str:
         return f'{self.url}{" ECHOING" if self.echo else ""}'
 
+    def _url_of(self, host: str | None, port: int | None, username: str | None, password: str | None) -> str:
+        if self.is_sqlite:
+            return f'{self.driver}:///{self.database}' if self.database else f'{self.driver}://'
+        if self.database:
+            return f'{self.driver}://{username}:{password}@{host}:{port}/{self.database}'
+        return f'{self.driver}://{username}:{password}@{host}:{port}'
+
     @property
     def url(self) -> str:
-        if self.database:
-            return f'{self.driver}://{self.username}:{self.password}@{self.host}:{self.port}/{self.database}'
-        return f'{self.driver}://{self.username}:{self.password}@{self.host}:{self.port}'
+        return self._url_of(self.host, self.port, self.username, self.password)
+
+    @property
+    def replica_urls(self) -> t.List[str]:
+        if self.replicas is None:
+            return []
+        return [
+            self._url_of(
+                endpoint.host, endpoint.port, endpoint.username or self.username, endpoint.password or self.password
+            )
+            for endpoint in self.replicas.endpoints
+        ]
@@ -11,6 +11,8 @@ class TZDateTime(TypeDecorator):
     impl = DateTime
     cache_ok = True
 
+    _default_type = DateTime()
+
     def process_bind_param(self, value: datetime.datetime | None, dialect: Any) -> datetime.datetime | None:
         if value is not None:
             if not value.tzinfo:
@@ -1,6 +1,22 @@
-from sqlalchemy import NullPool, create_engine, orm
+import typing as t
+
+from sqlalchemy import Engine, NullPool, create_engine, event, orm
 
 from monitor_server.infrastructure.orm.config import ORMConfig
+from monitor_server.infrastructure.orm.routing import ReplicaSet, RoutingSession
+
+
+def _run_on_connect(engine: Engine, statements: t.List[str]) -> None:
+    # Pragmas are per connection: with NullPool, each checkout is a new connection to set up
+    def set_up(dbapi_connection: t.Any, _: t.Any) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    event.listen(engine, 'connect', set_up)
 
 
 class ORMEngine:
@@ -8,7 +24,18 @@ class ORMEngine:
         self._config = orm_config
         self.orm = orm
         self.orm.configure_mappers()
-        self.engine = create_engine(orm_config.url, echo=orm_config.echo, poolclass=NullPool)
+        self.engine = self._create_engine(orm_config.url)
+        self.replicas: ReplicaSet | None = None
+        if orm_config.replicas is not None:
+            self.replicas = ReplicaSet(
+                [self._create_engine(url) for url in orm_config.replica_urls], orm_config.replicas.strategy
+            )
+
+    def _create_engine(self, url: str) -> Engine:
+        engine = create_engine(url, echo=self._config.echo, poolclass=NullPool)
+        if self._config.is_sqlite:
+            _run_on_connect(engine, self._config.sqlite.pragmas)
+        return engine
 
     @property
     def config(self) -> ORMConfig:
@@ -18,7 +45,9 @@ class ORMEngine:
         return f'{self._config!r}'
 
     def _create_session(self) -> orm.Session:
-        return self.orm.Session(self.engine)
+        if self.replicas is None or self._config.replicas is None:
+            return self.orm.Session(self.engine)
+        return RoutingSession(self.engine, self.replicas, read_your_writes=self._config.replicas.read_your_writes)
 
     @property
     def session(self) -> orm.Session:
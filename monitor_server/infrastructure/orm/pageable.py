@@ -11,6 +11,7 @@ class PaginatedResponse(BaseModel, t.Generic[PAGINATION_TYPE]):
     page_no: int | None
     next_page: int | None = None
     data: PAGINATION_TYPE
+    approximate: bool = Field(default=False, description='Page bounds were computed from an estimated elements count.')
 
 
 class PageableStatement(BaseModel):
@@ -18,6 +19,7 @@ class PageableStatement(BaseModel):
 
     page_no: int = Field(ge=0)
     page_size: int = Field(gt=0)
+    approximate: bool = Field(default=False, description='Compute page bounds from an estimated elements count.')
 
     @property
     def offset(self) -> int:
@@ -28,4 +30,6 @@ class PageableStatement(BaseModel):
         # page index starts at 0
         page_count = page_count - 1 if self.page_size * page_count >= elements_count else page_count
         next_page = None if self.page_no >= page_count else self.page_no + 1
-        return PaginatedResponse[PAGINATION_TYPE](data=data, page_no=self.page_no, next_page=next_page)
+        return PaginatedResponse[PAGINATION_TYPE](
+            data=data, page_no=self.page_no, next_page=next_page, approximate=self.approximate
+        )
@@ -4,6 +4,7 @@ import typing as t
 
 from monitor_server.domain.models.abc import Entity
 from monitor_server.infrastructure.orm.declarative import ORMModel
+from monitor_server.infrastructure.orm.rows import CompactRow
 
 T_Domain = t.TypeVar('T_Domain', bound=Entity)
 T_Domain_co = t.TypeVar('T_Domain_co', bound=Entity, covariant=True)
@@ -61,6 +62,10 @@ class Presenter:
     def from_orm(self, value: T_Model, as_: t.Type[T_Domain_co]) -> T_Domain_co:
         return self.__presenter[_build_key(value, as_)](value)
 
+    def from_row(self, value: CompactRow, as_: t.Type[T_Domain_co]) -> T_Domain_co:
+        # Rows expose the same attributes as their model, hence are converted by the model converter
+        return self.__presenter[f'{value.model.__name__}::{as_.__name__}'](value)
+
 
 def _initiate_presenter() -> t.Callable[[], Presenter]:
     a_mapper: Presenter = Presenter()
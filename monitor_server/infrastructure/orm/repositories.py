@@ -1,22 +1,95 @@
 import inspect
 import typing as t
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from functools import cached_property
 
+from sqlalchemy import TextClause
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.orm import Session
-from sqlalchemy.sql import delete, distinct, func, insert, select, tuple_, update
+from sqlalchemy.sql import delete, distinct, func, insert, select, text, tuple_, update
 
 from monitor_server.domain.models.abc import Entity
 from monitor_server.infrastructure.orm.declarative import ORMModel
 from monitor_server.infrastructure.orm.errors import ORMError, ORMInvalidMapping
 from monitor_server.infrastructure.orm.pageable import PageableStatement, PaginatedResponse
 from monitor_server.infrastructure.orm.presenter import presenter
+from monitor_server.infrastructure.orm.rows import CompactRow, compact_row_of
+from monitor_server.infrastructure.orm.sorted_keys import SortedKeys
 from monitor_server.infrastructure.persistence.exceptions import EntityAlreadyExists, EntityNotFound
 
 Model = t.TypeVar('Model', bound=ORMModel)
 DomainObject = t.TypeVar('DomainObject', bound=Entity)
 
+# Per dialect queries reading the planner statistics. Each of them yields a single integer (or nothing).
+_ROWS_ESTIMATE_QUERIES: t.Dict[str, TextClause] = {
+    'mysql': text(
+        'SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table_name'
+    ),
+    'postgresql': text('SELECT CAST(reltuples AS BIGINT) FROM pg_class WHERE relname = :table_name'),
+    # First figure of the stat column is the number of rows of the table (or of the index, which is the same)
+    'sqlite': text(
+        "SELECT CAST(substr(stat, 1, instr(stat || ' ', ' ') - 1) AS INTEGER) FROM sqlite_stat1 "
+        'WHERE tbl = :table_name LIMIT 1'
+    ),
+}
+
+# Session info flag set while a unit of work is in progress: repositories then leave the commit to it
+DEFERRED_COMMIT = 'deferred_commit'
+
+
+@contextmanager
+def unit_of_work(session: Session) -> t.Iterator[Session]:
+    """Run all statements issued through the session in the block within a single transaction.
+
+    The transaction is committed when the block exits and rolled back if it raises. Nested units of work join the
+    outermost one.
+    """
+    if session.info.get(DEFERRED_COMMIT):
+        yield session
+        return
+    session.info[DEFERRED_COMMIT] = True
+    try:
+        yield session
+        session.commit()
+    except BaseException:
+        session.rollback()
+        raise
+    finally:
+        del session.info[DEFERRED_COMMIT]
+
+
+# Per dialect statements deferring constraint checks until commit (or disabling them), then restoring them
+_DEFERRED_CHECKS: t.Dict[str, t.Tuple[t.Tuple[str, ...], t.Tuple[str, ...]]] = {
+    'mysql': (
+        ('SET FOREIGN_KEY_CHECKS = 0', 'SET UNIQUE_CHECKS = 0'),
+        ('SET UNIQUE_CHECKS = 1', 'SET FOREIGN_KEY_CHECKS = 1'),
+    ),
+    'postgresql': (('SET CONSTRAINTS ALL DEFERRED',), ()),
+    'sqlite': (('PRAGMA defer_foreign_keys = ON',), ()),
+}
+
+
+@contextmanager
+def bulk_load(session: Session) -> t.Iterator[Session]:
+    """Unit of work meant for loading trusted data: constraint checks are deferred to commit, or disabled on MySQL.
+
+    Should the block raise, the connection is discarded rather than handed back with its checks disabled.
+    """
+    enable, restore = _DEFERRED_CHECKS.get(session.get_bind().dialect.name, ((), ()))
+    with unit_of_work(session):
+        connection = session.connection()
+        for statement in enable:
+            connection.execute(text(statement))
+        try:
+            yield session
+        except BaseException:
+            if restore:
+                connection.invalidate()
+            raise
+        for statement in restore:
+            connection.execute(text(statement))
+
 
 def _get_domain(repository: t.Any) -> t.Type[Entity]:
     domain: t.Type[Entity] | None = None
@@ -59,6 +132,12 @@ class CRUDRepositoryABC(ABC, t.Generic[DomainObject, Model]):
     def create(self, item: DomainObject) -> DomainObject:
         """Persist the given item. Must be unrecorded."""
 
+    def bulk_create(self, items: t.Sequence[DomainObject]) -> int:
+        """Persist many unrecorded items at once. Defaults to creating them one by one."""
+        for item in items:
+            self.create(item)
+        return len(items)
+
     @abstractmethod
     def update(self, machine: DomainObject) -> DomainObject:
         """Update an existing row"""
@@ -83,11 +162,41 @@ class CRUDRepositoryABC(ABC, t.Generic[DomainObject, Model]):
     def truncate(self) -> None:
         """Remove all entries from this repository"""
 
+    @property
+    @abstractmethod
+    def generation(self) -> int:
+        """Counter bumped by every write made through this repository: results read at the same generation are
+        still current."""
+
+    @abstractmethod
+    def invalidate(self) -> None:
+        """Signal that entries were changed without going through this repository, e.g. by a bulk truncation"""
+
+    def estimate_count(self) -> int:
+        """Estimate the number of items in this repository. Defaults to the exact count."""
+        return self.count()
+
+    def stream(self, chunk_size: int = 1000) -> t.Iterator[DomainObject]:
+        """Lazily iterate over all items, ordered by primary key, loading at most chunk_size of them at once."""
+        page_no: int | None = 0
+        while page_no is not None:
+            page = self.list(PageableStatement(page_no=page_no, page_size=chunk_size))
+            yield from page.data
+            page_no = page.next_page
+
 
 class CRUDRepositoryBase(CRUDRepositoryABC[DomainObject, Model], ABC):
     def __init__(self) -> None:
         self.model: t.Type[Model] = _get_model(self)  # type: ignore[assignment]
         self.domain: t.Type[DomainObject] = _get_domain(self)  # type: ignore[assignment]
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def invalidate(self) -> None:
+        self._generation += 1
 
 
 class SQLRepository(CRUDRepositoryBase[DomainObject, Model]):
@@ -95,6 +204,10 @@ class SQLRepository(CRUDRepositoryBase[DomainObject, Model]):
         super().__init__()
         self.session = session
 
+    def _commit(self) -> None:
+        if not self.session.info.get(DEFERRED_COMMIT):
+            self.session.commit()
+
     def update(self, item: DomainObject) -> DomainObject:
         clause = tuple(
             c == v for c, v in zip(tuple(getattr(self.model, a) for a in self.primary_key), (item.uid,), strict=False)
@@ -103,7 +216,8 @@ class SQLRepository(CRUDRepositoryBase[DomainObject, Model]):
         stmt = update(self.model).where(*clause).values(**args)
         try:
             self.session.execute(stmt)
-            self.session.commit()
+            self._generation += 1
+            self._commit()
         except SQLAlchemyError as e:
             raise ORMError(str(e)) from e
         return item
@@ -113,13 +227,29 @@ class SQLRepository(CRUDRepositoryBase[DomainObject, Model]):
         try:
             stmt = insert(self.model).values(**args)
             self.session.execute(stmt)
-            self.session.commit()
+            self._generation += 1
+            self._commit()
         except IntegrityError as e:
             raise EntityAlreadyExists(self.domain, item.uid.hex) from e
         except SQLAlchemyError as e:
             raise ORMError(str(e)) from e
         return item
 
+    def bulk_create(self, items: t.Sequence[DomainObject]) -> int:
+        # A single executemany: drivers such as mysqlclient rewrite it into multi-row INSERT statements
+        if not items:
+            return 0
+        rows = [presenter.to_orm(item, as_=self.model).as_dict() for item in items]
+        try:
+            self.session.execute(insert(self.model), rows)
+            self._generation += 1
+            self._commit()
+        except IntegrityError as e:
+            raise EntityAlreadyExists(self.domain, items[0].uid.hex) from e
+        except SQLAlchemyError as e:
+            raise ORMError(str(e)) from e
+        return len(items)
+
     def get(self, uid: str) -> DomainObject:
         where = tuple(
             c == v for c, v in zip(tuple(getattr(self.model, a) for a in self.primary_key), (uid,), strict=False)
@@ -138,7 +268,8 @@ class SQLRepository(CRUDRepositoryBase[DomainObject, Model]):
         stmt = delete(self.model).where(*where)
         try:
             self.session.execute(stmt)
-            self.session.commit()
+            self._generation += 1
+            self._commit()
         except IntegrityError as e:
             raise EntityNotFound(self.domain, uid) from e
         except SQLAlchemyError as e:
@@ -148,6 +279,17 @@ class SQLRepository(CRUDRepositoryBase[DomainObject, Model]):
     def primary_key(self) -> t.Tuple[str, ...]:
         return tuple(self.model.__table__.primary_key.columns.keys())  # type: ignore
 
+    def stream(self, chunk_size: int = 1000) -> t.Iterator[DomainObject]:
+        # Rows are fetched chunk_size at a time through a server side cursor: the session's connection
+        # cannot be used for another statement until the iteration completes.
+        stmt = select(self.model).order_by(*self.primary_key_columns).execution_options(yield_per=chunk_size)
+        for row in self.session.execute(stmt).scalars():
+            yield presenter.from_orm(row, as_=self.domain)
+
+    @property
+    def primary_key_columns(self) -> t.Tuple[t.Any, ...]:
+        return tuple(getattr(self.model, a) for a in self.primary_key)
+
     def count(self) -> int:
         primary_key = tuple(getattr(self.model, a) for a in self.primary_key)
         return (
@@ -159,12 +301,30 @@ class SQLRepository(CRUDRepositoryBase[DomainObject, Model]):
             )
         ).scalar_one()
 
+    def estimate_count(self) -> int:
+        query = _ROWS_ESTIMATE_QUERIES.get(self.session.get_bind().dialect.name)
+        if query is None:
+            return self.count()
+        try:
+            estimate = self.session.execute(query, {'table_name': self.model.__tablename__}).scalar()
+        except SQLAlchemyError:
+            # statistics are not available (never analyzed, missing privileges...)
+            estimate = None
+        # An empty table is cheap to count and a 0 usually means statistics have never been collected
+        if not estimate or estimate < 0:
+            return self.count()
+        return int(estimate)
+
+    def _count_for(self, page_info: PageableStatement) -> int:
+        return self.estimate_count() if page_info.approximate else self.count()
+
     def list(self, page_info: PageableStatement | None = None) -> PaginatedResponse[t.List[DomainObject]]:
-        q = self.session.query(self.model)
+        # Explicit order: pages are otherwise only stable on engines returning rows clustered by primary key
+        q = self.session.query(self.model).order_by(*self.primary_key_columns)
         count = 0
         if page_info:
             q = q.limit(page_info.page_size).offset(page_info.offset)
-            count = self.count()
+            count = self._count_for(page_info)
 
         rows = t.cast(t.Iterable[Model], q.all() or [])
         values = t.cast(t.List[DomainObject], [presenter.from_orm(row, as_=self.domain) for row in rows])
@@ -174,55 +334,92 @@ class SQLRepository(CRUDRepositoryBase[DomainObject, Model]):
 
     def truncate(self) -> None:
         self.session.execute(delete(self.model))
+        self._generation += 1
         self.session.commit()
         self.session.close()
 
 
 class InMemoryRepository(CRUDRepositoryBase[DomainObject, Model]):
+    # Columns holding few distinct values, each stored once whatever the number of rows holding it
+    SHARED_COLUMNS: t.ClassVar[t.FrozenSet[str]] = frozenset()
+
     def __init__(self) -> None:
         super().__init__()
-        self._data: t.Dict[t.Any, Model] = {}
+        # Entities are stored as compact rows and only materialized as domain objects when read
+        self._data: t.Dict[str, CompactRow] = {}
+        self._strings: t.Dict[str, str] = {}
+        # Primary keys kept ordered as rows come and go, so that pages are sliced without sorting the whole store
+        self._keys = SortedKeys()
+
+    @cached_property
+    def row_type(self) -> t.Type[CompactRow]:
+        return compact_row_of(self.model, self.SHARED_COLUMNS)
+
+    def _store(self, item: DomainObject) -> str:
+        row = self.row_type.of(presenter.to_orm(item, as_=self.model), self._strings)
+        # The key is the row's own uid string, shared with the indexes
+        self._data[row.uid] = row
+        return row.uid
+
+    def _load(self, row: CompactRow) -> DomainObject:
+        return presenter.from_row(row, as_=self.domain)
 
     def count(self) -> int:
         return len(self._data)
 
     def truncate(self) -> None:
         self._data = {}
+        self._strings = {}
+        self._keys.clear()
+        self._generation += 1
 
     def get(self, uid: str) -> DomainObject:
         row = self._data.get(uid)
         if row is None:
             raise EntityNotFound(self.domain, uid)
 
-        return presenter.from_orm(row, as_=self.domain)
+        return self._load(row)
 
     def create(self, item: DomainObject) -> DomainObject:
         if item.uid.hex in self._data:
             raise EntityAlreadyExists(self.domain, item.uid.hex)
-        self._data[item.uid.hex] = presenter.to_orm(item, as_=self.model)
+        self._keys.add(self._store(item))
+        self._generation += 1
         return item
 
     def update(self, item: DomainObject) -> DomainObject:
         if item.uid.hex not in self._data:
             raise EntityNotFound(self.domain, item.uid.hex)
-        self._data[item.uid.hex] = presenter.to_orm(item, as_=self.model)
+        self._store(item)
+        self._generation += 1
         return item
 
     def delete(self, uid: str) -> None:
         if uid not in self._data:
             raise EntityNotFound(self.domain, uid)
         del self._data[uid]
+        self._keys.discard(uid)
+        self._generation += 1
+
+    def stream(self, chunk_size: int = 1000) -> t.Iterator[DomainObject]:
+        # Resume after the last key read, so that rows added or removed while streaming do not shift the next chunk
+        ids = self._keys.after(None, chunk_size)
+        while ids:
+            for an_id in ids:
+                row = self._data.get(an_id)
+                if row is not None:
+                    yield self._load(row)
+            ids = self._keys.after(ids[-1], chunk_size)
 
     def list(self, page_info: PageableStatement | None = None) -> PaginatedResponse[t.List[DomainObject]]:
-        ids = sorted(self._data)
         if page_info is None:
             return PaginatedResponse(
-                data=[presenter.from_orm(self._data[an_id], as_=self.domain) for an_id in ids],
+                data=[self._load(self._data[an_id]) for an_id in self._keys],
                 page_no=None,
                 next_page=None,
             )
         page = slice(page_info.offset, page_info.offset + page_info.page_size)
         return page_info.build_response(
-            data=[presenter.from_orm(self._data[an_id], as_=self.domain) for an_id in ids[page]],
+            data=[self._load(self._data[an_id]) for an_id in self._keys[page]],
             elements_count=self.count(),
         )
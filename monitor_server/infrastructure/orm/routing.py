@@ -0,0 +1,125 @@
+import functools
+import re
+import threading
+import time
+import typing as t
+
+from sqlalchemy import Engine, TextClause, event
+from sqlalchemy.orm import Session
+
+from monitor_server.infrastructure.orm.config import RoutingStrategy
+from monitor_server.infrastructure.orm.repositories import DEFERRED_COMMIT
+
+# Raw SQL is a plain read when it queries without locking: TRUNCATE, ALTER, SET... must reach the primary
+_TEXT_READ = re.compile(r'\s*(SELECT|WITH)\b', re.IGNORECASE)
+_TEXT_LOCK = re.compile(r'\bFOR\s+(UPDATE|SHARE)\b|\bLOCK\s+IN\s+SHARE\s+MODE\b', re.IGNORECASE)
+
+
+def _is_locking(clause: t.Any) -> bool:
+    if isinstance(clause, TextClause):
+        return _TEXT_LOCK.search(clause.text) is not None
+    return getattr(clause, '_for_update_arg', None) is not None
+
+
+def _is_read(clause: t.Any) -> bool:
+    """Whether a statement only queries, without locking: such statements can be served by a replica"""
+    if clause is None or clause.is_dml or getattr(clause, 'is_ddl', False) or _is_locking(clause):
+        return False
+    return not isinstance(clause, TextClause) or _TEXT_READ.match(clause.text) is not None
+
+
+class ReplicaSet:
+    """Engines of read replicas, picked in turn or by fewest connections in use"""
+
+    def __init__(self, engines: t.Sequence[Engine], strategy: RoutingStrategy = 'round_robin') -> None:
+        if not engines:
+            raise ValueError('A replica set needs at least one engine')
+        self.engines = list(engines)
+        self.strategy = strategy
+        self._lock = threading.Lock()
+        self._turn = 0
+        self._busy = [0] * len(self.engines)
+        for index, engine in enumerate(self.engines):
+            event.listen(engine, 'checkout', functools.partial(self._checked_out, index))
+            event.listen(engine, 'checkin', functools.partial(self._checked_in, index))
+
+    def _checked_out(self, index: int, *_: t.Any) -> None:
+        with self._lock:
+            self._busy[index] += 1
+
+    def _checked_in(self, index: int, *_: t.Any) -> None:
+        with self._lock:
+            self._busy[index] = max(0, self._busy[index] - 1)
+
+    def busy(self, index: int) -> int:
+        """Number of connections of the index-th replica currently in use"""
+        return self._busy[index]
+
+    def pick(self) -> Engine:
+        with self._lock:
+            # Candidates start with the next one in turn, so that least busy ties are broken in turn as well
+            candidates = [(self._turn + offset) % len(self.engines) for offset in range(len(self.engines))]
+            index = candidates[0] if self.strategy == 'round_robin' else min(candidates, key=self._busy.__getitem__)
+            self._turn = (index + 1) % len(self.engines)
+        return self.engines[index]
+
+
+class RoutingSession(Session):
+    """Session sending plain reads to replicas, everything else to the primary.
+
+    Reads stay on the primary when consistency with writes matters: within a unit of work, within a transaction that
+    already wrote and for read_your_writes seconds after such a transaction ended. Locking reads and raw SQL other than
+    queries go to the primary too. A session holds at most one connection per replica until its transaction ends.
+    """
+
+    def __init__(
+        self,
+        primary: Engine,
+        replicas: ReplicaSet,
+        read_your_writes: float = 0.0,
+        clock: t.Callable[[], float] = time.monotonic,
+        **kwargs: t.Any,
+    ) -> None:
+        super().__init__(bind=primary, **kwargs)
+        self.primary = primary
+        self.replicas = replicas
+        self._read_your_writes = read_your_writes
+        self._clock = clock
+        self._wrote = False
+        self._pinned_until = float('-inf')
+
+    def _reads_from_primary(self) -> bool:
+        return (
+            self._wrote or self._flushing or bool(self.info.get(DEFERRED_COMMIT)) or self._clock() < self._pinned_until
+        )
+
+    def get_bind(self, mapper: t.Any = None, clause: t.Any = None, **kwargs: t.Any) -> Engine:  # type: ignore[override]
+        if _is_read(clause):
+            return self.primary if self._reads_from_primary() else self.replicas.pick()
+        # Locking reads go to the primary without pinning the following reads to it
+        if self._flushing or (clause is not None and not _is_locking(clause)):
+            self._wrote = True
+        return self.primary
+
+    def _end_of_transaction(self) -> None:
+        if self._wrote:
+            self._pinned_until = self._clock() + self._read_your_writes
+            self._wrote = False
+
+    def commit(self) -> None:
+        try:
+            super().commit()
+        finally:
+            self._end_of_transaction()
+
+    def rollback(self) -> None:
+        try:
+            super().rollback()
+        finally:
+            self._end_of_transaction()
+
+    def close(self) -> None:
+        try:
+            super().close()
+        finally:
+            self._end_of_transaction()
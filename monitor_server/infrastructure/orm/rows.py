@@ -0,0 +1,53 @@
+import functools
+import typing as t
+from uuid import UUID
+
+from monitor_server.infrastructure.orm.declarative import ORMModel
+
+
+class CompactRow:
+    """Slotted record holding the column values of an ORM model.
+
+    Rows carry none of the ORM instrumentation state and UUIDs are kept as their hexadecimal form. Values of the
+    shared columns, few and repeated across rows (sessions, nodes, components...), go through a pool owned by the
+    caller so that each is stored once. Other values, such as uids, are unique to their row and kept as they are.
+    """
+
+    __slots__ = ()
+
+    model: t.ClassVar[t.Type[ORMModel]]
+    columns: t.ClassVar[t.Tuple[str, ...]]
+    shared: t.ClassVar[t.FrozenSet[str]]
+
+    @classmethod
+    def of(cls, instance: ORMModel, pool: t.Dict[str, str]) -> t.Self:
+        row = cls.__new__(cls)
+        for column in cls.columns:
+            value = getattr(instance, column)
+            if isinstance(value, UUID):
+                value = value.hex
+            elif column in cls.shared and isinstance(value, str):
+                value = pool.setdefault(value, value)
+            setattr(row, column, value)
+        return row
+
+    def __repr__(self) -> str:
+        values = ', '.join(f'{column}={getattr(self, column)!r}' for column in self.columns)
+        return f'{self.__class__.__name__}({values})'
+
+    if t.TYPE_CHECKING:
+
+        def __getattr__(self, column: str) -> t.Any: ...
+
+
+@functools.cache
+def compact_row_of(model: t.Type[ORMModel], shared: t.FrozenSet[str] = frozenset()) -> t.Type[CompactRow]:
+    columns = tuple(model.__table__.columns.keys())
+    return t.cast(
+        t.Type[CompactRow],
+        type(
+            f'{model.__name__}Row',
+            (CompactRow,),
+            {'__slots__': columns, 'model': model, 'columns': columns, 'shared': shared},
+        ),
+    )
@@ -0,0 +1,134 @@
+import bisect
+import itertools as it
+import typing as t
+
+
+class SortedKeys(t.Sequence[str]):
+    """Ordered set of keys kept sorted as keys are added or discarded.
+
+    Keys are split into sublists of bounded length so that inserting or removing a key only shifts a single
+    sublist, whatever the total number of keys is. Positional access bisects the cumulative sublist lengths, which
+    are rebuilt lazily after a change, so reading a page only costs its own length once the offsets are known.
+    """
+
+    def __init__(self, keys: t.Iterable[str] = (), load: int = 1000) -> None:
+        self._load = load
+        self._lists: t.List[t.List[str]] = []
+        self._maxes: t.List[str] = []
+        self._len = 0
+        self._offsets: t.List[int] | None = None
+        for key in keys:
+            self.add(key)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> t.Iterator[str]:
+        return it.chain.from_iterable(self._lists)
+
+    def __contains__(self, key: object) -> bool:
+        if not isinstance(key, str) or not self._maxes:
+            return False
+        pos = bisect.bisect_left(self._maxes, key)
+        if pos == len(self._maxes):
+            return False
+        sublist = self._lists[pos]
+        idx = bisect.bisect_left(sublist, key)
+        return idx < len(sublist) and sublist[idx] == key
+
+    @t.overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @t.overload
+    def __getitem__(self, index: slice) -> t.List[str]: ...
+
+    def __getitem__(self, index: int | slice) -> str | t.List[str]:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._len)
+            if step != 1:
+                return list(self)[index]
+            return self._slice(start, stop)
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError('SortedKeys index out of range')
+        return self._slice(index, index + 1)[0]
+
+    def _slice(self, start: int, stop: int) -> t.List[str]:
+        if start >= stop:
+            return []
+        if self._offsets is None:
+            self._offsets = list(it.accumulate((len(sublist) for sublist in self._lists), initial=0))
+        pos = bisect.bisect_right(self._offsets, start) - 1
+        result: t.List[str] = []
+        while pos < len(self._lists) and len(result) < stop - start:
+            offset = self._offsets[pos]
+            result.extend(self._lists[pos][max(start - offset, 0) : stop - offset])
+            pos += 1
+        return result
+
+    def after(self, key: str | None, count: int) -> t.List[str]:
+        """Return at most count keys strictly greater than key, or the first ones when key is None."""
+        if key is None:
+            return self._slice(0, count)
+        pos = bisect.bisect_right(self._maxes, key)
+        if pos == len(self._maxes):
+            return []
+        result = self._lists[pos][bisect.bisect_right(self._lists[pos], key) :][:count]
+        pos += 1
+        while pos < len(self._lists) and len(result) < count:
+            result.extend(self._lists[pos][: count - len(result)])
+            pos += 1
+        return result
+
+    def add(self, key: str) -> None:
+        if not self._maxes:
+            self._lists.append([key])
+            self._maxes.append(key)
+            self._len = 1
+            self._offsets = None
+            return
+        pos = bisect.bisect_left(self._maxes, key)
+        if pos == len(self._maxes):
+            pos -= 1
+            self._lists[pos].append(key)
+            self._maxes[pos] = key
+        else:
+            sublist = self._lists[pos]
+            idx = bisect.bisect_left(sublist, key)
+            if sublist[idx] == key:
+                return
+            sublist.insert(idx, key)
+        self._len += 1
+        self._offsets = None
+        self._split(pos)
+
+    def _split(self, pos: int) -> None:
+        sublist = self._lists[pos]
+        if len(sublist) <= 2 * self._load:
+            return
+        upper_half = sublist[self._load :]
+        del sublist[self._load :]
+        self._maxes[pos] = sublist[-1]
+        self._lists.insert(pos + 1, upper_half)
+        self._maxes.insert(pos + 1, upper_half[-1])
+
+    def discard(self, key: str) -> None:
+        pos = bisect.bisect_left(self._maxes, key)
+        if pos == len(self._maxes):
+            return
+        sublist = self._lists[pos]
+        idx = bisect.bisect_left(sublist, key)
+        if sublist[idx] != key:
+            return
+        del sublist[idx]
+        self._len -= 1
+        self._offsets = None
+        if not sublist:
+            del self._lists[pos]
+            del self._maxes[pos]
+        elif idx == len(sublist):
+            self._maxes[pos] = sublist[-1]
+
+    def clear(self) -> None:
+        self._lists, self._maxes, self._len, self._offsets = [], [], 0, None
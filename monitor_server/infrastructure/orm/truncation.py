@@ -0,0 +1,105 @@
+import time
+import typing as t
+
+from pydantic import BaseModel, ConfigDict, Field
+from sqlalchemy import Table, delete, select, text, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from monitor_server.infrastructure.orm.declarative import ORMModel
+from monitor_server.infrastructure.orm.errors import ORMError
+
+TruncationStrategy = t.Literal['truncate', 'delete_vacuum', 'chunked', 'in_memory']
+
+
+class TruncationReport(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    strategy: TruncationStrategy
+    tables: t.Tuple[str, ...] = Field(default=())
+    duration: float = Field(default=0.0, ge=0, description='Seconds spent clearing the tables.')
+
+
+def _tables_of(models: t.Sequence[t.Type[ORMModel]]) -> t.List[Table]:
+    return [t.cast(Table, model.__table__) for model in models]
+
+
+def _truncate_mysql(session: Session, tables: t.List[Table]) -> None:
+    # TRUNCATE is refused on a table referenced by a foreign key, even an empty one, while checks are on. Checks are
+    # disabled for this connection only and all related tables are cleared, so that no dangling reference is left.
+    connection = session.connection()
+    connection.execute(text('SET FOREIGN_KEY_CHECKS = 0'))
+    try:
+        for table in tables:
+            connection.execute(text(f'TRUNCATE TABLE {connection.dialect.identifier_preparer.format_table(table)}'))
+    finally:
+        connection.execute(text('SET FOREIGN_KEY_CHECKS = 1'))
+
+
+def _truncate_postgresql(session: Session, tables: t.List[Table]) -> None:
+    preparer = session.connection().dialect.identifier_preparer
+    session.execute(text(f'TRUNCATE TABLE {", ".join(preparer.format_table(table) for table in tables)}'))
+    session.commit()
+
+
+def _delete_and_vacuum(session: Session, tables: t.List[Table]) -> None:
+    # SQLite has no TRUNCATE: an unqualified DELETE is already optimized into a table drop. VACUUM then gives pages
+    # back to the file system, it cannot run within a transaction.
+    for table in tables:
+        session.execute(delete(table))
+    session.commit()
+    session.connection(execution_options={'isolation_level': 'AUTOCOMMIT'}).execute(text('VACUUM'))
+
+
+def delete_by_chunks(session: Session, table: Table, chunk_size: int = 10000) -> int:
+    """Empty a table by deleting at most chunk_size rows per transaction, lowest primary keys first. Returns the
+    number of deleted rows."""
+    primary_key = tuple(table.primary_key.columns)
+    deleted = 0
+    while True:
+        keys = session.execute(select(*primary_key).order_by(*primary_key).limit(chunk_size)).all()
+        if not keys:
+            return deleted
+        session.execute(delete(table).where(tuple_(*primary_key).in_([tuple(key) for key in keys])))
+        session.commit()
+        deleted += len(keys)
+
+
+_FAST_PATHS: t.Dict[str, t.Tuple[TruncationStrategy, t.Callable[[Session, t.List[Table]], None]]] = {
+    'mysql': ('truncate', _truncate_mysql),
+    'postgresql': ('truncate', _truncate_postgresql),
+    'sqlite': ('delete_vacuum', _delete_and_vacuum),
+}
+
+
+def truncate_tables(
+    session: Session, models: t.Sequence[t.Type[ORMModel]], chunk_size: int = 10000
+) -> TruncationReport:
+    """Remove all rows of the given tables, referencing tables coming before the tables they reference.
+
+    Uses the fastest clear the dialect offers. Whenever that fails (e.g. missing privileges) or for unknown dialects,
+    tables are emptied by chunked deletes instead, in the given order.
+    """
+    tables = _tables_of(models)
+    started = time.perf_counter()
+    strategy: TruncationStrategy
+    strategy, fast_path = _FAST_PATHS.get(session.get_bind().dialect.name, ('chunked', None))
+    try:
+        if fast_path is not None:
+            try:
+                fast_path(session, tables)
+            except SQLAlchemyError:
+                session.rollback()
+                strategy, fast_path = 'chunked', None
+        if fast_path is None:
+            for table in tables:
+                delete_by_chunks(session, table, chunk_size)
+        session.commit()
+    except SQLAlchemyError as e:
+        session.rollback()
+        raise ORMError(str(e)) from e
+    finally:
+        session.close()
+    return TruncationReport(
+        strategy=strategy, tables=tuple(table.name for table in tables), duration=time.perf_counter() - started
+    )
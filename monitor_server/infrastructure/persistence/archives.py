@@ -0,0 +1,173 @@
+import abc
+import pathlib
+import shutil
+import typing as t
+import zipfile
+from datetime import UTC, datetime
+
+import numpy as np
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import delete, insert, select
+
+from monitor_server.domain.models.archives import ArchivedSession
+from monitor_server.domain.models.batches import MetricBatch
+from monitor_server.domain.models.metrics import Metric
+from monitor_server.domain.models.sessions import MonitorSession
+from monitor_server.infrastructure.orm.errors import ORMError
+from monitor_server.infrastructure.orm.repositories import unit_of_work
+from monitor_server.infrastructure.persistence.models import SessionArchive
+
+
+class ColdArchive:
+    """Metrics of archived sessions, as compressed columnar files on local disk.
+
+    Sessions are grouped by month of their start date. Each session is a folder holding numbered parts, each part
+    being the columns of a chunk of metrics ordered by uid (see MetricBatch.to_arrays).
+    """
+
+    def __init__(self, root: pathlib.Path) -> None:
+        self.root = root
+
+    @staticmethod
+    def location_of(session: MonitorSession) -> str:
+        """Location of a session, relative to the archive root"""
+        return f'{session.start_date:%Y-%m}/{session.uid.hex}'
+
+    def write(self, location: str, part: int, batch: MetricBatch) -> pathlib.Path:
+        folder = self.root / location
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / f'part-{part:05d}.npz'
+        np.savez_compressed(path, **t.cast(t.Dict[str, t.Any], batch.to_arrays()))
+        return path
+
+    @staticmethod
+    def _length_of(path: pathlib.Path) -> int:
+        """Metrics of a part, read from the header of its uid array: nothing is decompressed beyond it"""
+        with zipfile.ZipFile(path) as archive, archive.open('uid.npy') as member:
+            version = np.lib.format.read_magic(member)
+            if version == (1, 0):
+                shape, _, _ = np.lib.format.read_array_header_1_0(member)
+            else:
+                shape, _, _ = np.lib.format.read_array_header_2_0(member)
+        return shape[0]
+
+    def read(self, location: str, offset: int = 0, limit: int | None = None) -> t.List[Metric]:
+        """Metrics of a session ordered by uid, optionally limit of them from offset on. Only the parts holding them
+        are loaded."""
+        metrics: t.List[Metric] = []
+        end = None if limit is None else offset + limit
+        start = 0
+        for path in sorted((self.root / location).glob('part-*.npz')):
+            if end is not None and start >= end:
+                break
+            stop = start + self._length_of(path)
+            if stop > offset:
+                with np.load(path) as arrays:
+                    batch = MetricBatch.from_arrays(arrays)
+                rows = np.arange(max(offset, start), stop if end is None else min(stop, end)) - start
+                metrics.extend(batch.take(rows).to_metrics())
+            start = stop
+        return metrics
+
+    def remove(self, location: str) -> None:
+        shutil.rmtree(self.root / location, ignore_errors=True)
+
+    def clear(self) -> None:
+        for month in self.root.glob('*-*'):
+            shutil.rmtree(month, ignore_errors=True)
+
+
+class ArchiveRepository(abc.ABC):
+    """Tombstones of archived sessions: their metrics are to be read from the cold archive"""
+
+    @abc.abstractmethod
+    def save(self, session_id: str, metrics: int, location: str) -> None:
+        """Record that the metrics of a session were moved to the given archive location"""
+
+    @abc.abstractmethod
+    def get(self, session_id: str) -> ArchivedSession | None:
+        """Get the tombstone of a session, None if the session is not archived"""
+
+    @abc.abstractmethod
+    def location_of(self, session_id: str) -> str | None:
+        """Get the archive location of a session, None if the session is not archived"""
+
+    @abc.abstractmethod
+    def archived_among(self, session_ids: t.Iterable[str]) -> t.Set[str]:
+        """Get the archived sessions among the given ones"""
+
+    @abc.abstractmethod
+    def delete(self, session_id: str) -> None:
+        """Remove the tombstone of a session, if any"""
+
+    @abc.abstractmethod
+    def truncate(self) -> None:
+        """Remove all tombstones"""
+
+
+class ArchiveSQLRepository(ArchiveRepository):
+    def __init__(self, session: Session) -> None:
+        self.session = session
+
+    def save(self, session_id: str, metrics: int, location: str) -> None:
+        try:
+            with unit_of_work(self.session):
+                self.session.execute(delete(SessionArchive).where(SessionArchive.sid == session_id))
+                self.session.execute(
+                    insert(SessionArchive).values(
+                        sid=session_id, archived_at=datetime.now(tz=UTC), metrics=metrics, location=location
+                    )
+                )
+        except SQLAlchemyError as e:
+            raise ORMError(str(e)) from e
+
+    def get(self, session_id: str) -> ArchivedSession | None:
+        stmt = select(SessionArchive.metrics, SessionArchive.location).where(SessionArchive.sid == session_id)
+        row = self.session.execute(stmt).first()
+        if row is None:
+            return None
+        return ArchivedSession(session_id=session_id, metrics=row.metrics, location=row.location)
+
+    def location_of(self, session_id: str) -> str | None:
+        stmt = select(SessionArchive.location).where(SessionArchive.sid == session_id)
+        return self.session.execute(stmt).scalar_one_or_none()
+
+    def archived_among(self, session_ids: t.Iterable[str]) -> t.Set[str]:
+        session_ids = set(session_ids)
+        if not session_ids:
+            return set()
+        stmt = select(SessionArchive.sid).where(SessionArchive.sid.in_(session_ids))
+        return set(self.session.execute(stmt).scalars())
+
+    def delete(self, session_id: str) -> None:
+        with unit_of_work(self.session):
+            self.session.execute(delete(SessionArchive).where(SessionArchive.sid == session_id))
+
+    def truncate(self) -> None:
+        with unit_of_work(self.session):
+            self.session.execute(delete(SessionArchive))
+
+
+class ArchiveInMemRepository(ArchiveRepository):
+    def __init__(self) -> None:
+        self._tombstones: t.Dict[str, ArchivedSession] = {}
+
+    def save(self, session_id: str, metrics: int, location: str) -> None:
+        self._tombstones[session_id] = ArchivedSession(session_id=session_id, metrics=metrics, location=location)
+
+    def get(self, session_id: str) -> ArchivedSession | None:
+        return self._tombstones.get(session_id)
+
+    def location_of(self, session_id: str) -> str | None:
+        tombstone = self._tombstones.get(session_id)
+        return tombstone.location if tombstone else None
+
+    def archived_among(self, session_ids: t.Iterable[str]) -> t.Set[str]:
+        return {session_id for session_id in session_ids if session_id in self._tombstones}
+
+    def delete(self, session_id: str) -> None:
+        self._tombstones.pop(session_id, None)
+
+    def truncate(self) -> None:
+        self._tombstones = {}
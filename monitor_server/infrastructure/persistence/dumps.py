@@ -0,0 +1,237 @@
+import base64
+import gzip
+import itertools
+import json
+import pathlib
+import time
+import typing as t
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from monitor_server.domain.models.machines import Machine
+from monitor_server.domain.models.metrics import Metric
+from monitor_server.domain.models.sessions import MonitorSession
+from monitor_server.infrastructure.persistence.exceptions import EntityAlreadyExists, EntityNotFound
+from monitor_server.infrastructure.persistence.services import MonitoringMetricsService
+
+DumpKind = t.Literal['machines', 'sessions', 'metrics', 'snapshots']
+
+# Referenced records come first, so that a restore never loads a metric before its session and machine. Snapshots
+# come last: a sealed session refuses new metrics.
+KINDS: t.Tuple[DumpKind, ...] = ('machines', 'sessions', 'metrics', 'snapshots')
+FORMAT_VERSION = 2
+# Exports of version 1 hold no snapshots part
+SUPPORTED_VERSIONS = (1, FORMAT_VERSION)
+MANIFEST = 'manifest.json'
+RESTORE_STATE = 'restore.state.json'
+
+
+class SnapshotRecord(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    session_id: str
+    metrics: int = Field(ge=0, description='Metrics of the sealed suite.')
+    payload: str = Field(description='Encoded sealed suite, in base64.')
+
+
+_RECORDS: t.Dict[DumpKind, t.Type[BaseModel]] = {
+    'machines': Machine,
+    'sessions': MonitorSession,
+    'metrics': Metric,
+    'snapshots': SnapshotRecord,
+}
+
+
+class DumpProgress(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    kind: DumpKind
+    part: int
+    records: int = Field(description='Records of this kind processed so far.')
+    rate: float = Field(description='Records per second since the beginning, all kinds together.')
+
+
+class DumpReport(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    records: t.Dict[str, int] = Field(default_factory=dict, description='Records processed per kind.')
+    skipped_parts: int = Field(default=0, description='Parts already restored by a previous, interrupted run.')
+    duration: float = Field(default=0.0, ge=0, description='Seconds.')
+
+    @property
+    def total(self) -> int:
+        return sum(self.records.values())
+
+    @property
+    def rate(self) -> float:
+        """Records per second"""
+        return self.total / self.duration if self.duration else 0.0
+
+
+def _write_atomically(path: pathlib.Path, content: t.Any) -> None:
+    staging = path.with_suffix('.tmp')
+    staging.write_text(json.dumps(content, indent=2))
+    staging.replace(path)
+
+
+class _Meter:
+    def __init__(self, on_progress: t.Callable[[DumpProgress], None] | None) -> None:
+        self._on_progress = on_progress
+        self._started = time.perf_counter()
+        self.records: t.Dict[str, int] = dict.fromkeys(KINDS, 0)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    def tick(self, kind: DumpKind, part: int, records: int) -> None:
+        self.records[kind] += records
+        if self._on_progress:
+            elapsed = self.elapsed
+            rate = sum(self.records.values()) / elapsed if elapsed else 0.0
+            self._on_progress(DumpProgress(kind=kind, part=part, records=self.records[kind], rate=rate))
+
+
+class DatasetDump:
+    """Machines, sessions, metrics and session snapshots of a service, as a folder of gzipped NDJSON parts.
+
+    Each part holds at most chunk_size records of a single kind, one JSON document per line. The manifest listing
+    all parts is written last: a folder without manifest is an incomplete export. A restore loads a whole part per
+    transaction through the service bulk load and records the parts done as it goes, so that an interrupted restore
+    is resumed where it stopped by running it again. Rollups are rebuilt once everything is loaded.
+
+    Metrics of archived sessions are read back from the cold archive and exported along with the live ones. Tombstones
+    are not: they point to files of the source archive. A restore loads those metrics as live ones, the sessions can
+    be archived again afterwards. Sealed sessions get their snapshot back, hence stay sealed.
+    """
+
+    def __init__(self, folder: pathlib.Path) -> None:
+        self.folder = folder
+
+    @staticmethod
+    def part_name(kind: DumpKind, part: int) -> str:
+        return f'{kind}-{part:05d}.ndjson.gz'
+
+    def _write_part(self, name: str, records: t.Sequence[BaseModel]) -> None:
+        with gzip.open(self.folder / name, 'wt', encoding='utf-8') as stream:
+            for record in records:
+                stream.write(record.model_dump_json())
+                stream.write('\n')
+
+    def _read_part(self, kind: DumpKind, name: str) -> t.List[t.Any]:
+        model = _RECORDS[kind]
+        with gzip.open(self.folder / name, 'rt', encoding='utf-8') as stream:
+            return [model.model_validate_json(line) for line in stream if line.strip()]
+
+    @staticmethod
+    def _sessions_among(
+        service: MonitoringMetricsService, chunk_size: int, among: t.Callable[[t.List[str]], t.Set[str]]
+    ) -> t.List[str]:
+        # Collected beforehand: the session stream holds the connection until it is exhausted
+        found: t.List[str] = []
+        for sessions in itertools.batched(service.session_repository().stream(chunk_size), chunk_size):
+            session_ids = [session.uid.hex for session in sessions]
+            kept = among(session_ids)
+            found.extend(session_id for session_id in session_ids if session_id in kept)
+        return found
+
+    def _archived_metrics_of(self, service: MonitoringMetricsService, chunk_size: int) -> t.Iterator[Metric]:
+        # Read a page at a time, only the archive parts it spans being loaded
+        for session_id in self._sessions_among(service, chunk_size, service.archive_repository().archived_among):
+            for suite in service.iter_test_suite(session_id, chunk_size):
+                yield from suite.metrics
+
+    def _snapshots_of(self, service: MonitoringMetricsService, chunk_size: int) -> t.Iterator[SnapshotRecord]:
+        repository = service.snapshot_repository()
+        for session_id in self._sessions_among(service, chunk_size, repository.sealed_among):
+            snapshot = repository.load(session_id)
+            if snapshot is not None:
+                payload = base64.b64encode(snapshot.payload).decode()
+                yield SnapshotRecord(session_id=session_id, metrics=snapshot.metrics, payload=payload)
+
+    def _records_of(self, service: MonitoringMetricsService, kind: DumpKind, chunk_size: int) -> t.Iterator[t.Any]:
+        if kind == 'snapshots':
+            return self._snapshots_of(service, chunk_size)
+        stream = self._repository_of(service, kind).stream(chunk_size)
+        if kind == 'metrics':
+            return itertools.chain(stream, self._archived_metrics_of(service, chunk_size))
+        return stream
+
+    def export(
+        self,
+        service: MonitoringMetricsService,
+        chunk_size: int = 10000,
+        on_progress: t.Callable[[DumpProgress], None] | None = None,
+    ) -> DumpReport:
+        self.folder.mkdir(parents=True, exist_ok=True)
+        meter = _Meter(on_progress)
+        parts: t.Dict[str, t.List[str]] = {}
+        for kind in KINDS:
+            parts[kind] = []
+            stream = self._records_of(service, kind, chunk_size)
+            for part, records in enumerate(itertools.batched(stream, chunk_size)):
+                name = self.part_name(kind, part)
+                self._write_part(name, records)
+                parts[kind].append(name)
+                meter.tick(kind, part, len(records))
+        _write_atomically(
+            self.folder / MANIFEST,
+            {'version': FORMAT_VERSION, 'chunk_size': chunk_size, 'records': meter.records, 'parts': parts},
+        )
+        return DumpReport(records=meter.records, duration=meter.elapsed)
+
+    def manifest(self) -> t.Dict[str, t.Any]:
+        path = self.folder / MANIFEST
+        if not path.exists():
+            raise FileNotFoundError(f'{self.folder} holds no complete export: {MANIFEST} is missing')
+        manifest = json.loads(path.read_text())
+        if manifest.get('version') not in SUPPORTED_VERSIONS:
+            raise ValueError(f'Unsupported export version {manifest.get("version")}')
+        return manifest
+
+    @staticmethod
+    def _repository_of(service: MonitoringMetricsService, kind: DumpKind) -> t.Any:
+        if kind == 'machines':
+            return service.machine_repository()
+        if kind == 'sessions':
+            return service.session_repository()
+        return service.metric_repository()
+
+    def _load(self, service: MonitoringMetricsService, kind: DumpKind, records: t.List[t.Any]) -> None:
+        if kind == 'snapshots':
+            # Saving a snapshot replaces any previous one: loading a part again is harmless
+            for record in records:
+                service.snapshot_repository().save(record.session_id, record.metrics, base64.b64decode(record.payload))
+            return
+        try:
+            service.bulk_add(**{kind: records})
+        except EntityAlreadyExists as e:
+            # A part is loaded in a single transaction: if its last record is there, so is the whole part. That is
+            # the case when a restore got interrupted between the commit of a part and its bookkeeping.
+            try:
+                self._repository_of(service, kind).get(records[-1].uid.hex)
+            except EntityNotFound:
+                raise e from None
+
+    def restore(
+        self, service: MonitoringMetricsService, on_progress: t.Callable[[DumpProgress], None] | None = None
+    ) -> DumpReport:
+        manifest = self.manifest()
+        state_path = self.folder / RESTORE_STATE
+        done: t.Set[str] = set(json.loads(state_path.read_text())) if state_path.exists() else set()
+        meter = _Meter(on_progress)
+        skipped = 0
+        for kind in KINDS:
+            for part, name in enumerate(manifest['parts'].get(kind, [])):
+                if name in done:
+                    skipped += 1
+                    continue
+                records = self._read_part(kind, name)
+                if records:
+                    self._load(service, kind, records)
+                done.add(name)
+                _write_atomically(state_path, sorted(done))
+                meter.tick(kind, part, len(records))
+        service.rebuild_rollups()
+        state_path.unlink(missing_ok=True)
+        return DumpReport(records=meter.records, skipped_parts=skipped, duration=meter.elapsed)
@@ -38,6 +38,23 @@ class EntityNotFound(ORMError):
         return self._entity_id
 
 
+class EntitySealed(ORMError):
+    """Raised when writing to an entity which has been sealed."""
+
+    def __init__(self, entity_type: t.Type[Entity], entity_id: str) -> None:
+        self._entity_typename = entity_type.entity_name()
+        self._entity_id = entity_id
+        super().__init__(f'{self._entity_typename} "{entity_id}" is sealed and cannot be modified')
+
+    @property
+    def entity_typename(self) -> str:
+        return self._entity_typename
+
+    @property
+    def entity_id(self) -> str:
+        return self._entity_id
+
+
 class LinkedEntityMissing(ORMError):
     """Raised when an entity linked to other entities"""
 
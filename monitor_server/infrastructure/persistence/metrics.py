@@ -1,21 +1,42 @@
 import abc
+import functools
 import typing as t
+import uuid
+from contextlib import suppress
+from datetime import UTC, datetime
+from operator import attrgetter
 
+from sqlalchemy import orm
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
-from sqlalchemy.sql import insert
+from sqlalchemy.sql import delete, insert, select
 
+from monitor_server.domain.models.batches import MetricBatch, MetricRecord
 from monitor_server.domain.models.machines import Machine
 from monitor_server.domain.models.metrics import Metric
 from monitor_server.domain.models.sessions import MonitorSession
+from monitor_server.infrastructure.orm.bloom import BloomFilter
 from monitor_server.infrastructure.orm.errors import ORMError
 from monitor_server.infrastructure.orm.pageable import PageableStatement, PaginatedResponse
 from monitor_server.infrastructure.orm.presenter import presenter
-from monitor_server.infrastructure.orm.repositories import CRUDRepositoryABC, InMemoryRepository, SQLRepository
+from monitor_server.infrastructure.orm.repositories import (
+    DEFERRED_COMMIT,
+    CRUDRepositoryABC,
+    InMemoryRepository,
+    SQLRepository,
+)
+from monitor_server.infrastructure.orm.rows import CompactRow
+from monitor_server.infrastructure.orm.sorted_keys import SortedKeys
 from monitor_server.infrastructure.persistence.exceptions import (
     EntityAlreadyExists,
     LinkedEntityMissing,
 )
-from monitor_server.infrastructure.persistence.models import TestMetric
+from monitor_server.infrastructure.persistence.models import ExecutionContext, Session, TestMetric
+from monitor_server.infrastructure.persistence.partitions import MetricPartitions
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Naive values being taken as UTC, so that they compare with aware ones"""
+    return value if value.tzinfo else value.replace(tzinfo=UTC)
 
 
 class MetricRepository(CRUDRepositoryABC[Metric, TestMetric]):
@@ -25,23 +46,237 @@ class MetricRepository(CRUDRepositoryABC[Metric, TestMetric]):
     ) -> PaginatedResponse[t.List[Metric]]:
         """Get all metrics of the given session_id and/or node_id"""
 
+    @abc.abstractmethod
+    def iter_all_of(
+        self, session_id: str | None = None, node_id: str | None = None, chunk_size: int = 1000
+    ) -> t.Iterator[Metric]:
+        """Lazily iterate over all metrics of the given session_id and/or node_id, ordered by uid"""
+
+    @abc.abstractmethod
+    def get_batch_of(self, session_id: str | None = None, node_id: str | None = None) -> MetricBatch:
+        """Get all metrics of the given session_id and/or node_id as columns, ordered by uid"""
+
+    @abc.abstractmethod
+    def delete_chunk_of(self, session_id: str, chunk_size: int = 1000) -> int:
+        """Delete at most chunk_size metrics of the given session, lowest uids first. Returns the number of deleted
+        metrics: 0 once the session has none left."""
+
+    @abc.abstractmethod
+    def history_of(
+        self,
+        item_path: str,
+        variant: str,
+        node_id: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> MetricBatch:
+        """Get all runs of a test, optionally on a given node and between two dates, ordered by start time"""
+
 
 class MetricSQLRepository(MetricRepository, SQLRepository[Metric, TestMetric]):
+    # Columns in the Metric field order, as expected by MetricBatch
+    BATCH_COLUMNS = (
+        TestMetric.uid,
+        TestMetric.sid,
+        TestMetric.xid,
+        TestMetric.item_start_time,
+        TestMetric.item_path,
+        TestMetric.item,
+        TestMetric.variant,
+        TestMetric.item_fs_loc,
+        TestMetric.kind,
+        TestMetric.component,
+        TestMetric.wall_time,
+        TestMetric.user_time,
+        TestMetric.kernel_time,
+        TestMetric.mem_usage,
+        TestMetric.cpu_usage,
+    )
+    # Numeric attributes of Metric and their column
+    STATISTICS_COLUMNS: t.ClassVar[t.Dict[str, str]] = {
+        'wall_time': 'wall_time',
+        'user_time': 'user_time',
+        'kernel_time': 'kernel_time',
+        'cpu_usage': 'cpu_usage',
+        'memory_usage': 'mem_usage',
+    }
+
+    # Uids looked up per statement when telling duplicates apart
+    LOOKUP_CHUNK = 1000
+
+    def __init__(self, session: orm.Session, uid_filter: BloomFilter | None = None) -> None:
+        super().__init__(session)
+        # Uids of the metrics recently written, sparing the lookup of those which cannot be duplicates
+        self.uid_filter = uid_filter
+
+    @functools.cached_property
+    def partitioned(self) -> bool:
+        """Whether the metric table is partitioned, in which case its primary key no longer keeps uids unique (see
+        revision 5c1e9d7a0f43). Partitioning is a migration: it is looked up once."""
+        return bool(MetricPartitions(self.session).list())
+
     def create(self, item: Metric) -> Metric:
+        if self.uid_filter is not None or self.partitioned:
+            self._check_not_stored([item])
         stmt = insert(TestMetric).values(**(presenter.to_orm(item, as_=TestMetric).as_dict()))
         try:
             self.session.execute(stmt)
-            self.session.commit()
+            self._generation += 1
+            self._commit()
         except IntegrityError as e:
-            if e.orig.args[0] == 1452 and 'Session' in e.orig.args[1]:  # type: ignore[union-attr]
-                raise LinkedEntityMissing(MonitorSession, item.session_id, Metric, item.uid.hex) from e
-            if e.orig.args[0] == 1452 and 'Session' not in e.orig.args[1]:  # type: ignore[union-attr]
-                raise LinkedEntityMissing(Machine, item.node_id, Metric, item.uid.hex) from e
-            raise EntityAlreadyExists(Metric, item.uid.hex) from e
+            raise self._integrity_error_of([item]) from e
         except SQLAlchemyError as e:
             raise ORMError(str(e)) from e
+        if self.uid_filter is not None:
+            self.uid_filter.add(item.uid.hex)
         return item
 
+    def bulk_create(self, items: t.Sequence[Metric]) -> int:
+        # Duplicates are told apart before inserting: once an executemany fails, rows it already inserted cannot be
+        # distinguished from the ones stored beforehand
+        if not items:
+            return 0
+        self._check_not_stored(items)
+        rows = [presenter.to_orm(item, as_=TestMetric).as_dict() for item in items]
+        try:
+            self.session.execute(insert(TestMetric), rows)
+            self._generation += 1
+            self._commit()
+        except IntegrityError as e:
+            raise self._integrity_error_of(items) from e
+        except SQLAlchemyError as e:
+            raise ORMError(str(e)) from e
+        if self.uid_filter is not None:
+            self.uid_filter.update(item.uid.hex for item in items)
+        return len(items)
+
+    def _stored_uids(self, uids: t.Sequence[uuid.UUID]) -> t.Set[str]:
+        stored: t.Set[str] = set()
+        for start in range(0, len(uids), self.LOOKUP_CHUNK):
+            stmt = select(TestMetric.uid).where(TestMetric.uid.in_(uids[start : start + self.LOOKUP_CHUNK]))
+            stored.update(uid.hex for uid in self.session.execute(stmt).scalars())
+        return stored
+
+    def _check_not_stored(self, items: t.Sequence[Metric]) -> None:
+        """Raise EntityAlreadyExists for the first item stored already or given twice. Only the uids the filter, if
+        any, cannot rule out are looked up, unless the table is partitioned: the filter forgets older uids which the
+        primary key no longer catches then."""
+        seen: t.Set[str] = set()
+        for item in items:
+            if item.uid.hex in seen:
+                raise EntityAlreadyExists(Metric, item.uid.hex)
+            seen.add(item.uid.hex)
+        uid_filter = None if self.partitioned else self.uid_filter
+        candidates = [item.uid for item in items if uid_filter is None or uid_filter.might_contain(item.uid.hex)]
+        if not candidates:
+            return
+        try:
+            stored = self._stored_uids(candidates)
+        except SQLAlchemyError as e:
+            raise ORMError(str(e)) from e
+        if uid_filter is not None:
+            uid_filter.record_false_positives(len(candidates) - len(stored))
+        for item in items:
+            if item.uid.hex in stored:
+                raise EntityAlreadyExists(Metric, item.uid.hex)
+
+    def _integrity_error_of(self, items: t.Sequence[Metric]) -> ORMError:
+        """Tell which constraint an insert violated by looking the referenced rows up, drivers reporting it each
+        their own way. Only runs on failures."""
+        if not self.session.info.get(DEFERRED_COMMIT):
+            self.session.rollback()
+        references = (
+            (Session, attrgetter('session_id'), MonitorSession),
+            (ExecutionContext, attrgetter('node_id'), Machine),
+        )
+        # Should the transaction be unusable (e.g. aborted on PostgreSQL), the most likely cause is assumed
+        with suppress(SQLAlchemyError):
+            for model, uid_of, domain in references:
+                uids = {uid_of(item) for item in items}
+                found = {
+                    uid.hex for uid in self.session.execute(select(model.uid).where(model.uid.in_(uids))).scalars()
+                }
+                missing = next((item for item in items if uid_of(item) not in found), None)
+                if missing is not None:
+                    return LinkedEntityMissing(domain, uid_of(missing), Metric, missing.uid.hex)
+        return EntityAlreadyExists(Metric, items[0].uid.hex)
+
+    def warm_uid_filter(self, chunk_size: int = 10000) -> int:
+        """Fill the uid filter with the uids of the latest metrics, as many as it holds. Returns the number of uids
+        added."""
+        if self.uid_filter is None:
+            return 0
+        stmt = (
+            select(TestMetric.uid)
+            .order_by(TestMetric.item_start_time.desc())
+            .limit(self.uid_filter.capacity)
+            .execution_options(yield_per=chunk_size)
+        )
+        try:
+            return self.uid_filter.update(uid.hex for uid in self.session.execute(stmt).scalars())
+        except SQLAlchemyError as e:
+            raise ORMError(str(e)) from e
+
+    def truncate(self) -> None:
+        super().truncate()
+        if self.uid_filter is not None:
+            self.uid_filter.clear()
+
+    def iter_all_of(
+        self, session_id: str | None = None, node_id: str | None = None, chunk_size: int = 1000
+    ) -> t.Iterator[Metric]:
+        stmt = select(TestMetric).order_by(TestMetric.uid).execution_options(yield_per=chunk_size)
+        if session_id:
+            stmt = stmt.where(TestMetric.sid == session_id)
+        if node_id:
+            stmt = stmt.where(TestMetric.xid == node_id)
+        for row in self.session.execute(stmt).scalars():
+            yield presenter.from_orm(row, as_=Metric)
+
+    def get_batch_of(self, session_id: str | None = None, node_id: str | None = None) -> MetricBatch:
+        # Plain column tuples are fetched, no ORM instance nor domain object is built
+        stmt = select(*self.BATCH_COLUMNS).order_by(TestMetric.uid)
+        if session_id:
+            stmt = stmt.where(TestMetric.sid == session_id)
+        if node_id:
+            stmt = stmt.where(TestMetric.xid == node_id)
+        return MetricBatch.from_records(t.cast(t.Iterable[MetricRecord], self.session.execute(stmt).tuples()))
+
+    def history_of(
+        self,
+        item_path: str,
+        variant: str,
+        node_id: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> MetricBatch:
+        stmt = (
+            select(*self.BATCH_COLUMNS)
+            .where(TestMetric.item_path == item_path, TestMetric.variant == variant)
+            .order_by(TestMetric.item_start_time, TestMetric.uid)
+        )
+        if node_id:
+            stmt = stmt.where(TestMetric.xid == node_id)
+        if since:
+            stmt = stmt.where(TestMetric.item_start_time >= _as_utc(since))
+        if until:
+            stmt = stmt.where(TestMetric.item_start_time <= _as_utc(until))
+        return MetricBatch.from_records(t.cast(t.Iterable[MetricRecord], self.session.execute(stmt).tuples()))
+
+    def delete_chunk_of(self, session_id: str, chunk_size: int = 1000) -> int:
+        # Rows are selected first: DELETE ... ORDER BY ... LIMIT is not portable. Each chunk is its own transaction
+        # so that locks are released between chunks.
+        stmt = select(TestMetric.uid).where(TestMetric.sid == session_id).order_by(TestMetric.uid).limit(chunk_size)
+        try:
+            uids = self.session.execute(stmt).scalars().all()
+            if uids:
+                self.session.execute(delete(TestMetric).where(TestMetric.uid.in_(uids)))
+                self._generation += 1
+            self._commit()
+        except SQLAlchemyError as e:
+            raise ORMError(str(e)) from e
+        return len(uids)
+
     def get_all_of(
         self, session_id: str | None = None, node_id: str | None = None, page_info: PageableStatement | None = None
     ) -> PaginatedResponse[t.List[Metric]]:
@@ -65,25 +300,122 @@ class MetricSQLRepository(MetricRepository, SQLRepository[Metric, TestMetric]):
 
 
 class MetricInMemRepository(MetricRepository, InMemoryRepository[Metric, TestMetric]):
+    # Row attributes in the Metric field order, as expected by MetricBatch
+    BATCH_COLUMNS = tuple(column.key for column in MetricSQLRepository.BATCH_COLUMNS)
+    # Tests and their variants are many, the sessions, nodes, files and components they belong to are few
+    SHARED_COLUMNS = frozenset({'sid', 'xid', 'item_path', 'item_fs_loc', 'kind', 'component'})
+
+    def __init__(self) -> None:
+        super().__init__()
+        # Secondary indexes: uids of metrics, kept ordered, per session, per node and per test
+        self._by_session: t.Dict[str, SortedKeys] = {}
+        self._by_node: t.Dict[str, SortedKeys] = {}
+        self._by_test: t.Dict[t.Tuple[str, str], SortedKeys] = {}
+
+    def _indexes_of(self, row: CompactRow) -> t.Iterator[t.Tuple[t.Dict[t.Any, SortedKeys], t.Any]]:
+        yield self._by_session, row.sid
+        yield self._by_node, row.xid
+        yield self._by_test, (row.item_path, row.variant)
+
+    def _index(self, row: CompactRow) -> None:
+        for index, key in self._indexes_of(row):
+            index.setdefault(key, SortedKeys()).add(row.uid)
+
+    def _unindex(self, row: CompactRow) -> None:
+        for index, key in self._indexes_of(row):
+            uids = index.get(key)
+            if uids is not None:
+                uids.discard(row.uid)
+                if not uids:
+                    del index[key]
+
+    def _matching_uids(self, session_id: str | None, node_id: str | None) -> t.Sequence[str]:
+        if session_id is None and node_id is None:
+            return self._keys
+        if session_id is None or node_id is None:
+            index, key = (self._by_node, node_id) if session_id is None else (self._by_session, session_id)
+            return index.get(t.cast(str, key)) or []
+        by_session, by_node = self._by_session.get(session_id), self._by_node.get(node_id)
+        if not by_session or not by_node:
+            return []
+        # Walk the smallest index and check the other attribute on the stored row
+        if len(by_session) <= len(by_node):
+            return [uid for uid in by_session if self._data[uid].xid == node_id]
+        return [uid for uid in by_node if self._data[uid].sid == session_id]
+
+    def create(self, item: Metric) -> Metric:
+        super().create(item)
+        self._index(self._data[item.uid.hex])
+        return item
+
+    def update(self, item: Metric) -> Metric:
+        previous = self._data.get(item.uid.hex)
+        super().update(item)
+        if previous is not None:
+            self._unindex(previous)
+        self._index(self._data[item.uid.hex])
+        return item
+
+    def delete(self, uid: str) -> None:
+        previous = self._data.get(uid)
+        super().delete(uid)
+        if previous is not None:
+            self._unindex(previous)
+
+    def truncate(self) -> None:
+        super().truncate()
+        self._by_session, self._by_node, self._by_test = {}, {}, {}
+
+    def iter_all_of(
+        self, session_id: str | None = None, node_id: str | None = None, chunk_size: int = 1000
+    ) -> t.Iterator[Metric]:
+        for an_id in list(self._matching_uids(session_id, node_id)):
+            metric = self._data.get(an_id)
+            if metric is not None:
+                yield self._load(metric)
+
+    def get_batch_of(self, session_id: str | None = None, node_id: str | None = None) -> MetricBatch:
+        rows = [self._data[uid] for uid in self._matching_uids(session_id, node_id)]
+        return MetricBatch.from_columns([list(map(attrgetter(column), rows)) for column in self.BATCH_COLUMNS])
+
+    def history_of(
+        self,
+        item_path: str,
+        variant: str,
+        node_id: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> MetricBatch:
+        since = since and _as_utc(since)
+        until = until and _as_utc(until)
+        rows = [
+            row
+            for row in (self._data[uid] for uid in self._by_test.get((item_path, variant), ()))
+            if (node_id is None or row.xid == node_id)
+            and (since is None or _as_utc(row.item_start_time) >= since)
+            and (until is None or _as_utc(row.item_start_time) <= until)
+        ]
+        rows.sort(key=lambda row: (_as_utc(row.item_start_time), row.uid))
+        return MetricBatch.from_columns([list(map(attrgetter(column), rows)) for column in self.BATCH_COLUMNS])
+
+    def delete_chunk_of(self, session_id: str, chunk_size: int = 1000) -> int:
+        uids = list(self._by_session.get(session_id, ())[:chunk_size])
+        for uid in uids:
+            self.delete(uid)
+        return len(uids)
+
     def get_all_of(
         self, session_id: str | None = None, node_id: str | None = None, page_info: PageableStatement | None = None
     ) -> PaginatedResponse[t.List[Metric]]:
-        def filter_metric(metric: TestMetric) -> bool:
-            session_is_ok = (session_id is None) or (session_id is not None and metric.sid == session_id)
-            node_is_ok = (node_id is None) or (node_id is not None and metric.xid == node_id)
-            return session_is_ok and node_is_ok
-
-        matching_metrics = sorted(filter(filter_metric, self._data.values()), key=lambda m: m.uid.hex)
-
+        uids = self._matching_uids(session_id, node_id)
         if page_info is None:
             return PaginatedResponse(
-                data=[presenter.from_orm(metric, as_=Metric) for metric in matching_metrics],
+                data=[self._load(self._data[uid]) for uid in uids],
                 page_no=None,
                 next_page=None,
             )
         page = slice(page_info.offset, page_info.offset + page_info.page_size)
-        count = len(matching_metrics)
         return page_info.build_response(
-            data=[presenter.from_orm(metric, as_=Metric) for metric in matching_metrics[page]],
-            elements_count=count,
+            data=[self._load(self._data[uid]) for uid in uids[page]],
+            elements_count=len(uids),
         )
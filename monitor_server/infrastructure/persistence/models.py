@@ -2,7 +2,8 @@ import typing as t
 from datetime import datetime
 from uuid import UUID
 
-from sqlalchemy import JSON, Float, ForeignKey, Integer, String
+from sqlalchemy import JSON, BigInteger, Double, Float, ForeignKey, Index, Integer, LargeBinary, String
+from sqlalchemy.dialects import mysql
 from sqlalchemy.ext.mutable import MutableDict
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -81,3 +82,56 @@ class TestMetric(ORMModel):
     mem_usage: Mapped[float] = mapped_column(Float(), nullable=False)
     session = relationship(Session)
     execution_context = relationship(ExecutionContext)
+
+    __table_args__ = (
+        # Per test history. Path and variant are too long to be fully indexed by MySQL, only a prefix is.
+        Index(
+            'ix_item_path_variant_item_start_time',
+            'item_path',
+            'variant',
+            'item_start_time',
+            mysql_length={'item_path': 255, 'variant': 255},
+        ),
+        # SQLite does not index foreign keys on its own
+        Index('ix_TestMetric_sid', 'sid'),
+        Index('ix_TestMetric_xid', 'xid'),
+    )
+
+
+# Aggregates of an attribute over the metrics of a session (resp. of a component of a session), one row per attribute.
+# Rows are maintained as metrics are ingested.
+class SessionRollup(ORMModel):
+    sid: Mapped[str] = mapped_column(String(64), ForeignKey(Session.uid), primary_key=True)
+    attribute: Mapped[str] = mapped_column(String(16), primary_key=True)
+    count: Mapped[int] = mapped_column(BigInteger(), nullable=False)
+    total: Mapped[float] = mapped_column(Double(), nullable=False)
+    squares: Mapped[float] = mapped_column(Double(), nullable=False)
+    minimum: Mapped[float] = mapped_column(Double(), nullable=False)
+    maximum: Mapped[float] = mapped_column(Double(), nullable=False)
+
+
+class ComponentRollup(ORMModel):
+    sid: Mapped[str] = mapped_column(String(64), ForeignKey(Session.uid), primary_key=True)
+    component: Mapped[str] = mapped_column(String(512), primary_key=True)
+    attribute: Mapped[str] = mapped_column(String(16), primary_key=True)
+    count: Mapped[int] = mapped_column(BigInteger(), nullable=False)
+    total: Mapped[float] = mapped_column(Double(), nullable=False)
+    squares: Mapped[float] = mapped_column(Double(), nullable=False)
+    minimum: Mapped[float] = mapped_column(Double(), nullable=False)
+    maximum: Mapped[float] = mapped_column(Double(), nullable=False)
+
+
+# Whole validation suite of a sealed session, serialized once so that it is read back as a single blob
+class SessionSnapshot(ORMModel):
+    sid: Mapped[str] = mapped_column(String(64), ForeignKey(Session.uid), primary_key=True)
+    sealed_at: Mapped[datetime] = mapped_column(nullable=False)
+    metrics: Mapped[int] = mapped_column(Integer(), nullable=False)
+    payload: Mapped[bytes] = mapped_column(LargeBinary().with_variant(mysql.LONGBLOB(), 'mysql'), nullable=False)
+
+
+# Tombstone of a session whose metrics were moved out of TestMetric to the cold archive
+class SessionArchive(ORMModel):
+    sid: Mapped[str] = mapped_column(String(64), ForeignKey(Session.uid), primary_key=True)
+    archived_at: Mapped[datetime] = mapped_column(nullable=False)
+    metrics: Mapped[int] = mapped_column(Integer(), nullable=False)
+    location: Mapped[str] = mapped_column(String(1024), nullable=False)
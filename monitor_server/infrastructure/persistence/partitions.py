@@ -0,0 +1,121 @@
+import typing as t
+from datetime import UTC, datetime
+
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from monitor_server.infrastructure.orm.errors import ORMError
+from monitor_server.infrastructure.persistence.models import TestMetric
+
+FUTURE_PARTITION = 'p_future'
+
+
+class Partition(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    name: str
+    upper_bound: datetime | None = None  # None stands for MAXVALUE
+    rows: int = 0
+
+
+def month_of(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, 1, tzinfo=UTC)
+
+
+def next_month(month: datetime) -> datetime:
+    return month.replace(year=month.year + 1, month=1) if month.month == 12 else month.replace(month=month.month + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f'p{month:%Y%m}'
+
+
+def monthly_partitions(first: datetime, last: datetime) -> t.List[Partition]:
+    """Partitions holding the months from first up to last (both included), each bounded by the next month"""
+    partitions, month = [], month_of(first)
+    while month <= last:
+        partitions.append(Partition(name=partition_name(month), upper_bound=next_month(month)))
+        month = next_month(month)
+    return partitions
+
+
+def partition_clause(partition: Partition) -> str:
+    if partition.upper_bound is None:
+        return f'PARTITION {partition.name} VALUES LESS THAN (MAXVALUE)'
+    return f"PARTITION {partition.name} VALUES LESS THAN ('{partition.upper_bound:%Y-%m-%d %H:%M:%S}')"
+
+
+def _parse_bound(description: str) -> datetime | None:
+    if description == 'MAXVALUE':
+        return None
+    return datetime.strptime(description.strip("'"), '%Y-%m-%d %H:%M:%S').replace(tzinfo=UTC)
+
+
+class MetricPartitions:
+    """Monthly RANGE partitions of the metric table on item_start_time.
+
+    Partitioning is opt-in (see revision 5c1e9d7a0f43) and MySQL only: every helper is a no-op on a table that is not
+    partitioned. Partitions are created ahead of time by splitting the empty catch-all partition, and expired ones are
+    dropped as a whole, both being metadata-only operations. Rollups of sessions whose metrics are dropped are kept
+    until rollups are rebuilt, a rebuild only keeping those of archived sessions.
+    """
+
+    def __init__(self, session: Session) -> None:
+        self.session = session
+
+    def list(self) -> t.List[Partition]:
+        if self.session.get_bind().dialect.name != 'mysql':
+            return []
+        stmt = text(
+            'SELECT PARTITION_NAME, PARTITION_DESCRIPTION, TABLE_ROWS FROM information_schema.PARTITIONS '
+            'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND PARTITION_NAME IS NOT NULL '
+            'ORDER BY PARTITION_ORDINAL_POSITION'
+        )
+        try:
+            rows = self.session.execute(stmt, {'table': TestMetric.__tablename__}).all()
+        except SQLAlchemyError as e:
+            raise ORMError(str(e)) from e
+        return [Partition(name=name, upper_bound=_parse_bound(bound), rows=count or 0) for name, bound, count in rows]
+
+    def _alter(self, clause: str) -> None:
+        try:
+            self.session.execute(text(f'ALTER TABLE {TestMetric.__tablename__} {clause}'))
+            self.session.commit()
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            raise ORMError(str(e)) from e
+
+    def create_ahead(self, months: int = 3, now: datetime | None = None) -> t.List[str]:
+        """Make sure partitions exist up to the given number of months after the current one. Returns the names of
+        the created partitions."""
+        partitions = self.list()
+        if not partitions:
+            return []
+        last_month = month_of(now or datetime.now(tz=UTC))
+        for _ in range(months):
+            last_month = next_month(last_month)
+        # Months already covered end at the highest bound, the catch-all partition aside
+        first_month = max(
+            (partition.upper_bound for partition in partitions if partition.upper_bound is not None),
+            default=month_of(now or datetime.now(tz=UTC)),
+        )
+        created = monthly_partitions(first_month, last_month)
+        if not created:
+            return []
+        clauses = ', '.join(partition_clause(partition) for partition in [*created, Partition(name=FUTURE_PARTITION)])
+        self._alter(f'REORGANIZE PARTITION {FUTURE_PARTITION} INTO ({clauses})')
+        return [partition.name for partition in created]
+
+    def drop_before(self, cutoff: datetime) -> t.List[str]:
+        """Drop the partitions only holding metrics started before cutoff. Returns the names of the dropped
+        partitions."""
+        expired = [
+            partition.name
+            for partition in self.list()
+            if partition.upper_bound is not None and partition.upper_bound <= cutoff
+        ]
+        if expired:
+            self._alter(f'DROP PARTITION {", ".join(expired)}')
+        return expired
@@ -0,0 +1,220 @@
+import abc
+import itertools as it
+import typing as t
+
+from sqlalchemy import ColumnElement, Table, literal
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import delete, func, insert, select
+
+from monitor_server.domain.models.metrics import Metric
+from monitor_server.domain.models.rollups import AttributeRollup, Rollup, SessionRollups, rollups_of
+from monitor_server.infrastructure.orm.errors import ORMError
+from monitor_server.infrastructure.orm.repositories import unit_of_work
+from monitor_server.infrastructure.persistence.archives import ArchiveRepository
+from monitor_server.infrastructure.persistence.metrics import MetricRepository, MetricSQLRepository
+from monitor_server.infrastructure.persistence.models import ComponentRollup, SessionArchive, SessionRollup, TestMetric
+
+# Aggregated columns of a rollup row, in the AttributeRollup field order
+ROLLUP_COLUMNS = ('count', 'total', 'squares', 'minimum', 'maximum')
+
+
+class RollupRepository(abc.ABC):
+    """Aggregates of the metrics of each session, overall and per component.
+
+    They are folded in as metrics are added only: minima and maxima cannot be taken back. Metrics updated or deleted
+    afterwards, one by one or by chunks, are only accounted for by a rebuild. Archived sessions rely on it, their
+    rollups outliving the rows moved to the cold archive.
+    """
+
+    @abc.abstractmethod
+    def add(self, metrics: t.Sequence[Metric]) -> None:
+        """Fold the given metrics into the rollups of their session and component"""
+
+    @abc.abstractmethod
+    def get(self, session_id: str) -> SessionRollups:
+        """Get the rollups of a session and of its components. They are empty if the session has no metric."""
+
+    @abc.abstractmethod
+    def rebuild(self, session_id: str | None = None) -> int:
+        """Recompute rollups from the stored metrics of a session, or of all sessions. Rollups of archived sessions
+        are left as they are, their metrics being no longer stored. Returns the number of sessions having rollups."""
+
+    @abc.abstractmethod
+    def delete(self, session_id: str) -> None:
+        """Remove the rollups of a session"""
+
+    @abc.abstractmethod
+    def truncate(self) -> None:
+        """Remove all rollups"""
+
+
+def _attributes_of(rollup: Rollup) -> t.Iterator[t.Dict[str, t.Any]]:
+    for attribute, aggregates in rollup.attributes.items():
+        yield {'attribute': attribute, **aggregates.model_dump()}
+
+
+class RollupSQLRepository(RollupRepository):
+    def __init__(self, session: Session) -> None:
+        self.session = session
+
+    def _upsert(self, table: Table, rows: t.List[t.Dict[str, t.Any]]) -> None:
+        """Insert rows, merging them into the existing rows having the same primary key"""
+        dialect = self.session.get_bind().dialect.name
+        stmt: t.Any
+        least: t.Any
+        greatest: t.Any
+        if dialect == 'mysql':
+            stmt = mysql.insert(table).values(rows)
+            new, least, greatest = stmt.inserted, func.least, func.greatest
+        elif dialect in ('postgresql', 'sqlite'):
+            stmt = (postgresql if dialect == 'postgresql' else sqlite).insert(table).values(rows)
+            new = stmt.excluded
+            # SQLite's scalar min() and max() behave as least() and greatest() when given several arguments
+            least, greatest = (func.least, func.greatest) if dialect == 'postgresql' else (func.min, func.max)
+        else:
+            raise ORMError(f'Rollups cannot be maintained on a {dialect} database')
+        merged: t.Dict[str, ColumnElement] = {
+            'count': table.c['count'] + new['count'],
+            'total': table.c['total'] + new['total'],
+            'squares': table.c['squares'] + new['squares'],
+            'minimum': least(table.c['minimum'], new['minimum']),
+            'maximum': greatest(table.c['maximum'], new['maximum']),
+        }
+        if dialect == 'mysql':
+            stmt = stmt.on_duplicate_key_update(merged)
+        else:
+            stmt = stmt.on_conflict_do_update(index_elements=list(table.primary_key.columns), set_=merged)
+        self.session.execute(stmt)
+
+    def add(self, metrics: t.Sequence[Metric]) -> None:
+        sessions, components = rollups_of(metrics)
+        if not sessions:
+            return
+        try:
+            with unit_of_work(self.session):
+                self._upsert(
+                    t.cast(Table, SessionRollup.__table__),
+                    [{'sid': rollup.session_id, **row} for rollup in sessions for row in _attributes_of(rollup)],
+                )
+                self._upsert(
+                    t.cast(Table, ComponentRollup.__table__),
+                    [
+                        {'sid': rollup.session_id, 'component': rollup.component, **row}
+                        for rollup in components
+                        for row in _attributes_of(rollup)
+                    ],
+                )
+        except SQLAlchemyError as e:
+            raise ORMError(str(e)) from e
+
+    @staticmethod
+    def _attribute_rollup_of(row: SessionRollup | ComponentRollup) -> AttributeRollup:
+        return AttributeRollup(**{column: getattr(row, column) for column in ROLLUP_COLUMNS})
+
+    def get(self, session_id: str) -> SessionRollups:
+        overall: t.Dict[t.Any, AttributeRollup] = {
+            row.attribute: self._attribute_rollup_of(row)
+            for row in self.session.execute(select(SessionRollup).where(SessionRollup.sid == session_id)).scalars()
+        }
+        components: t.Dict[str, t.Dict[t.Any, AttributeRollup]] = {}
+        stmt = select(ComponentRollup).where(ComponentRollup.sid == session_id).order_by(ComponentRollup.component)
+        for row in self.session.execute(stmt).scalars():
+            components.setdefault(row.component, {})[row.attribute] = self._attribute_rollup_of(row)
+        return SessionRollups(
+            session_id=session_id,
+            overall=Rollup(session_id=session_id, attributes=overall) if overall else None,
+            components={
+                component: Rollup(session_id=session_id, component=component, attributes=attributes)
+                for component, attributes in components.items()
+            },
+        )
+
+    def _insert_aggregates(self, model: t.Type[SessionRollup | ComponentRollup], session_id: str | None) -> None:
+        # One INSERT ... SELECT ... GROUP BY per attribute: rollups are computed by the database
+        groups = [TestMetric.sid] if model is SessionRollup else [TestMetric.sid, TestMetric.component]
+        for attribute, column_name in MetricSQLRepository.STATISTICS_COLUMNS.items():
+            column = getattr(TestMetric, column_name)
+            stmt = select(
+                *groups,
+                literal(attribute),
+                func.count(),
+                func.sum(column),
+                func.sum(column * column),
+                func.min(column),
+                func.max(column),
+            ).group_by(*groups)
+            stmt = stmt.where(TestMetric.sid.not_in(select(SessionArchive.sid)))
+            if session_id:
+                stmt = stmt.where(TestMetric.sid == session_id)
+            target = [group.key for group in groups] + ['attribute', *ROLLUP_COLUMNS]
+            self.session.execute(insert(model).from_select(target, stmt))
+
+    def rebuild(self, session_id: str | None = None) -> int:
+        try:
+            with unit_of_work(self.session):
+                for model in (ComponentRollup, SessionRollup):
+                    stmt = delete(model).where(model.sid.not_in(select(SessionArchive.sid)))
+                    if session_id:
+                        stmt = stmt.where(model.sid == session_id)
+                    self.session.execute(stmt)
+                    self._insert_aggregates(model, session_id)
+                count = select(func.count(func.distinct(SessionRollup.sid)))
+                if session_id:
+                    count = count.where(SessionRollup.sid == session_id)
+                return self.session.execute(count).scalar_one()
+        except SQLAlchemyError as e:
+            raise ORMError(str(e)) from e
+
+    def delete(self, session_id: str) -> None:
+        with unit_of_work(self.session):
+            self.session.execute(delete(ComponentRollup).where(ComponentRollup.sid == session_id))
+            self.session.execute(delete(SessionRollup).where(SessionRollup.sid == session_id))
+
+    def truncate(self) -> None:
+        with unit_of_work(self.session):
+            self.session.execute(delete(ComponentRollup))
+            self.session.execute(delete(SessionRollup))
+
+
+class RollupInMemRepository(RollupRepository):
+    def __init__(self, metric_repository: MetricRepository, archive_repository: ArchiveRepository) -> None:
+        self._metrics = metric_repository
+        self._archives = archive_repository
+        self._sessions: t.Dict[str, Rollup] = {}
+        self._components: t.Dict[str, t.Dict[str, Rollup]] = {}
+
+    def add(self, metrics: t.Sequence[Metric]) -> None:
+        sessions, components = rollups_of(metrics)
+        for rollup in sessions:
+            previous = self._sessions.get(rollup.session_id)
+            self._sessions[rollup.session_id] = previous.merge(rollup) if previous else rollup
+        for rollup in components:
+            of_session = self._components.setdefault(rollup.session_id, {})
+            previous = of_session.get(t.cast(str, rollup.component))
+            of_session[t.cast(str, rollup.component)] = previous.merge(rollup) if previous else rollup
+
+    def get(self, session_id: str) -> SessionRollups:
+        return SessionRollups(
+            session_id=session_id,
+            overall=self._sessions.get(session_id),
+            components=dict(sorted(self._components.get(session_id, {}).items())),
+        )
+
+    def rebuild(self, session_id: str | None = None) -> int:
+        kept = self._archives.archived_among([session_id] if session_id else self._sessions)
+        for dropped in [session_id] if session_id else list(self._sessions):
+            if dropped not in kept:
+                self.delete(dropped)
+        for chunk in it.batched(self._metrics.iter_all_of(session_id=session_id), 1000):
+            archived = self._archives.archived_among({metric.session_id for metric in chunk})
+            self.add([metric for metric in chunk if metric.session_id not in archived])
+        return len(self._sessions) if session_id is None else int(session_id in self._sessions)
+
+    def delete(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+        self._components.pop(session_id, None)
+
+    def truncate(self) -> None:
+        self._sessions, self._components = {}, {}
@@ -0,0 +1,431 @@
+import datetime
+import json
+import os
+import pathlib
+import shutil
+import typing as t
+from array import array
+from functools import cached_property
+
+import numpy as np
+
+from monitor_server.domain.models.batches import DictionaryColumn, MetricBatch
+from monitor_server.domain.models.metrics import Metric
+from monitor_server.infrastructure.orm.errors import ORMError
+from monitor_server.infrastructure.orm.pageable import PageableStatement, PaginatedResponse
+from monitor_server.infrastructure.orm.repositories import CRUDRepositoryBase
+from monitor_server.infrastructure.persistence.exceptions import EntityAlreadyExists, EntityNotFound
+from monitor_server.infrastructure.persistence.metrics import MetricRepository
+from monitor_server.infrastructure.persistence.models import TestMetric
+
+SEGMENT_MAGIC = b'MSEG'
+SEGMENT_VERSION = 1
+DEFAULT_CAPACITY = 1 << 20
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.UTC)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+
+# The row count is the last field written by an append: rows past it are garbage left by an interrupted one
+_HEADER = np.dtype([('magic', 'S4'), ('version', '<u4'), ('capacity', '<u8'), ('rows', '<u8')])
+_HEADER_SIZE = 64
+
+# Fixed width columns of a segment, in file order. Start times are microseconds since the epoch in UTC, strings are
+# codes of the store dictionary and live is cleared when a metric is deleted.
+COLUMNS: t.Dict[str, np.dtype] = {
+    'uid': np.dtype('S32'),
+    'item_start_time': np.dtype('<i8'),
+    **{name: np.dtype('<f8') for name in MetricBatch.NUMERIC_COLUMNS},
+    **{name: np.dtype('<i4') for name in MetricBatch.STRING_COLUMNS},
+    'live': np.dtype('u1'),
+}
+
+# A position locates a row in the store: segment number in the high bits, row within the segment in the low ones
+_ROW_BITS = 32
+_ROW_MASK = (1 << _ROW_BITS) - 1
+_NO_POSITIONS = np.empty(0, dtype=np.int64)
+
+
+class Segment:
+    """File holding the columns of up to capacity metrics, memory-mapped.
+
+    Each column is a contiguous region of the file, so that it is read as a NumPy view without copying. The file is
+    allocated at its full size when created, sparse on most file systems.
+    """
+
+    def __init__(self, path: pathlib.Path, capacity: int = DEFAULT_CAPACITY) -> None:
+        self.path = path
+        if not path.exists():
+            with path.open('xb') as file:
+                file.truncate(_HEADER_SIZE + capacity * sum(dtype.itemsize for dtype in COLUMNS.values()))
+        self._mmap = np.memmap(path, dtype=np.uint8, mode='r+')
+        buffer = np.asarray(self._mmap)
+        self._header = buffer[: _HEADER.itemsize].view(_HEADER)
+        if not self._header['magic'][0]:
+            self._header[0] = (SEGMENT_MAGIC, SEGMENT_VERSION, capacity, 0)
+        if self._header['magic'][0] != SEGMENT_MAGIC or self._header['version'][0] != SEGMENT_VERSION:
+            raise ORMError(f'{path} is not a metric segment of version {SEGMENT_VERSION}')
+        self.capacity = int(self._header['capacity'][0])
+        self._columns: t.Dict[str, np.ndarray] = {}
+        offset = _HEADER_SIZE
+        for name, dtype in COLUMNS.items():
+            self._columns[name] = buffer[offset : offset + self.capacity * dtype.itemsize].view(dtype)
+            offset += self.capacity * dtype.itemsize
+
+    @property
+    def rows(self) -> int:
+        return int(self._header['rows'][0])
+
+    @property
+    def free(self) -> int:
+        return self.capacity - self.rows
+
+    def column(self, name: str) -> np.ndarray:
+        """View of the values of a column, for all the rows of the segment"""
+        return self._columns[name][: self.rows]
+
+    def columns(self) -> t.Dict[str, np.ndarray]:
+        rows = self.rows
+        return {name: column[:rows] for name, column in self._columns.items()}
+
+    def append(self, values: t.Mapping[str, np.ndarray]) -> None:
+        rows, count = self.rows, len(values['uid'])
+        if count > self.capacity - rows:
+            raise ValueError(f'{self.path} has room for {self.capacity - rows} rows, not {count}')
+        for name, column in self._columns.items():
+            column[rows : rows + count] = values[name]
+        self._header['rows'] = rows + count
+
+    @cached_property
+    def uid_order(self) -> np.ndarray:
+        """Row numbers ordered by uid. Only computed for full segments, whose uids no longer change."""
+        return np.argsort(self.column('uid'), kind='stable').astype(np.int32)
+
+    def flush(self) -> None:
+        self._mmap.flush()
+
+
+class StringDictionary:
+    """Append-only file of the distinct strings of a store, one JSON string per line, coded by line number"""
+
+    def __init__(self, path: pathlib.Path) -> None:
+        self.path = path
+        content = path.read_bytes() if path.exists() else b''
+        # A line without its end of line was cut short by a crash: rows referencing it were never counted
+        complete = content[: content.rfind(b'\n') + 1]
+        if len(complete) != len(content):
+            with path.open('r+b') as file:
+                file.truncate(len(complete))
+        self._values: t.List[str] = [json.loads(line) for line in complete.splitlines()]
+        self._codes = {value: code for code, value in enumerate(self._values)}
+        self._frozen: t.Tuple[str, ...] = ()
+
+    @property
+    def values(self) -> t.Tuple[str, ...]:
+        """All strings, indexed by code"""
+        if len(self._frozen) != len(self._values):
+            self._frozen = tuple(self._values)
+        return self._frozen
+
+    def code_of(self, value: str) -> int | None:
+        return self._codes.get(value)
+
+    def encode(self, strings: t.Sequence[str], sync: bool = False) -> np.ndarray:
+        """Codes of the given strings, recording the unknown ones"""
+        added: t.List[str] = []
+        for value in strings:
+            if value not in self._codes:
+                self._codes[value] = len(self._values)
+                self._values.append(value)
+                added.append(value)
+        if added:
+            with self.path.open('ab') as file:
+                file.write(b''.join(json.dumps(value).encode() + b'\n' for value in added))
+                file.flush()
+                if sync:
+                    os.fsync(file.fileno())
+        return np.fromiter(map(self._codes.__getitem__, strings), dtype=np.int32, count=len(strings))
+
+
+class MetricSegmentRepository(MetricRepository, CRUDRepositoryBase[Metric, TestMetric]):
+    """Metrics appended to memory-mapped column segments stored in a folder, for single node setups.
+
+    Strings are stored once in a dictionary file and referenced by code. Deleting a metric clears its live flag in
+    place: nothing else is ever rewritten. Metrics of a session are found through an index of their positions, kept
+    in memory and rebuilt from the segments when the store is opened. Uids are looked up in the sorted order of full
+    segments and in a map of the rows of the one being filled.
+
+    Writes survive the process crashing. They survive the host crashing once flushed, which sync does on every write.
+    """
+
+    def __init__(self, folder: pathlib.Path, capacity: int = DEFAULT_CAPACITY, sync: bool = False) -> None:
+        super().__init__()
+        self.folder = folder
+        self.capacity = capacity
+        self.sync = sync
+        self._open()
+
+    def _open(self) -> None:
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self._strings = StringDictionary(self.folder / 'strings.ndjson')
+        self._segments = [Segment(path) for path in sorted(self.folder.glob('segment-*.bin'))]
+        self._by_session: t.Dict[str, array] = {}
+        self._filling: t.Dict[str, int] = {}
+        self._live = 0
+        for number, segment in enumerate(self._segments):
+            self._index(number, np.flatnonzero(segment.column('live')))
+
+    def _index(self, number: int, rows: np.ndarray) -> None:
+        segment = self._segments[number]
+        positions = rows.astype(np.int64) | (number << _ROW_BITS)
+        sessions = segment.column('session_id')[rows]
+        order = np.argsort(sessions, kind='stable')
+        codes, starts = np.unique(sessions[order], return_index=True)
+        values = self._strings.values
+        for code, of_session in zip(codes.tolist(), np.split(positions[order], starts[1:]), strict=True):
+            self._by_session.setdefault(values[code], array('q')).frombytes(of_session.tobytes())
+        if segment.free:
+            self._filling.update(
+                zip(segment.column('uid')[rows].astype('U32').tolist(), positions.tolist(), strict=True)
+            )
+        self._live += len(rows)
+
+    def _segment_at(self, position: int) -> t.Tuple[Segment, int]:
+        return self._segments[position >> _ROW_BITS], position & _ROW_MASK
+
+    def _find(self, uid: str) -> int | None:
+        """Position of the live metric of the given uid, if any"""
+        position = self._filling.get(uid)
+        if position is not None:
+            return position
+        key = uid.encode()
+        if len(key) != COLUMNS['uid'].itemsize:
+            return None
+        for number, segment in enumerate(self._segments):
+            if segment.free:
+                continue
+            uids, order, live = segment.column('uid'), segment.uid_order, segment.column('live')
+            index = int(np.searchsorted(uids, key, sorter=order))
+            # A uid deleted then created again is found more than once: only one of them is live
+            while index < len(order) and uids[order[index]] == key:
+                if live[order[index]]:
+                    return int(order[index]) | (number << _ROW_BITS)
+                index += 1
+        return None
+
+    def _positions(self, session_id: str | None = None, node_id: str | None = None) -> np.ndarray:
+        """Positions of the live metrics of the given session and/or node, ordered by uid"""
+        if session_id is not None:
+            of_session = self._by_session.get(session_id)
+            positions = _NO_POSITIONS if of_session is None else np.frombuffer(of_session, dtype=np.int64)
+            if node_id is not None:
+                code = self._strings.code_of(node_id)
+                positions = _NO_POSITIONS if code is None else positions[self._gather('node_id', positions) == code]
+        else:
+            code = None if node_id is None else self._strings.code_of(node_id)
+            if node_id is not None and code is None:
+                return _NO_POSITIONS
+            chunks = [_NO_POSITIONS]
+            for number, segment in enumerate(self._segments):
+                mask = segment.column('live').astype(bool)
+                if code is not None:
+                    mask &= segment.column('node_id') == code
+                chunks.append(np.flatnonzero(mask).astype(np.int64) | (number << _ROW_BITS))
+            positions = np.concatenate(chunks)
+        return positions[np.argsort(self._gather('uid', positions), kind='stable')]
+
+    def _gather(self, name: str, positions: np.ndarray) -> np.ndarray:
+        """Values of a column at the given positions, in that order"""
+        values = np.empty(len(positions), dtype=COLUMNS[name])
+        numbers, rows = positions >> _ROW_BITS, positions & _ROW_MASK
+        for number in np.unique(numbers).tolist():
+            mask = numbers == number
+            values[mask] = self._segments[number].column(name)[rows[mask]]
+        return values
+
+    def _batch_of(self, columns: t.Mapping[str, np.ndarray]) -> MetricBatch:
+        values = self._strings.values
+        strings: t.Dict[str, t.Any] = {
+            name: DictionaryColumn(codes=columns[name], values=values) for name in MetricBatch.STRING_COLUMNS
+        }
+        numbers: t.Dict[str, t.Any] = {name: columns[name] for name in MetricBatch.NUMERIC_COLUMNS}
+        return MetricBatch(
+            uid=columns['uid'].astype('U32'),
+            item_start_time=columns['item_start_time'].view('datetime64[us]'),
+            timezone=datetime.UTC,
+            **strings,
+            **numbers,
+        )
+
+    def _batch_at(self, positions: np.ndarray) -> MetricBatch:
+        return self._batch_of({name: self._gather(name, positions) for name in COLUMNS})
+
+    def _load(self, positions: np.ndarray) -> t.List[Metric]:
+        return self._batch_at(positions).to_metrics()
+
+    def _append(self, items: t.Sequence[Metric]) -> None:
+        batch = MetricBatch.from_metrics(items)
+        values: t.Dict[str, np.ndarray] = {
+            'uid': batch.uid.astype('S32'),
+            'item_start_time': batch.item_start_time.astype(np.int64),
+            'live': np.ones(len(items), dtype=np.uint8),
+            **{name: getattr(batch, name) for name in MetricBatch.NUMERIC_COLUMNS},
+        }
+        for name in MetricBatch.STRING_COLUMNS:
+            values[name] = self._strings.encode(t.cast(DictionaryColumn, getattr(batch, name)).decode(), self.sync)
+        written = 0
+        while written < len(items):
+            if not self._segments or not self._segments[-1].free:
+                self._segments.append(Segment(self.folder / f'segment-{len(self._segments):05d}.bin', self.capacity))
+                # Rows of full segments are found through their uid order
+                self._filling = {}
+            number, segment = len(self._segments) - 1, self._segments[-1]
+            first, count = segment.rows, min(segment.free, len(items) - written)
+            segment.append({name: column[written : written + count] for name, column in values.items()})
+            if self.sync:
+                segment.flush()
+            self._index(number, np.arange(first, first + count))
+            written += count
+        self._generation += 1
+
+    def _tombstone(self, positions: np.ndarray) -> None:
+        if not len(positions):
+            return
+        for uid, position in zip(
+            self._gather('uid', positions).astype('U32').tolist(), positions.tolist(), strict=True
+        ):
+            segment, row = self._segment_at(position)
+            segment.column('live')[row] = 0
+            self._filling.pop(uid, None)
+            if self.sync:
+                segment.flush()
+        values = self._strings.values
+        for session_id in {values[code] for code in self._gather('session_id', positions).tolist()}:
+            remaining = np.setdiff1d(np.frombuffer(self._by_session[session_id], dtype=np.int64), positions)
+            if len(remaining):
+                self._by_session[session_id] = array('q', remaining.tobytes())
+            else:
+                del self._by_session[session_id]
+        self._live -= len(positions)
+        self._generation += 1
+
+    def _existing(self, uid: str) -> int:
+        position = self._find(uid)
+        if position is None:
+            raise EntityNotFound(self.domain, uid)
+        return position
+
+    def create(self, item: Metric) -> Metric:
+        if self._find(item.uid.hex) is not None:
+            raise EntityAlreadyExists(self.domain, item.uid.hex)
+        self._append([item])
+        return item
+
+    def bulk_create(self, items: t.Sequence[Metric]) -> int:
+        seen: t.Set[str] = set()
+        for item in items:
+            if item.uid.hex in seen or self._find(item.uid.hex) is not None:
+                raise EntityAlreadyExists(self.domain, item.uid.hex)
+            seen.add(item.uid.hex)
+        if items:
+            self._append(items)
+        return len(items)
+
+    def update(self, item: Metric) -> Metric:
+        self._tombstone(np.array([self._existing(item.uid.hex)], dtype=np.int64))
+        self._append([item])
+        return item
+
+    def get(self, uid: str) -> Metric:
+        return self._load(np.array([self._existing(uid)], dtype=np.int64))[0]
+
+    def delete(self, uid: str) -> None:
+        self._tombstone(np.array([self._existing(uid)], dtype=np.int64))
+
+    def count(self) -> int:
+        return self._live
+
+    def truncate(self) -> None:
+        # Views handed out earlier keep their mapping of the removed files
+        shutil.rmtree(self.folder, ignore_errors=True)
+        self._open()
+        self._generation += 1
+
+    def flush(self) -> None:
+        """Write the segments back to disk, so that they survive the host crashing"""
+        for segment in self._segments:
+            segment.flush()
+
+    def batches(self) -> t.Iterator[MetricBatch]:
+        """Metrics of each segment, as views of the mapped files but for uids, which are decoded. Segments holding
+        deleted metrics are copied, without them."""
+        for segment in self._segments:
+            columns = segment.columns()
+            live = columns['live'].astype(bool)
+            if live.all():
+                yield self._batch_of(columns)
+            elif live.any():
+                yield self._batch_of({name: column[live] for name, column in columns.items()})
+
+    def list(self, page_info: PageableStatement | None = None) -> PaginatedResponse[t.List[Metric]]:
+        return self.get_all_of(page_info=page_info)
+
+    def stream(self, chunk_size: int = 1000) -> t.Iterator[Metric]:
+        return self.iter_all_of(chunk_size=chunk_size)
+
+    def get_all_of(
+        self, session_id: str | None = None, node_id: str | None = None, page_info: PageableStatement | None = None
+    ) -> PaginatedResponse[t.List[Metric]]:
+        positions = self._positions(session_id, node_id)
+        if page_info is None:
+            return PaginatedResponse(data=self._load(positions), page_no=None, next_page=None)
+        page = positions[page_info.offset : page_info.offset + page_info.page_size]
+        return page_info.build_response(data=self._load(page), elements_count=len(positions))
+
+    def iter_all_of(
+        self, session_id: str | None = None, node_id: str | None = None, chunk_size: int = 1000
+    ) -> t.Iterator[Metric]:
+        positions = self._positions(session_id, node_id)
+        for start in range(0, len(positions), chunk_size):
+            chunk = positions[start : start + chunk_size]
+            # Metrics deleted since the iteration started are skipped
+            yield from self._load(chunk[self._gather('live', chunk).astype(bool)])
+
+    def get_batch_of(self, session_id: str | None = None, node_id: str | None = None) -> MetricBatch:
+        return self._batch_at(self._positions(session_id, node_id))
+
+    def delete_chunk_of(self, session_id: str, chunk_size: int = 1000) -> int:
+        positions = self._positions(session_id)[:chunk_size]
+        self._tombstone(positions)
+        return len(positions)
+
+    def history_of(
+        self,
+        item_path: str,
+        variant: str,
+        node_id: str | None = None,
+        since: datetime.datetime | None = None,
+        until: datetime.datetime | None = None,
+    ) -> MetricBatch:
+        codes = {'item_path': item_path, 'variant': variant, **({} if node_id is None else {'node_id': node_id})}
+        wanted: t.Dict[str, int | None] = {name: self._strings.code_of(value) for name, value in codes.items()}
+        if None in wanted.values():
+            return MetricBatch.empty()
+        chunks = [_NO_POSITIONS]
+        for number, segment in enumerate(self._segments):
+            columns = segment.columns()
+            mask = columns['live'].astype(bool)
+            for name, code in wanted.items():
+                mask &= columns[name] == code
+            if since is not None:
+                mask &= columns['item_start_time'] >= _micros_of(since)
+            if until is not None:
+                mask &= columns['item_start_time'] <= _micros_of(until)
+            chunks.append(np.flatnonzero(mask).astype(np.int64) | (number << _ROW_BITS))
+        positions = np.concatenate(chunks)
+        order = np.lexsort((self._gather('uid', positions), self._gather('item_start_time', positions)))
+        return self._batch_at(positions[order])
+
+
+def _micros_of(value: datetime.datetime) -> int:
+    """Microseconds elapsed since the epoch, naive values being taken as UTC"""
+    return ((value if value.tzinfo else value.replace(tzinfo=datetime.UTC)) - _EPOCH) // _MICROSECOND
@@ -1,15 +1,44 @@
 import abc
+import itertools
+import time
 import typing as t
-from contextlib import suppress
+from contextlib import AbstractContextManager, nullcontext, suppress
 
-from monitor_server.domain.models.aggregates import ValidationSuite
+from sqlalchemy import select
+
+from monitor_server.domain.models.aggregates import ValidationSuite, ValidationSuiteFilter
+from monitor_server.domain.models.archives import ArchivedSession
+from monitor_server.domain.models.batches import MetricBatch
 from monitor_server.domain.models.machines import Machine
 from monitor_server.domain.models.metrics import Metric
+from monitor_server.domain.models.rollups import SessionRollups
 from monitor_server.domain.models.sessions import MonitorSession
+from monitor_server.domain.models.snapshots import SealedSession, decode_suite, encode_suite
+from monitor_server.infrastructure.orm.bloom import BloomFilter
+from monitor_server.infrastructure.orm.cache import CachingRepository, LRUCache
+from monitor_server.infrastructure.orm.config import CacheConfig
 from monitor_server.infrastructure.orm.engine import ORMEngine
+from monitor_server.infrastructure.orm.errors import ORMError
+from monitor_server.infrastructure.orm.pageable import PageableStatement
+from monitor_server.infrastructure.orm.presenter import presenter
+from monitor_server.infrastructure.orm.repositories import (
+    CRUDRepositoryABC,
+    DomainObject,
+    Model,
+    bulk_load,
+    unit_of_work,
+)
+from monitor_server.infrastructure.orm.truncation import TruncationReport, truncate_tables
+from monitor_server.infrastructure.persistence.archives import (
+    ArchiveInMemRepository,
+    ArchiveRepository,
+    ArchiveSQLRepository,
+    ColdArchive,
+)
 from monitor_server.infrastructure.persistence.exceptions import (
     EntityAlreadyExists,
     EntityNotFound,
+    EntitySealed,
     LinkedEntityMissing,
 )
 from monitor_server.infrastructure.persistence.machines import (
@@ -22,11 +51,49 @@ from monitor_server.infrastructure.persistence.metrics import (
     MetricRepository,
     MetricSQLRepository,
 )
+from monitor_server.infrastructure.persistence.models import (
+    ComponentRollup,
+    ExecutionContext,
+    SessionArchive,
+    SessionRollup,
+    SessionSnapshot,
+    TestMetric,
+)
+from monitor_server.infrastructure.persistence.models import Session as ORMSession
+from monitor_server.infrastructure.persistence.rollups import (
+    RollupInMemRepository,
+    RollupRepository,
+    RollupSQLRepository,
+)
 from monitor_server.infrastructure.persistence.sessions import (
     SessionInMemRepository,
     SessionRepository,
     SessionSQLRepository,
 )
+from monitor_server.infrastructure.persistence.snapshots import (
+    SnapshotInMemRepository,
+    SnapshotRepository,
+    SnapshotSQLRepository,
+)
+
+
+def _page_info_of(suite_filter: ValidationSuiteFilter) -> PageableStatement | None:
+    if not suite_filter.with_pagination:
+        return None
+    return PageableStatement(
+        page_no=suite_filter.page_no, page_size=suite_filter.page_size, approximate=suite_filter.approximate
+    )
+
+
+def _build_suite(session: MonitorSession, metrics: t.List[Metric], next_page: int | None) -> ValidationSuite:
+    return ValidationSuite(
+        uid=session.uid,
+        scm_revision=session.scm_revision,
+        tags=session.tags,
+        start_date=session.start_date,
+        metrics=metrics,
+        next_page=next_page,
+    )
 
 
 class MonitoringMetricsService(abc.ABC):
@@ -42,6 +109,18 @@ class MonitoringMetricsService(abc.ABC):
     def machine_repository(self) -> ExecutionContextRepository:
         """Direct access to the metric repository"""
 
+    @abc.abstractmethod
+    def rollup_repository(self) -> RollupRepository:
+        """Direct access to the rollup repository"""
+
+    @abc.abstractmethod
+    def snapshot_repository(self) -> SnapshotRepository:
+        """Direct access to the snapshots of sealed sessions"""
+
+    @abc.abstractmethod
+    def archive_repository(self) -> ArchiveRepository:
+        """Direct access to the tombstones of archived sessions"""
+
     @abc.abstractmethod
     def add_metrics(
         self, metrics: t.List[Metric], session: MonitorSession | None = None, machine: Machine | None = None
@@ -60,6 +139,16 @@ class MonitoringMetricsService(abc.ABC):
     def add_session(self, session: MonitorSession) -> MonitorSession:
         """Add a new monitoring session"""
 
+    @abc.abstractmethod
+    def bulk_add(
+        self,
+        machines: t.Sequence[Machine] = (),
+        sessions: t.Sequence[MonitorSession] = (),
+        metrics: t.Sequence[Metric] = (),
+    ) -> int:
+        """Load trusted records at once, in a single transaction where supported. Rollups are not maintained: they
+        are to be rebuilt once loading is over."""
+
     @abc.abstractmethod
     def get_metric(self, uid: str) -> Metric:
         """Fetch a metric by its uid"""
@@ -73,24 +162,58 @@ class MonitoringMetricsService(abc.ABC):
         """Fetch a machine given its uid"""
 
     @abc.abstractmethod
-    def truncate_all(self) -> None:
-        """Remove all data"""
+    def get_rollups(self, session_id: str) -> SessionRollups:
+        """Fetch the aggregates of a session and of its components, maintained as metrics are added. Metrics updated
+        or deleted through the metric repository are only accounted for once rollups are rebuilt."""
+
+    @abc.abstractmethod
+    def rebuild_rollups(self, session_id: str | None = None) -> int:
+        """Recompute the aggregates of a session, or of all sessions, from their metrics"""
+
+    @abc.abstractmethod
+    def seal_session(self, uid: str) -> SealedSession:
+        """Snapshot the whole validation suite of a session. Metrics can no longer be added to a sealed session and
+        its suite is read from the snapshot."""
+
+    @abc.abstractmethod
+    def unseal_session(self, uid: str) -> None:
+        """Drop the snapshot of a session so that metrics can be added to it again"""
+
+    @abc.abstractmethod
+    def archive_session(self, uid: str, chunk_size: int = 10000) -> ArchivedSession:
+        """Move the metrics of a session to the cold archive, chunk_size metrics per file. The session itself stays:
+        its suite is read from the archive and metrics can no longer be added to it. Archiving a session again
+        returns its existing tombstone."""
+
+    @abc.abstractmethod
+    def delete_session(self, uid: str) -> None:
+        """Remove a session along with its metrics, rollups, snapshot and archive. Metrics are removed in chunks of
+        1000 within the call: those of large sessions are better removed beforehand with
+        MetricRepository.delete_chunk_of, pausing between chunks."""
+
+    @abc.abstractmethod
+    def truncate_all(self) -> TruncationReport:
+        """Remove all data, reporting how it was cleared and how long it took"""
+
+    @abc.abstractmethod
+    def count_sessions(self, approximate: bool = False) -> int:
+        """Count the number of sessions. An estimate is returned if approximate is set."""
 
     @abc.abstractmethod
-    def count_sessions(self) -> int:
-        """Count the number of sessions"""
+    def count_metrics(self, approximate: bool = False) -> int:
+        """Count the number of metrics. An estimate is returned if approximate is set."""
 
     @abc.abstractmethod
-    def count_metrics(self) -> int:
-        """Count the number of metrics"""
+    def count_machines(self, approximate: bool = False) -> int:
+        """count the number of machines/execution contexts. An estimate is returned if approximate is set."""
 
     @abc.abstractmethod
-    def count_machines(self) -> int:
-        """count the number of machines/execution contexts"""
+    def get_test_suite(self, suite_filter: ValidationSuiteFilter) -> ValidationSuite:
+        """Get a session and the page of affiliated tests described by the filter"""
 
     @abc.abstractmethod
-    def get_test_suite(self, uid: str) -> ValidationSuite:
-        """Get a session and all affiliated tests"""
+    def iter_test_suite(self, uid: str, chunk_size: int = 1000) -> t.Iterator[ValidationSuite]:
+        """Lazily iterate over a session and its affiliated tests, chunk_size tests at a time"""
 
 
 class BaseMonitoringMetricsService(MonitoringMetricsService, abc.ABC):
@@ -99,20 +222,39 @@ class BaseMonitoringMetricsService(MonitoringMetricsService, abc.ABC):
         metric_repository: MetricRepository,
         session_repository: SessionRepository,
         execution_context_repository: ExecutionContextRepository,
+        rollup_repository: RollupRepository,
+        snapshot_repository: SnapshotRepository,
+        archive_repository: ArchiveRepository,
+        archive: ColdArchive | None = None,
     ) -> None:
         super().__init__()
         self._metric_repo = metric_repository
         self._session_repo = session_repository
         self._node_repo = execution_context_repository
+        self._rollup_repo = rollup_repository
+        self._snapshot_repo = snapshot_repository
+        self._archive_repo = archive_repository
+        self._archive = archive
+        # Suites of sealed sessions never change: they are decoded once and kept for paginated reads. Archived suites
+        # are read page by page instead, only loading the archive parts a page spans.
+        self._frozen_suites: LRUCache[str, ValidationSuite] = LRUCache(max_size=8)
+
+    def _unit_of_work(self) -> AbstractContextManager:
+        """Scope within which metrics and their rollups are written together"""
+        return nullcontext()
 
-    def count_sessions(self) -> int:
-        return self._session_repo.count()
+    def _bulk_load(self) -> AbstractContextManager:
+        """Scope within which bulk loads are written"""
+        return nullcontext()
 
-    def count_metrics(self) -> int:
-        return self._metric_repo.count()
+    def count_sessions(self, approximate: bool = False) -> int:
+        return self._session_repo.estimate_count() if approximate else self._session_repo.count()
 
-    def count_machines(self) -> int:
-        return self._node_repo.count()
+    def count_metrics(self, approximate: bool = False) -> int:
+        return self._metric_repo.estimate_count() if approximate else self._metric_repo.count()
+
+    def count_machines(self, approximate: bool = False) -> int:
+        return self._node_repo.estimate_count() if approximate else self._node_repo.count()
 
     def metric_repository(self) -> MetricRepository:
         return self._metric_repo
@@ -123,11 +265,30 @@ class BaseMonitoringMetricsService(MonitoringMetricsService, abc.ABC):
     def machine_repository(self) -> ExecutionContextRepository:
         return self._node_repo
 
+    def rollup_repository(self) -> RollupRepository:
+        return self._rollup_repo
+
+    def snapshot_repository(self) -> SnapshotRepository:
+        return self._snapshot_repo
+
+    def archive_repository(self) -> ArchiveRepository:
+        return self._archive_repo
+
+    def _check_not_sealed(self, metrics: t.Iterable[Metric]) -> None:
+        session_ids = {metric.session_id for metric in metrics}
+        sealed = self._snapshot_repo.sealed_among(session_ids) | self._archive_repo.archived_among(session_ids)
+        if sealed:
+            raise EntitySealed(MonitorSession, min(sealed))
+
     def add_machine(self, machine: Machine) -> Machine:
         return self._node_repo.create(machine)
 
     def add_metric(self, metric: Metric) -> Metric:
-        return self._metric_repo.create(metric)
+        self._check_not_sealed([metric])
+        with self._unit_of_work():
+            self._metric_repo.create(metric)
+            self._rollup_repo.add([metric])
+        return metric
 
     def add_session(self, session: MonitorSession) -> MonitorSession:
         return self._session_repo.create(session)
@@ -135,17 +296,30 @@ class BaseMonitoringMetricsService(MonitoringMetricsService, abc.ABC):
     def add_metrics(
         self, metrics: t.List[Metric], session: MonitorSession | None = None, machine: Machine | None = None
     ) -> int:
+        self._check_not_sealed(metrics)
         if session:
             with suppress(EntityAlreadyExists):
                 self._session_repo.create(session)
         if machine:
             with suppress(EntityAlreadyExists):
                 self._node_repo.create(machine)
-        count = 0
-        for metric in metrics:
-            self._metric_repo.create(metric)
-            count += 1
-        return count
+        with self._unit_of_work():
+            self._metric_repo.bulk_create(metrics)
+            self._rollup_repo.add(metrics)
+        return len(metrics)
+
+    def bulk_add(
+        self,
+        machines: t.Sequence[Machine] = (),
+        sessions: t.Sequence[MonitorSession] = (),
+        metrics: t.Sequence[Metric] = (),
+    ) -> int:
+        with self._bulk_load():
+            return (
+                self._node_repo.bulk_create(machines)
+                + self._session_repo.bulk_create(sessions)
+                + self._metric_repo.bulk_create(metrics)
+            )
 
     def get_metric(self, uid: str) -> Metric:
         return self._metric_repo.get(uid)
@@ -156,36 +330,210 @@ class BaseMonitoringMetricsService(MonitoringMetricsService, abc.ABC):
     def get_machine(self, uid: str) -> Machine:
         return self._node_repo.get(uid)
 
-    def get_test_suite(self, uid: str) -> ValidationSuite:
-        session = self._session_repo.get(uid)
-        metrics = self._metric_repo.get_all_of(session_id=uid)
-        return ValidationSuite(
-            uid=session.uid,
-            scm_revision=session.scm_revision,
-            tags=session.tags,
-            start_date=session.start_date,
-            metrics=metrics.data,
+    def get_rollups(self, session_id: str) -> SessionRollups:
+        return self._rollup_repo.get(session_id)
+
+    def rebuild_rollups(self, session_id: str | None = None) -> int:
+        return self._rollup_repo.rebuild(session_id)
+
+    def seal_session(self, uid: str) -> SealedSession:
+        # Metrics of an archived session are no longer stored: its suite is read back from the archive
+        suite_filter = ValidationSuiteFilter(session_id=uid)
+        suite = self._archived_suite(suite_filter) or self._build_test_suite(suite_filter)
+        payload = encode_suite(suite)
+        self._snapshot_repo.save(uid, len(suite.metrics), payload)
+        self._frozen_suites.put(uid, suite)
+        return SealedSession(session_id=uid, metrics=len(suite.metrics), size=len(payload))
+
+    def unseal_session(self, uid: str) -> None:
+        self._frozen_suites.invalidate(uid)
+        self._snapshot_repo.delete(uid)
+
+    def archive_session(self, uid: str, chunk_size: int = 10000) -> ArchivedSession:
+        if self._archive is None:
+            raise ORMError('No cold archive is configured')
+        location = self._archive.location_of(self._session_repo.get(uid))
+        archived = self._archive_repo.get(uid)
+        if archived is not None:
+            # Archived already: only rows an interrupted run left behind remain to be deleted
+            while self._metric_repo.delete_chunk_of(uid, chunk_size):
+                pass
+            return archived
+        # Leftovers of an interrupted run are overwritten
+        self._archive.remove(location)
+        metrics = 0
+        chunks = itertools.batched(self._metric_repo.iter_all_of(session_id=uid, chunk_size=chunk_size), chunk_size)
+        for part, chunk in enumerate(chunks):
+            self._archive.write(location, part, MetricBatch.from_metrics(chunk))
+            metrics += len(chunk)
+        # The tombstone goes first, so that readers switch to the archive before rows are deleted
+        self._archive_repo.save(uid, metrics, location)
+        self._frozen_suites.invalidate(uid)
+        while self._metric_repo.delete_chunk_of(uid, chunk_size):
+            pass
+        return ArchivedSession(session_id=uid, metrics=metrics, location=location)
+
+    def delete_session(self, uid: str) -> None:
+        # Rollups, snapshot and tombstone go along through ON DELETE CASCADE. Metrics are removed beforehand: a
+        # partitioned metric table has no foreign key to cascade from.
+        self._frozen_suites.invalidate(uid)
+        location = self._archive_repo.location_of(uid)
+        while self._metric_repo.delete_chunk_of(uid):
+            pass
+        self._session_repo.delete(uid)
+        if location is not None and self._archive is not None:
+            self._archive.remove(location)
+
+    def _sealed_suite(self, uid: str) -> ValidationSuite | None:
+        suite = self._frozen_suites.get(uid)
+        if suite is None:
+            snapshot = self._snapshot_repo.load(uid)
+            if snapshot is None:
+                return None
+            suite = decode_suite(snapshot.payload)
+            self._frozen_suites.put(uid, suite)
+        return suite
+
+    def _archived_suite(self, suite_filter: ValidationSuiteFilter) -> ValidationSuite | None:
+        """Read the requested page of an archived suite, only loading the archive parts it spans"""
+        uid = suite_filter.session_id
+        archived = self._archive_repo.get(uid)
+        if archived is None:
+            return None
+        if self._archive is None:
+            raise ORMError(f'Session "{uid}" is archived but no cold archive is configured')
+        page_info = _page_info_of(suite_filter)
+        if page_info is None:
+            return _build_suite(self._session_repo.get(uid), self._archive.read(archived.location), None)
+        metrics = self._archive.read(archived.location, page_info.offset, page_info.page_size)
+        next_page = page_info.page_no + 1 if page_info.offset + page_info.page_size < archived.metrics else None
+        return _build_suite(self._session_repo.get(uid), metrics, next_page)
+
+    def get_test_suite(self, suite_filter: ValidationSuiteFilter) -> ValidationSuite:
+        suite = self._sealed_suite(suite_filter.session_id)
+        if suite is None:
+            return self._archived_suite(suite_filter) or self._build_test_suite(suite_filter)
+        page_info = _page_info_of(suite_filter)
+        if page_info is None:
+            return suite.model_copy()
+        metrics = suite.metrics[page_info.offset : page_info.offset + page_info.page_size]
+        next_page = page_info.page_no + 1 if page_info.offset + page_info.page_size < len(suite.metrics) else None
+        return suite.model_copy(update={'metrics': metrics, 'next_page': next_page})
+
+    def _build_test_suite(self, suite_filter: ValidationSuiteFilter) -> ValidationSuite:
+        """Build a suite from the session and its stored metrics"""
+        session = self._session_repo.get(suite_filter.session_id)
+        metrics = self._metric_repo.get_all_of(
+            session_id=suite_filter.session_id, page_info=_page_info_of(suite_filter)
         )
+        return _build_suite(session, metrics.data, metrics.next_page)
+
+    def iter_test_suite(self, uid: str, chunk_size: int = 1000) -> t.Iterator[ValidationSuite]:
+        page_no: int | None = 0
+        while page_no is not None:
+            suite = self.get_test_suite(ValidationSuiteFilter(session_id=uid, page_no=page_no, page_size=chunk_size))
+            yield suite
+            page_no = suite.next_page
+
+
+def _cached(
+    repository: CRUDRepositoryABC[DomainObject, Model], config: CacheConfig
+) -> CRUDRepositoryABC[DomainObject, Model]:
+    if not config.enabled:
+        return repository
+    return CachingRepository(repository, LRUCache(max_size=config.max_size, ttl=config.ttl))
 
 
 class MonitoringMetricsSQLService(BaseMonitoringMetricsService):
-    def __init__(self, orm_engine: ORMEngine) -> None:
+    def __init__(self, orm_engine: ORMEngine, archive: ColdArchive | None = None) -> None:
         self._session = orm_engine.session
+        archive_config = orm_engine.config.archive
+        if archive is None and archive_config is not None:
+            archive = ColdArchive(archive_config.root)
+        uid_filter_config = orm_engine.config.uid_filter
+        self.uid_filter: BloomFilter | None = None
+        if uid_filter_config is not None:
+            self.uid_filter = BloomFilter(uid_filter_config.capacity, uid_filter_config.error_rate)
+        metric_repository = MetricSQLRepository(self._session, self.uid_filter)
+        if uid_filter_config is not None and uid_filter_config.warm_up:
+            metric_repository.warm_uid_filter()
+        # Sessions and machines are hardly ever modified once written while being read over and over: they can be
+        # cached, at the cost of seeing changes made by other processes late
         super().__init__(
-            MetricSQLRepository(self._session),
-            SessionSQLRepository(self._session),
-            ExecutionContextSQLRepository(self._session),
+            metric_repository,
+            _cached(SessionSQLRepository(self._session), orm_engine.config.cache),
+            _cached(ExecutionContextSQLRepository(self._session), orm_engine.config.cache),
+            RollupSQLRepository(self._session),
+            SnapshotSQLRepository(self._session),
+            ArchiveSQLRepository(self._session),
+            archive,
         )
 
-    def truncate_all(self) -> None:
-        self.machine_repository().truncate()
-        self.session_repository().truncate()
-        self.metric_repository().truncate()
+    def _unit_of_work(self) -> AbstractContextManager:
+        return unit_of_work(self._session)
+
+    def _bulk_load(self) -> AbstractContextManager:
+        return bulk_load(self._session)
+
+    def _build_test_suite(self, suite_filter: ValidationSuiteFilter) -> ValidationSuite:
+        # Session header and metrics come from a single query. One extra metric is fetched to know about next page.
+        stmt = (
+            select(ORMSession, TestMetric)
+            .outerjoin(TestMetric, TestMetric.sid == ORMSession.uid)
+            .where(ORMSession.uid == suite_filter.session_id)
+            .order_by(TestMetric.uid)
+        )
+        page_info = _page_info_of(suite_filter)
+        if page_info:
+            stmt = stmt.limit(page_info.page_size + 1).offset(page_info.offset)
+        rows = self._session.execute(stmt).all()
+        if not rows:
+            # Either the session does not exist (raises) or the page is out of bounds.
+            return _build_suite(self._session_repo.get(suite_filter.session_id), [], None)
+        session = presenter.from_orm(rows[0][0], as_=MonitorSession)
+        metrics = [presenter.from_orm(metric, as_=Metric) for _, metric in rows if metric is not None]
+        next_page = None
+        if page_info and len(metrics) > page_info.page_size:
+            metrics, next_page = metrics[: page_info.page_size], page_info.page_no + 1
+        return _build_suite(session, metrics, next_page)
+
+    def truncate_all(self) -> TruncationReport:
+        self._frozen_suites.clear()
+        if self._archive is not None:
+            self._archive.clear()
+        try:
+            # Referencing tables first, so that the chunked fallback never relies on cascades
+            return truncate_tables(
+                self._session,
+                [
+                    SessionArchive,
+                    SessionSnapshot,
+                    ComponentRollup,
+                    SessionRollup,
+                    TestMetric,
+                    ORMSession,
+                    ExecutionContext,
+                ],
+            )
+        finally:
+            for repository in (self._metric_repo, self._session_repo, self._node_repo):
+                repository.invalidate()
 
 
 class MonitoringMetricsInMemService(BaseMonitoringMetricsService):
-    def __init__(self) -> None:
-        super().__init__(MetricInMemRepository(), SessionInMemRepository(), ExecutionContextInMemRepository())
+    def __init__(self, archive: ColdArchive | None = None, metric_repository: MetricRepository | None = None) -> None:
+        # Metrics may be kept elsewhere, e.g. in a MetricSegmentRepository, the rest staying in memory
+        metric_repository = MetricInMemRepository() if metric_repository is None else metric_repository
+        archive_repository = ArchiveInMemRepository()
+        super().__init__(
+            metric_repository,
+            SessionInMemRepository(),
+            ExecutionContextInMemRepository(),
+            RollupInMemRepository(metric_repository, archive_repository),
+            SnapshotInMemRepository(),
+            archive_repository,
+            archive,
+        )
 
     def add_metric(self, metric: Metric) -> Metric:
         try:
@@ -199,24 +547,25 @@ class MonitoringMetricsInMemService(BaseMonitoringMetricsService):
             raise LinkedEntityMissing(  # noqa: B904
                 MonitorSession, e.entity_id, Metric, metric.uid.hex
             )
-        return self.metric_repository().create(metric)
+        self._check_not_sealed([metric])
+        self.metric_repository().create(metric)
+        self.rollup_repository().add([metric])
+        return metric
 
     def add_metrics(
         self, metrics: t.List[Metric], session: MonitorSession | None = None, machine: Machine | None = None
     ) -> int:
+        self._check_not_sealed(metrics)
         if session:
             with suppress(EntityAlreadyExists):
                 self.session_repository().create(session)
         if machine:
             with suppress(EntityAlreadyExists):
                 self.machine_repository().create(machine)
-        count = 0
         for metric in metrics:
             try:
                 self.session_repository().get(metric.session_id)
                 self.machine_repository().get(metric.node_id)
-                self.metric_repository().create(metric)
-                count += 1
             except EntityNotFound as e:
                 if e.entity_typename == Machine.entity_name():
                     raise LinkedEntityMissing(  # noqa: B904
@@ -225,9 +574,35 @@ class MonitoringMetricsInMemService(BaseMonitoringMetricsService):
                 raise LinkedEntityMissing(  # noqa: B904
                     MonitorSession, e.entity_id, Metric, metric.uid.hex
                 )
-        return count
-
-    def truncate_all(self) -> None:
+        # All or nothing, as within a transaction: metrics added before a failure are removed
+        added: t.List[Metric] = []
+        try:
+            for metric in metrics:
+                added.append(self.metric_repository().create(metric))
+        except ORMError:
+            for metric in added:
+                self.metric_repository().delete(metric.uid.hex)
+            raise
+        self.rollup_repository().add(added)
+        return len(added)
+
+    def delete_session(self, uid: str) -> None:
+        self.session_repository().get(uid)
+        super().delete_session(uid)
+        # No cascade in memory
+        self.rollup_repository().delete(uid)
+        self.snapshot_repository().delete(uid)
+        self.archive_repository().delete(uid)
+
+    def truncate_all(self) -> TruncationReport:
+        started = time.perf_counter()
+        self._frozen_suites.clear()
+        if self._archive is not None:
+            self._archive.clear()
+        self.archive_repository().truncate()
+        self.snapshot_repository().truncate()
+        self.rollup_repository().truncate()
         self.machine_repository().truncate()
         self.session_repository().truncate()
         self.metric_repository().truncate()
+        return TruncationReport(strategy='in_memory', duration=time.perf_counter() - started)
@@ -0,0 +1,477 @@
+import bisect
+import hashlib
+import heapq
+import itertools
+import typing as t
+from collections import defaultdict
+from contextlib import suppress
+from datetime import datetime
+from operator import attrgetter
+
+from monitor_server.domain.models.aggregates import ValidationSuite, ValidationSuiteFilter
+from monitor_server.domain.models.archives import ArchivedSession
+from monitor_server.domain.models.batches import MetricBatch
+from monitor_server.domain.models.machines import Machine
+from monitor_server.domain.models.metrics import Metric
+from monitor_server.domain.models.rollups import SessionRollups
+from monitor_server.domain.models.sessions import MonitorSession
+from monitor_server.domain.models.snapshots import SealedSession
+from monitor_server.infrastructure.orm.engine import ORMEngine
+from monitor_server.infrastructure.orm.pageable import PageableStatement, PaginatedResponse
+from monitor_server.infrastructure.orm.repositories import CRUDRepositoryABC, CRUDRepositoryBase, DomainObject, Model
+from monitor_server.infrastructure.orm.truncation import TruncationReport
+from monitor_server.infrastructure.persistence.archives import ArchiveRepository
+from monitor_server.infrastructure.persistence.exceptions import EntityAlreadyExists, EntityNotFound
+from monitor_server.infrastructure.persistence.machines import ExecutionContextRepository
+from monitor_server.infrastructure.persistence.metrics import MetricRepository
+from monitor_server.infrastructure.persistence.models import ExecutionContext, Session, TestMetric
+from monitor_server.infrastructure.persistence.rollups import RollupRepository
+from monitor_server.infrastructure.persistence.services import MonitoringMetricsService, MonitoringMetricsSQLService
+from monitor_server.infrastructure.persistence.sessions import SessionRepository
+from monitor_server.infrastructure.persistence.snapshots import Snapshot, SnapshotRepository
+
+Item = t.TypeVar('Item')
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """Consistent hashing of keys onto shards.
+
+    Each shard owns points_per_shard points of a ring of 64-bit hashes, a key going to the owner of the first point at
+    or after its own hash. Adding a shard only moves the keys landing on the points it takes over, about 1/N of them.
+    """
+
+    def __init__(self, shards: int, points_per_shard: int = 64) -> None:
+        if shards <= 0:
+            raise ValueError('A hash ring needs at least one shard')
+        self.shards = shards
+        points = sorted(
+            (_hash(f'{shard}:{point}'), shard) for shard in range(shards) for point in range(points_per_shard)
+        )
+        self._hashes = [point_hash for point_hash, _ in points]
+        self._owners = [shard for _, shard in points]
+
+    def shard_of(self, key: str) -> int:
+        index = bisect.bisect_left(self._hashes, _hash(key))
+        return self._owners[index % len(self._owners)]
+
+
+def _page_of(items: t.Iterator[Item], page_info: PageableStatement | None) -> PaginatedResponse[t.List[Item]]:
+    """Cut a page out of merged items. One extra item is read to know about the next page, no count is needed."""
+    if page_info is None:
+        return PaginatedResponse(data=list(items), page_no=None, next_page=None)
+    data = list(itertools.islice(items, page_info.offset, page_info.offset + page_info.page_size + 1))
+    next_page = page_info.page_no + 1 if len(data) > page_info.page_size else None
+    return PaginatedResponse(data=data[: page_info.page_size], page_no=page_info.page_no, next_page=next_page)
+
+
+def _by_uid(item: t.Any) -> str:
+    return item.uid.hex
+
+
+class ShardedRepository(CRUDRepositoryBase[DomainObject, Model]):
+    """Items spread over the repositories of several shards.
+
+    Reads of a single item go to its shard when its uid tells which one it is, to every shard in turn otherwise.
+    Listings merge the streams of all shards by uid: reaching page N reads the N previous pages of every shard.
+    """
+
+    def __init__(self, shards: t.Sequence[CRUDRepositoryABC[DomainObject, Model]], ring: HashRing) -> None:
+        super().__init__()
+        self.shards = list(shards)
+        self.ring = ring
+
+    def _shard_of(self, item: DomainObject) -> int:
+        """Index of the shard an item is written to"""
+        return self.ring.shard_of(item.uid.hex)
+
+    def _route(self, uid: str) -> int | None:
+        """Index of the shard holding the given uid, None when unknown"""
+        return self.ring.shard_of(uid)
+
+    @property
+    def generation(self) -> int:
+        return sum(shard.generation for shard in self.shards)
+
+    def invalidate(self) -> None:
+        for shard in self.shards:
+            shard.invalidate()
+
+    def create(self, item: DomainObject) -> DomainObject:
+        return self.shards[self._shard_of(item)].create(item)
+
+    def bulk_create(self, items: t.Sequence[DomainObject]) -> int:
+        groups: t.Dict[int, t.List[DomainObject]] = defaultdict(list)
+        for item in items:
+            groups[self._shard_of(item)].append(item)
+        return sum(self.shards[index].bulk_create(group) for index, group in groups.items())
+
+    def update(self, item: DomainObject) -> DomainObject:
+        return self.shards[self._shard_of(item)].update(item)
+
+    def _lookup(self, uid: str, action: t.Callable[[CRUDRepositoryABC[DomainObject, Model]], Item]) -> Item:
+        index = self._route(uid)
+        if index is not None:
+            return action(self.shards[index])
+        for shard in self.shards:
+            with suppress(EntityNotFound):
+                return action(shard)
+        raise EntityNotFound(self.domain, uid)
+
+    def get(self, uid: str) -> DomainObject:
+        return self._lookup(uid, lambda shard: shard.get(uid))
+
+    def delete(self, uid: str) -> None:
+        self._lookup(uid, lambda shard: shard.delete(uid))
+
+    def count(self) -> int:
+        return sum(shard.count() for shard in self.shards)
+
+    def estimate_count(self) -> int:
+        return sum(shard.estimate_count() for shard in self.shards)
+
+    def truncate(self) -> None:
+        for shard in self.shards:
+            shard.truncate()
+
+    def stream(self, chunk_size: int = 1000) -> t.Iterator[DomainObject]:
+        return heapq.merge(*(shard.stream(chunk_size) for shard in self.shards), key=_by_uid)
+
+    def list(self, page_info: PageableStatement | None = None) -> PaginatedResponse[t.List[DomainObject]]:
+        chunk_size = min(page_info.offset + page_info.page_size + 1, 1000) if page_info else 1000
+        return _page_of(self.stream(chunk_size), page_info)
+
+
+class ReplicatedRepository(CRUDRepositoryBase[DomainObject, Model]):
+    """Items copied to the repositories of all shards, so that each shard can check references locally. Reads go to
+    the first shard."""
+
+    def __init__(self, shards: t.Sequence[CRUDRepositoryABC[DomainObject, Model]]) -> None:
+        super().__init__()
+        self.shards = list(shards)
+
+    @property
+    def generation(self) -> int:
+        return sum(shard.generation for shard in self.shards)
+
+    def invalidate(self) -> None:
+        for shard in self.shards:
+            shard.invalidate()
+
+    def create(self, item: DomainObject) -> DomainObject:
+        # Shards missing the item, e.g. added since, are completed. It only exists when all shards have it.
+        existing = 0
+        for shard in self.shards:
+            try:
+                shard.create(item)
+            except EntityAlreadyExists:
+                existing += 1
+        if existing == len(self.shards):
+            raise EntityAlreadyExists(self.domain, item.uid.hex)
+        return item
+
+    def update(self, item: DomainObject) -> DomainObject:
+        for shard in self.shards:
+            shard.update(item)
+        return item
+
+    def get(self, uid: str) -> DomainObject:
+        return self.shards[0].get(uid)
+
+    def delete(self, uid: str) -> None:
+        for shard in self.shards:
+            shard.delete(uid)
+
+    def count(self) -> int:
+        return self.shards[0].count()
+
+    def estimate_count(self) -> int:
+        return self.shards[0].estimate_count()
+
+    def truncate(self) -> None:
+        for shard in self.shards:
+            shard.truncate()
+
+    def stream(self, chunk_size: int = 1000) -> t.Iterator[DomainObject]:
+        return self.shards[0].stream(chunk_size)
+
+    def list(self, page_info: PageableStatement | None = None) -> PaginatedResponse[t.List[DomainObject]]:
+        return self.shards[0].list(page_info)
+
+
+class ShardedSessionRepository(ShardedRepository[MonitorSession, Session]): ...
+
+
+class ReplicatedMachineRepository(ReplicatedRepository[Machine, ExecutionContext]): ...
+
+
+class ShardedMetricRepository(MetricRepository, ShardedRepository[Metric, TestMetric]):
+    """Metrics live on the shard of their session. Queries of a session go to its shard, others to all shards."""
+
+    shards: t.List[MetricRepository]  # type: ignore[assignment]
+
+    def _shard_of(self, item: Metric) -> int:
+        return self.ring.shard_of(item.session_id)
+
+    def _route(self, uid: str) -> int | None:
+        # A metric uid does not tell about its session
+        return None
+
+    def _of_session(self, session_id: str) -> MetricRepository:
+        return self.shards[self.ring.shard_of(session_id)]
+
+    def get_all_of(
+        self, session_id: str | None = None, node_id: str | None = None, page_info: PageableStatement | None = None
+    ) -> PaginatedResponse[t.List[Metric]]:
+        if session_id:
+            return self._of_session(session_id).get_all_of(session_id, node_id, page_info)
+        return _page_of(self.iter_all_of(node_id=node_id), page_info)
+
+    def iter_all_of(
+        self, session_id: str | None = None, node_id: str | None = None, chunk_size: int = 1000
+    ) -> t.Iterator[Metric]:
+        if session_id:
+            return self._of_session(session_id).iter_all_of(session_id, node_id, chunk_size)
+        return heapq.merge(*(shard.iter_all_of(None, node_id, chunk_size) for shard in self.shards), key=_by_uid)
+
+    def get_batch_of(self, session_id: str | None = None, node_id: str | None = None) -> MetricBatch:
+        if session_id:
+            return self._of_session(session_id).get_batch_of(session_id, node_id)
+        return MetricBatch.from_metrics(self.iter_all_of(node_id=node_id))
+
+    def delete_chunk_of(self, session_id: str, chunk_size: int = 1000) -> int:
+        return self._of_session(session_id).delete_chunk_of(session_id, chunk_size)
+
+    def history_of(
+        self,
+        item_path: str,
+        variant: str,
+        node_id: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> MetricBatch:
+        runs = (shard.history_of(item_path, variant, node_id, since, until).to_metrics() for shard in self.shards)
+        return MetricBatch.from_metrics(heapq.merge(*runs, key=attrgetter('item_start_time')))
+
+
+class _BySession:
+    def __init__(self, shards: t.Sequence[t.Any], ring: HashRing) -> None:
+        self.shards = list(shards)
+        self.ring = ring
+
+    def _of_session(self, session_id: str) -> t.Any:
+        return self.shards[self.ring.shard_of(session_id)]
+
+    def _grouped(self, session_ids: t.Iterable[str]) -> t.Dict[int, t.List[str]]:
+        groups: t.Dict[int, t.List[str]] = defaultdict(list)
+        for session_id in session_ids:
+            groups[self.ring.shard_of(session_id)].append(session_id)
+        return groups
+
+
+class ShardedRollupRepository(_BySession, RollupRepository):
+    def add(self, metrics: t.Sequence[Metric]) -> None:
+        groups: t.Dict[int, t.List[Metric]] = defaultdict(list)
+        for metric in metrics:
+            groups[self.ring.shard_of(metric.session_id)].append(metric)
+        for index, group in groups.items():
+            self.shards[index].add(group)
+
+    def get(self, session_id: str) -> SessionRollups:
+        return self._of_session(session_id).get(session_id)
+
+    def rebuild(self, session_id: str | None = None) -> int:
+        if session_id:
+            return self._of_session(session_id).rebuild(session_id)
+        return sum(shard.rebuild() for shard in self.shards)
+
+    def delete(self, session_id: str) -> None:
+        self._of_session(session_id).delete(session_id)
+
+    def truncate(self) -> None:
+        for shard in self.shards:
+            shard.truncate()
+
+
+class ShardedSnapshotRepository(_BySession, SnapshotRepository):
+    def save(self, session_id: str, metrics: int, payload: bytes) -> None:
+        self._of_session(session_id).save(session_id, metrics, payload)
+
+    def load(self, session_id: str) -> Snapshot | None:
+        return self._of_session(session_id).load(session_id)
+
+    def sealed_among(self, session_ids: t.Iterable[str]) -> t.Set[str]:
+        return set().union(*(self.shards[index].sealed_among(ids) for index, ids in self._grouped(session_ids).items()))
+
+    def delete(self, session_id: str) -> None:
+        self._of_session(session_id).delete(session_id)
+
+    def truncate(self) -> None:
+        for shard in self.shards:
+            shard.truncate()
+
+
+class ShardedArchiveRepository(_BySession, ArchiveRepository):
+    def save(self, session_id: str, metrics: int, location: str) -> None:
+        self._of_session(session_id).save(session_id, metrics, location)
+
+    def get(self, session_id: str) -> ArchivedSession | None:
+        return self._of_session(session_id).get(session_id)
+
+    def location_of(self, session_id: str) -> str | None:
+        return self._of_session(session_id).location_of(session_id)
+
+    def archived_among(self, session_ids: t.Iterable[str]) -> t.Set[str]:
+        return set().union(
+            *(self.shards[index].archived_among(ids) for index, ids in self._grouped(session_ids).items())
+        )
+
+    def delete(self, session_id: str) -> None:
+        self._of_session(session_id).delete(session_id)
+
+    def truncate(self) -> None:
+        for shard in self.shards:
+            shard.truncate()
+
+
+class ShardedMonitoringMetricsService(MonitoringMetricsService):
+    """Sessions spread over several services by consistent hash of their uid, metrics following their session.
+
+    Machines are copied to every shard, so that each shard keeps checking the references of its metrics. Anything
+    about a single session is handled by its shard alone, with that shard's transactions, cascades and caches.
+    Counts and listings are gathered from all shards. Writes spanning several shards are not atomic.
+    """
+
+    def __init__(self, shards: t.Sequence[MonitoringMetricsService], points_per_shard: int = 64) -> None:
+        super().__init__()
+        self.shards = list(shards)
+        self.ring = HashRing(len(self.shards), points_per_shard)
+        self._metric_repo = ShardedMetricRepository([shard.metric_repository() for shard in self.shards], self.ring)
+        self._session_repo = ShardedSessionRepository([shard.session_repository() for shard in self.shards], self.ring)
+        self._node_repo = ReplicatedMachineRepository([shard.machine_repository() for shard in self.shards])
+        self._rollup_repo = ShardedRollupRepository([shard.rollup_repository() for shard in self.shards], self.ring)
+        self._snapshot_repo = ShardedSnapshotRepository(
+            [shard.snapshot_repository() for shard in self.shards], self.ring
+        )
+        self._archive_repo = ShardedArchiveRepository([shard.archive_repository() for shard in self.shards], self.ring)
+
+    @classmethod
+    def of_engines(
+        cls, orm_engines: t.Sequence[ORMEngine], points_per_shard: int = 64
+    ) -> 'ShardedMonitoringMetricsService':
+        return cls([MonitoringMetricsSQLService(orm_engine) for orm_engine in orm_engines], points_per_shard)
+
+    def shard_of(self, session_id: str) -> MonitoringMetricsService:
+        return self.shards[self.ring.shard_of(session_id)]
+
+    def metric_repository(self) -> MetricRepository:
+        return self._metric_repo
+
+    def session_repository(self) -> SessionRepository:
+        return self._session_repo
+
+    def machine_repository(self) -> ExecutionContextRepository:
+        return self._node_repo
+
+    def rollup_repository(self) -> RollupRepository:
+        return self._rollup_repo
+
+    def snapshot_repository(self) -> SnapshotRepository:
+        return self._snapshot_repo
+
+    def archive_repository(self) -> ArchiveRepository:
+        return self._archive_repo
+
+    def _grouped(self, metrics: t.Iterable[Metric]) -> t.Dict[int, t.List[Metric]]:
+        groups: t.Dict[int, t.List[Metric]] = defaultdict(list)
+        for metric in metrics:
+            groups[self.ring.shard_of(metric.session_id)].append(metric)
+        return groups
+
+    def add_machine(self, machine: Machine) -> Machine:
+        return self._node_repo.create(machine)
+
+    def add_session(self, session: MonitorSession) -> MonitorSession:
+        return self.shard_of(session.uid.hex).add_session(session)
+
+    def add_metric(self, metric: Metric) -> Metric:
+        return self.shard_of(metric.session_id).add_metric(metric)
+
+    def add_metrics(
+        self, metrics: t.List[Metric], session: MonitorSession | None = None, machine: Machine | None = None
+    ) -> int:
+        if machine:
+            with suppress(EntityAlreadyExists):
+                self.add_machine(machine)
+        if session:
+            with suppress(EntityAlreadyExists):
+                self.add_session(session)
+        return sum(self.shards[index].add_metrics(group) for index, group in self._grouped(metrics).items())
+
+    def bulk_add(
+        self,
+        machines: t.Sequence[Machine] = (),
+        sessions: t.Sequence[MonitorSession] = (),
+        metrics: t.Sequence[Metric] = (),
+    ) -> int:
+        sessions_of: t.Dict[int, t.List[MonitorSession]] = defaultdict(list)
+        for session in sessions:
+            sessions_of[self.ring.shard_of(session.uid.hex)].append(session)
+        metrics_of = self._grouped(metrics)
+        added = sum(
+            shard.bulk_add(machines, sessions_of.get(index, []), metrics_of.get(index, []))
+            for index, shard in enumerate(self.shards)
+        )
+        # Machines were loaded once per shard
+        return added - len(machines) * (len(self.shards) - 1)
+
+    def get_metric(self, uid: str) -> Metric:
+        return self._metric_repo.get(uid)
+
+    def get_session(self, uid: str) -> MonitorSession:
+        return self.shard_of(uid).get_session(uid)
+
+    def get_machine(self, uid: str) -> Machine:
+        return self._node_repo.get(uid)
+
+    def get_rollups(self, session_id: str) -> SessionRollups:
+        return self.shard_of(session_id).get_rollups(session_id)
+
+    def rebuild_rollups(self, session_id: str | None = None) -> int:
+        if session_id:
+            return self.shard_of(session_id).rebuild_rollups(session_id)
+        return sum(shard.rebuild_rollups() for shard in self.shards)
+
+    def seal_session(self, uid: str) -> SealedSession:
+        return self.shard_of(uid).seal_session(uid)
+
+    def unseal_session(self, uid: str) -> None:
+        self.shard_of(uid).unseal_session(uid)
+
+    def archive_session(self, uid: str, chunk_size: int = 10000) -> ArchivedSession:
+        return self.shard_of(uid).archive_session(uid, chunk_size)
+
+    def delete_session(self, uid: str) -> None:
+        self.shard_of(uid).delete_session(uid)
+
+    def truncate_all(self) -> TruncationReport:
+        reports = [shard.truncate_all() for shard in self.shards]
+        return reports[0].model_copy(update={'duration': sum(report.duration for report in reports)})
+
+    def count_sessions(self, approximate: bool = False) -> int:
+        return sum(shard.count_sessions(approximate) for shard in self.shards)
+
+    def count_metrics(self, approximate: bool = False) -> int:
+        return sum(shard.count_metrics(approximate) for shard in self.shards)
+
+    def count_machines(self, approximate: bool = False) -> int:
+        return self.shards[0].count_machines(approximate)
+
+    def get_test_suite(self, suite_filter: ValidationSuiteFilter) -> ValidationSuite:
+        return self.shard_of(suite_filter.session_id).get_test_suite(suite_filter)
+
+    def iter_test_suite(self, uid: str, chunk_size: int = 1000) -> t.Iterator[ValidationSuite]:
+        return self.shard_of(uid).iter_test_suite(uid, chunk_size)
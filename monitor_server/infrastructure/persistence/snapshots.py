@@ -0,0 +1,95 @@
+import abc
+import typing as t
+from datetime import UTC, datetime
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import delete, insert, select
+
+from monitor_server.infrastructure.orm.errors import ORMError
+from monitor_server.infrastructure.orm.repositories import unit_of_work
+from monitor_server.infrastructure.persistence.models import SessionSnapshot
+
+
+class Snapshot(t.NamedTuple):
+    metrics: int
+    payload: bytes
+
+
+class SnapshotRepository(abc.ABC):
+    @abc.abstractmethod
+    def save(self, session_id: str, metrics: int, payload: bytes) -> None:
+        """Store the snapshot of a session, replacing any previous one"""
+
+    @abc.abstractmethod
+    def load(self, session_id: str) -> Snapshot | None:
+        """Get the snapshot of a session along with its number of metrics, None if the session is not sealed"""
+
+    @abc.abstractmethod
+    def sealed_among(self, session_ids: t.Iterable[str]) -> t.Set[str]:
+        """Get the sessions having a snapshot among the given ones"""
+
+    @abc.abstractmethod
+    def delete(self, session_id: str) -> None:
+        """Remove the snapshot of a session, if any"""
+
+    @abc.abstractmethod
+    def truncate(self) -> None:
+        """Remove all snapshots"""
+
+
+class SnapshotSQLRepository(SnapshotRepository):
+    def __init__(self, session: Session) -> None:
+        self.session = session
+
+    def save(self, session_id: str, metrics: int, payload: bytes) -> None:
+        try:
+            with unit_of_work(self.session):
+                self.session.execute(delete(SessionSnapshot).where(SessionSnapshot.sid == session_id))
+                self.session.execute(
+                    insert(SessionSnapshot).values(
+                        sid=session_id, sealed_at=datetime.now(tz=UTC), metrics=metrics, payload=payload
+                    )
+                )
+        except SQLAlchemyError as e:
+            raise ORMError(str(e)) from e
+
+    def load(self, session_id: str) -> Snapshot | None:
+        stmt = select(SessionSnapshot.metrics, SessionSnapshot.payload).where(SessionSnapshot.sid == session_id)
+        row = self.session.execute(stmt).first()
+        return None if row is None else Snapshot(metrics=row.metrics, payload=row.payload)
+
+    def sealed_among(self, session_ids: t.Iterable[str]) -> t.Set[str]:
+        session_ids = set(session_ids)
+        if not session_ids:
+            return set()
+        stmt = select(SessionSnapshot.sid).where(SessionSnapshot.sid.in_(session_ids))
+        return set(self.session.execute(stmt).scalars())
+
+    def delete(self, session_id: str) -> None:
+        with unit_of_work(self.session):
+            self.session.execute(delete(SessionSnapshot).where(SessionSnapshot.sid == session_id))
+
+    def truncate(self) -> None:
+        with unit_of_work(self.session):
+            self.session.execute(delete(SessionSnapshot))
+
+
+class SnapshotInMemRepository(SnapshotRepository):
+    def __init__(self) -> None:
+        self._snapshots: t.Dict[str, Snapshot] = {}
+
+    def save(self, session_id: str, metrics: int, payload: bytes) -> None:
+        self._snapshots[session_id] = Snapshot(metrics=metrics, payload=payload)
+
+    def load(self, session_id: str) -> Snapshot | None:
+        return self._snapshots.get(session_id)
+
+    def sealed_among(self, session_ids: t.Iterable[str]) -> t.Set[str]:
+        return {session_id for session_id in session_ids if session_id in self._snapshots}
+
+    def delete(self, session_id: str) -> None:
+        self._snapshots.pop(session_id, None)
+
+    def truncate(self) -> None:
+        self._snapshots = {}
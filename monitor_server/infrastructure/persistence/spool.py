@@ -0,0 +1,277 @@
+import json
+import os
+import pathlib
+import threading
+import time
+import typing as t
+from contextlib import suppress
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+
+from monitor_server.domain.models.machines import Machine
+from monitor_server.domain.models.metrics import Metric
+from monitor_server.domain.models.sessions import MonitorSession
+from monitor_server.infrastructure.orm.errors import ORMError
+from monitor_server.infrastructure.persistence.exceptions import EntityAlreadyExists, EntitySealed, LinkedEntityMissing
+from monitor_server.infrastructure.persistence.services import MonitoringMetricsService
+
+CHECKPOINT = 'checkpoint.json'
+REJECTED = 'rejected.ndjson'
+
+
+class SpooledBatch(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    metrics: t.List[Metric] = Field(default_factory=list)
+    session: MonitorSession | None = None
+    machine: Machine | None = None
+
+
+class SpoolPosition(t.NamedTuple):
+    file: int
+    offset: int
+
+
+class SpoolChunk(t.NamedTuple):
+    batches: t.List[SpooledBatch]
+    unreadable: t.List[str]
+    end: SpoolPosition
+
+
+class IngestionSpool:
+    """Durable log of metric batches waiting to be written to the repositories.
+
+    Batches are appended as NDJSON lines to numbered files, each append reaching the disk before it returns when sync
+    is set. A checkpoint records up to where batches were replayed; files entirely replayed are removed. A line cut
+    short by a crash was never acknowledged: it is dropped when the spool is opened.
+    """
+
+    def __init__(self, folder: pathlib.Path, sync: bool = True, max_file_size: int = 64 * 1024 * 1024) -> None:
+        self.folder = folder
+        self.sync = sync
+        self.max_file_size = max_file_size
+        self._lock = threading.Lock()
+        folder.mkdir(parents=True, exist_ok=True)
+        files = self._files()
+        self._current = files[-1] if files else self.checkpoint().file
+        if files:
+            path = self._path(self._current)
+            content = path.read_bytes()
+            complete = content.rfind(b'\n') + 1
+            if complete != len(content):
+                with path.open('r+b') as file:
+                    file.truncate(complete)
+
+    def _path(self, number: int) -> pathlib.Path:
+        return self.folder / f'spool-{number:08d}.ndjson'
+
+    def _files(self) -> t.List[int]:
+        return sorted(int(path.stem.split('-')[1]) for path in self.folder.glob('spool-*.ndjson'))
+
+    def _write(self, path: pathlib.Path, content: bytes, mode: str = 'ab') -> None:
+        created = not path.exists()
+        with path.open(mode) as file:
+            file.write(content)
+            file.flush()
+            if self.sync:
+                os.fsync(file.fileno())
+        if created and self.sync:
+            # The entry of a new file has to reach the disk too
+            descriptor = os.open(self.folder, os.O_RDONLY)
+            try:
+                os.fsync(descriptor)
+            finally:
+                os.close(descriptor)
+
+    def append(
+        self, metrics: t.Sequence[Metric], session: MonitorSession | None = None, machine: Machine | None = None
+    ) -> int:
+        """Spool a batch of metrics, with the session and machine they belong to if given. Returns the number of
+        metrics spooled."""
+        line = SpooledBatch(metrics=list(metrics), session=session, machine=machine).model_dump_json().encode()
+        with self._lock:
+            path = self._path(self._current)
+            if path.exists() and path.stat().st_size >= self.max_file_size:
+                self._current += 1
+                path = self._path(self._current)
+            self._write(path, line + b'\n')
+        return len(metrics)
+
+    def checkpoint(self) -> SpoolPosition:
+        """Position following the last batch replayed"""
+        path = self.folder / CHECKPOINT
+        if path.exists():
+            return SpoolPosition(*json.loads(path.read_text()))
+        files = self._files()
+        return SpoolPosition(files[0] if files else 0, 0)
+
+    @property
+    def backlog(self) -> int:
+        """Number of spooled bytes not replayed yet"""
+        position = self.checkpoint()
+        sizes = [self._path(number).stat().st_size for number in self._files() if number >= position.file]
+        return sum(sizes) - (position.offset if sizes else 0)
+
+    def read(self, max_metrics: int) -> SpoolChunk:
+        """Batches following the checkpoint, holding max_metrics metrics at most unless the first one holds more"""
+        position = self.checkpoint()
+        batches: t.List[SpooledBatch] = []
+        unreadable: t.List[str] = []
+        count = 0
+        for number in (number for number in self._files() if number >= position.file):
+            offset = position.offset if number == position.file else 0
+            with self._path(number).open('rb') as file:
+                file.seek(offset)
+                for line in file:
+                    # The end of a line is written last: a line without it is still being appended
+                    if not line.endswith(b'\n'):
+                        break
+                    try:
+                        batch = SpooledBatch.model_validate_json(line)
+                    except ValidationError:
+                        unreadable.append(line.decode(errors='replace').rstrip('\n'))
+                    else:
+                        if batches and count + len(batch.metrics) > max_metrics:
+                            return SpoolChunk(batches, unreadable, SpoolPosition(number, offset))
+                        batches.append(batch)
+                        count += len(batch.metrics)
+                    offset += len(line)
+            position = SpoolPosition(number, offset)
+        return SpoolChunk(batches, unreadable, position)
+
+    def acknowledge(self, position: SpoolPosition) -> None:
+        """Record that all batches before the given position were replayed"""
+        if position == self.checkpoint():
+            return
+        staging = self.folder / f'{CHECKPOINT}.tmp'
+        self._write(staging, json.dumps(list(position)).encode(), mode='wb')
+        staging.replace(self.folder / CHECKPOINT)
+        for number in self._files():
+            if number < position.file:
+                self._path(number).unlink()
+
+    def reject(self, records: t.Iterable[t.Tuple[str, str]]) -> None:
+        """Set aside records which cannot be replayed, along with the reason why"""
+        lines = [json.dumps({'reason': reason, 'record': record}) + '\n' for reason, record in records]
+        if lines:
+            self._write(self.folder / REJECTED, ''.join(lines).encode())
+
+
+class ReplayReport(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    batches: int = Field(default=0, description='Spooled batches replayed.')
+    added: int = Field(default=0, description='Metrics written to the repositories.')
+    duplicates: int = Field(default=0, description='Metrics spooled twice or already written by an earlier replay.')
+    rejected: int = Field(default=0, description='Records set aside, the service refusing them.')
+    error: str | None = Field(default=None, description='Why replaying stopped before the spool was drained.')
+    duration: float = Field(default=0.0, ge=0, description='Seconds.')
+
+
+class SpoolReplayer:
+    """Drains a spool into a service chunk by chunk, on demand or from a background thread.
+
+    A chunk is acknowledged once written: should the process die in between, it is replayed and metrics already written
+    are told apart by uid. Metrics the service refuses for good (unknown session or machine, sealed session) are set
+    aside in the rejected file of the spool rather than blocking it. Any other error, e.g. the database being
+    unavailable, stops the drain: the chunk is tried again later, waiting twice as long after each failure.
+
+    The service is only used by the replaying thread and should not be shared with request handlers.
+    """
+
+    def __init__(
+        self,
+        spool: IngestionSpool,
+        service: MonitoringMetricsService,
+        chunk_size: int = 5000,
+        interval: float = 1.0,
+        max_backoff: float = 60.0,
+        on_report: t.Callable[[ReplayReport], None] | None = None,
+    ) -> None:
+        self.spool = spool
+        self.chunk_size = chunk_size
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self._service = service
+        self._on_report = on_report
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _replay(self, batches: t.Sequence[SpooledBatch]) -> t.Tuple[int, int, t.List[t.Tuple[str, str]]]:
+        for session in {batch.session.uid: batch.session for batch in batches if batch.session}.values():
+            with suppress(EntityAlreadyExists):
+                self._service.add_session(session)
+        for machine in {batch.machine.uid: batch.machine for batch in batches if batch.machine}.values():
+            with suppress(EntityAlreadyExists):
+                self._service.add_machine(machine)
+        metrics: t.Dict[str, Metric] = {}
+        for metric in (metric for batch in batches for metric in batch.metrics):
+            metrics.setdefault(metric.uid.hex, metric)
+        duplicates = sum(len(batch.metrics) for batch in batches) - len(metrics)
+        with suppress(EntityAlreadyExists, LinkedEntityMissing, EntitySealed):
+            return self._service.add_metrics(list(metrics.values())), duplicates, []
+        # Some metrics cannot be written: one by one, to tell which
+        added, rejected = 0, []
+        for metric in metrics.values():
+            try:
+                self._service.add_metric(metric)
+                added += 1
+            except EntityAlreadyExists:
+                duplicates += 1
+            except (LinkedEntityMissing, EntitySealed) as e:
+                rejected.append((str(e), metric.model_dump_json()))
+        return added, duplicates, rejected
+
+    def drain(self) -> ReplayReport:
+        """Replay spooled batches until the spool is empty, the replayer is stopped or the service fails"""
+        started = time.perf_counter()
+        batches = added = duplicates = rejected = 0
+        error = None
+        while not self._stopped.is_set():
+            chunk = self.spool.read(self.chunk_size)
+            if not chunk.batches and not chunk.unreadable:
+                self.spool.acknowledge(chunk.end)
+                break
+            try:
+                chunk_added, chunk_duplicates, chunk_rejected = self._replay(chunk.batches)
+            except (ORMError, SQLAlchemyError) as e:
+                error = str(e)
+                break
+            self.spool.reject([*chunk_rejected, *(('unreadable', line) for line in chunk.unreadable)])
+            self.spool.acknowledge(chunk.end)
+            batches += len(chunk.batches)
+            added += chunk_added
+            duplicates += chunk_duplicates
+            rejected += len(chunk_rejected) + len(chunk.unreadable)
+        return ReplayReport(
+            batches=batches,
+            added=added,
+            duplicates=duplicates,
+            rejected=rejected,
+            error=error,
+            duration=time.perf_counter() - started,
+        )
+
+    def _run(self) -> None:
+        delay = self.interval
+        while not self._stopped.wait(delay):
+            report = self.drain()
+            delay = self.interval if report.error is None else min(max(delay, self.interval) * 2, self.max_backoff)
+            if self._on_report:
+                self._on_report(report)
+
+    def start(self) -> None:
+        """Drain the spool every interval seconds from a background thread"""
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='spool-replayer', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop the background thread once the chunk being replayed, if any, is written"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
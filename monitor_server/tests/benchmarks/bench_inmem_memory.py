@@ -0,0 +1,68 @@
+"""Memory footprint of the in-memory metric repository.
+
+Run with ``python -m monitor_server.tests.benchmarks.bench_inmem_memory [--sizes 10000,100000,1000000]``.
+Compares the bytes used per metric when rows are kept as ORM instances (the former layout) with the compact rows
+now stored by the repository.
+"""
+
+import argparse
+import datetime
+import gc
+import tracemalloc
+import typing as t
+
+from monitor_server.domain.models.metrics import Metric
+from monitor_server.infrastructure.orm.presenter import presenter
+from monitor_server.infrastructure.persistence.metrics import MetricInMemRepository
+from monitor_server.infrastructure.persistence.models import TestMetric
+from monitor_server.tests.sdk.persistence.generators import MachineGenerator, MetricGenerator, MonitorSessionGenerator
+
+SESSIONS = 100
+MACHINES = 10
+START_DATE = datetime.datetime(2024, 1, 1, tzinfo=datetime.UTC)
+
+
+def metrics(size: int) -> t.Iterator[Metric]:
+    sessions = [MonitorSessionGenerator()().uid.hex for _ in range(SESSIONS)]
+    machines = [MachineGenerator()().uid.hex for _ in range(MACHINES)]
+    generator = MetricGenerator(
+        START_DATE, lambda step: sessions[step % SESSIONS], lambda step: machines[step % MACHINES]
+    )
+    for _ in range(size):
+        yield generator()
+
+
+def measure(fill: t.Callable[[Metric], t.Any], size: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    for metric in metrics(size):
+        fill(metric)
+    gc.collect()
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (end - start) / size
+
+
+def run(size: int) -> None:
+    orm_rows: t.Dict[str, TestMetric] = {}
+    orm_bytes = measure(lambda metric: orm_rows.__setitem__(metric.uid.hex, presenter.to_orm(metric, TestMetric)), size)
+    orm_rows.clear()
+    repository = MetricInMemRepository()
+    compact_bytes = measure(repository.create, size)
+    print(
+        f'{size:>9} metrics | orm instances {orm_bytes:8.1f} B/metric | compact rows {compact_bytes:8.1f} B/metric'
+        f' | saved {1 - compact_bytes / orm_bytes:6.1%}'
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='Comma separated numbers of metrics to store')
+    args = parser.parse_args()
+    for size in (int(value) for value in args.sizes.split(',')):
+        run(size)
+
+
+if __name__ == '__main__':
+    main()
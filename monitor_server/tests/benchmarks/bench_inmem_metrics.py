@@ -0,0 +1,64 @@
+"""Scaling benchmark of the in-memory metric repository.
+
+Run with ``python -m monitor_server.tests.benchmarks.bench_inmem_metrics [--sizes 10000,100000,1000000]``.
+Query times are expected to stay flat as the number of stored metrics grows.
+"""
+
+import argparse
+import datetime
+import time
+import typing as t
+
+from monitor_server.infrastructure.orm.pageable import PageableStatement
+from monitor_server.infrastructure.persistence.metrics import MetricInMemRepository
+from monitor_server.tests.sdk.persistence.generators import MachineGenerator, MetricGenerator, MonitorSessionGenerator
+
+SESSIONS = 100
+MACHINES = 10
+START_DATE = datetime.datetime(2024, 1, 1, tzinfo=datetime.UTC)
+QUERIES = 200
+
+
+def populate(size: int) -> t.Tuple[MetricInMemRepository, t.List[str], t.List[str]]:
+    sessions = [MonitorSessionGenerator()().uid.hex for _ in range(SESSIONS)]
+    machines = [MachineGenerator()().uid.hex for _ in range(MACHINES)]
+    generator = MetricGenerator(
+        START_DATE, lambda step: sessions[step % SESSIONS], lambda step: machines[step % MACHINES]
+    )
+    repository = MetricInMemRepository()
+    for _ in range(size):
+        repository.create(generator())
+    return repository, sessions, machines
+
+
+def timed(callable_: t.Callable[[], t.Any], count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        callable_()
+    return (time.perf_counter() - start) / count
+
+
+def run(size: int) -> None:
+    start = time.perf_counter()
+    repository, sessions, machines = populate(size)
+    insert_time = time.perf_counter() - start
+    page = PageableStatement(page_no=1, page_size=50)
+    by_session = timed(lambda: repository.get_all_of(session_id=sessions[7], page_info=page), QUERIES)
+    by_node = timed(lambda: repository.get_all_of(node_id=machines[3], page_info=page), QUERIES)
+    by_both = timed(lambda: repository.get_all_of(session_id=sessions[7], node_id=machines[7], page_info=page), QUERIES)
+    print(
+        f'{size:>9} metrics | insert {insert_time / size * 1e6:8.2f} us/metric'
+        f' | session {by_session * 1e6:9.1f} us | node {by_node * 1e6:9.1f} us | both {by_both * 1e6:9.1f} us'
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='Comma separated numbers of metrics to store')
+    args = parser.parse_args()
+    for size in (int(value) for value in args.sizes.split(',')):
+        run(size)
+
+
+if __name__ == '__main__':
+    main()
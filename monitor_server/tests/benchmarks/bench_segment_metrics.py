@@ -0,0 +1,75 @@
+"""Benchmark of the memory-mapped segment store against the in-memory metric repository.
+
+Run with ``python -m monitor_server.tests.benchmarks.bench_segment_metrics [--sizes 100000,1000000] [--folder /tmp]``.
+Analytics sum the wall time of all metrics: straight out of the mapped segments for the segment store.
+"""
+
+import argparse
+import datetime
+import pathlib
+import tempfile
+import time
+import typing as t
+
+from monitor_server.infrastructure.orm.pageable import PageableStatement
+from monitor_server.infrastructure.persistence.metrics import MetricInMemRepository, MetricRepository
+from monitor_server.infrastructure.persistence.segments import MetricSegmentRepository
+from monitor_server.tests.sdk.persistence.generators import MachineGenerator, MetricGenerator, MonitorSessionGenerator
+
+SESSIONS = 100
+MACHINES = 10
+BATCH = 1000
+START_DATE = datetime.datetime(2024, 1, 1, tzinfo=datetime.UTC)
+QUERIES = 100
+
+
+def populate(repository: MetricRepository, size: int) -> t.List[str]:
+    sessions = [MonitorSessionGenerator()().uid.hex for _ in range(SESSIONS)]
+    machines = [MachineGenerator()().uid.hex for _ in range(MACHINES)]
+    generator = MetricGenerator(
+        START_DATE, lambda step: sessions[step % SESSIONS], lambda step: machines[step % MACHINES]
+    )
+    for offset in range(0, size, BATCH):
+        repository.bulk_create([generator() for _ in range(min(BATCH, size - offset))])
+    return sessions
+
+
+def timed(callable_: t.Callable[[], t.Any], count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        callable_()
+    return (time.perf_counter() - start) / count
+
+
+def total_wall_time(repository: MetricRepository) -> float:
+    if isinstance(repository, MetricSegmentRepository):
+        return sum(float(batch.wall_time.sum()) for batch in repository.batches())
+    return float(repository.get_batch_of().wall_time.sum())
+
+
+def run(name: str, repository: MetricRepository, size: int) -> None:
+    start = time.perf_counter()
+    sessions = populate(repository, size)
+    insert_time = time.perf_counter() - start
+    page = PageableStatement(page_no=1, page_size=50)
+    by_session = timed(lambda: repository.get_all_of(session_id=sessions[7], page_info=page), QUERIES)
+    analytics = timed(lambda: total_wall_time(repository), 3)
+    print(
+        f'{name:>8} | {size:>8} metrics | insert {insert_time / size * 1e6:8.2f} us/metric'
+        f' | session page {by_session * 1e6:9.1f} us | wall time sum {analytics * 1e3:9.1f} ms'
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='100000,1000000', help='Comma separated numbers of metrics to store')
+    parser.add_argument('--folder', default=None, help='Folder of the segment stores (a temporary one if unset)')
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory(dir=args.folder) as folder:
+        for size in (int(value) for value in args.sizes.split(',')):
+            run('inmem', MetricInMemRepository(), size)
+            run('segments', MetricSegmentRepository(pathlib.Path(folder) / str(size)), size)
+
+
+if __name__ == '__main__':
+    main()
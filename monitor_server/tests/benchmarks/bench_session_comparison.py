@@ -0,0 +1,61 @@
+"""Response time of the session comparison use case.
+
+Run with ``python -m monitor_server.tests.benchmarks.bench_session_comparison [--sizes 10000,50000]``.
+Each size is the number of tests run by both compared sessions.
+"""
+
+import argparse
+import datetime
+import random
+import time
+
+from monitor_server.domain.models.comparisons import SessionComparisonRequest
+from monitor_server.domain.use_cases.sessions.comparison import CompareSessions
+from monitor_server.infrastructure.persistence.services import MonitoringMetricsInMemService
+from monitor_server.tests.sdk.persistence.generators import MachineGenerator, MetricGenerator, MonitorSessionGenerator
+
+RUNS = 5
+
+
+def add_tests(
+    service: MonitoringMetricsInMemService, session_id: str, machine_id: str, size: int, randomizer: random.Random
+) -> None:
+    generator = MetricGenerator(
+        datetime.datetime(2024, 1, 1, tzinfo=datetime.UTC), lambda _: session_id, lambda _: machine_id
+    )
+    for step in range(size):
+        service.add_metric(
+            generator(item_path=f'tests.module_{step % 500}', variant=f'test[{step}]', wall_time=randomizer.random())
+        )
+
+
+def run(size: int) -> None:
+    service = MonitoringMetricsInMemService()
+    a_machine = MachineGenerator()()
+    service.add_machine(a_machine)
+    sessions = [MonitorSessionGenerator()() for _ in range(2)]
+    randomizer = random.Random(size)
+    for session in sessions:
+        service.add_session(session)
+        add_tests(service, session.uid.hex, a_machine.uid.hex, size, randomizer)
+    request = SessionComparisonRequest(
+        baseline_session_id=sessions[0].uid.hex, candidate_session_id=sessions[1].uid.hex, page_no=0, page_size=100
+    )
+    use_case = CompareSessions(service)
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        result = use_case.execute(request)
+    elapsed = (time.perf_counter() - start) / RUNS
+    print(f'{size:>9} tests | {result.regressions:>7} regressions | comparison {elapsed * 1e3:8.2f} ms')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10000,50000', help='Comma separated numbers of tests per session')
+    args = parser.parse_args()
+    for size in (int(value) for value in args.sizes.split(',')):
+        run(size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Response time of the session statistics use case.
+
+Run with ``python -m monitor_server.tests.benchmarks.bench_session_statistics [--sizes 10000,100000]``.
+Each size is the number of metrics held by the session being summarized.
+"""
+
+import argparse
+import datetime
+import time
+import typing as t
+
+from monitor_server.domain.models.statistics import SessionStatisticsRequest, grouped_statistics
+from monitor_server.domain.use_cases.common import CollectSessionStatisticsUseCase
+from monitor_server.infrastructure.persistence.services import MonitoringMetricsInMemService
+from monitor_server.tests.sdk.persistence.generators import MachineGenerator, MetricGenerator, MonitorSessionGenerator
+
+COMPONENTS = 20
+RUNS = 10
+
+
+def timed(callable_: t.Callable[[], t.Any]) -> float:
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        callable_()
+    return (time.perf_counter() - start) / RUNS
+
+
+def run(size: int) -> None:
+    service = MonitoringMetricsInMemService()
+    a_session, a_machine = MonitorSessionGenerator()(), MachineGenerator()()
+    service.add_session(a_session)
+    service.add_machine(a_machine)
+    generator = MetricGenerator(
+        datetime.datetime(2024, 1, 1, tzinfo=datetime.UTC), lambda _: a_session.uid.hex, lambda _: a_machine.uid.hex
+    )
+    for step in range(size):
+        service.add_metric(generator(component=f'component-{step % COMPONENTS}', wall_time=(step % 997) / 10 + 0.1))
+    use_case = CollectSessionStatisticsUseCase(service)
+    request = SessionStatisticsRequest(session_id=a_session.uid.hex)
+    batch = service.metric_repository().get_batch_of(session_id=a_session.uid.hex)
+    load = timed(lambda: service.metric_repository().get_batch_of(session_id=a_session.uid.hex))
+    compute = timed(lambda: grouped_statistics(batch, by='component'))
+    total = timed(lambda: use_case.execute(request))
+    print(
+        f'{size:>9} metrics | batch load {load * 1e3:8.2f} ms | statistics {compute * 1e3:8.2f} ms'
+        f' | use case {total * 1e3:8.2f} ms'
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000', help='Comma separated numbers of metrics in the session')
+    args = parser.parse_args()
+    for size in (int(value) for value in args.sizes.split(',')):
+        run(size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark of the metrics service on an embedded SQLite database against the in-memory one.
+
+Run with ``python -m monitor_server.tests.benchmarks.bench_sqlite_service [--sizes 10000,100000] [--folder /tmp]``.
+The SQLite database is created by the migrations in a temporary file, with the default pragmas (WAL, mmap).
+"""
+
+import argparse
+import datetime
+import pathlib
+import tempfile
+import time
+import typing as t
+
+from monitor_server.domain.models.machines import Machine
+from monitor_server.domain.models.sessions import MonitorSession
+from monitor_server.infrastructure.orm.pageable import PageableStatement
+from monitor_server.infrastructure.persistence.services import (
+    MonitoringMetricsInMemService,
+    MonitoringMetricsService,
+    MonitoringMetricsSQLService,
+)
+from monitor_server.tests.sdk.persistence.generators import MachineGenerator, MetricGenerator, MonitorSessionGenerator
+from monitor_server.tests.sdk.persistence.sqlite import migrated_sqlite
+
+SESSIONS = 20
+BATCH = 500
+START_DATE = datetime.datetime(2024, 1, 1, tzinfo=datetime.UTC)
+QUERIES = 100
+
+
+def populate(service: MonitoringMetricsService, size: int) -> t.Tuple[t.List[MonitorSession], Machine]:
+    session_generator = MonitorSessionGenerator()
+    sessions = [session_generator() for _ in range(SESSIONS)]
+    machine = MachineGenerator()()
+    service.add_machine(machine)
+    for session in sessions:
+        service.add_session(session)
+    generator = MetricGenerator(START_DATE, lambda step: sessions[step % SESSIONS].uid.hex, lambda _: machine.uid.hex)
+    for offset in range(0, size, BATCH):
+        service.add_metrics([generator() for _ in range(min(BATCH, size - offset))])
+    return sessions, machine
+
+
+def timed(callable_: t.Callable[[], t.Any], count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        callable_()
+    return (time.perf_counter() - start) / count
+
+
+def run(name: str, service: MonitoringMetricsService, size: int) -> None:
+    start = time.perf_counter()
+    sessions, machine = populate(service, size)
+    insert_time = time.perf_counter() - start
+    page = PageableStatement(page_no=1, page_size=50)
+    repository = service.metric_repository()
+    by_session = timed(lambda: repository.get_all_of(session_id=sessions[7].uid.hex, page_info=page), QUERIES)
+    by_node = timed(lambda: repository.get_all_of(node_id=machine.uid.hex, page_info=page), QUERIES)
+    rollups = timed(lambda: service.get_rollups(sessions[3].uid.hex), QUERIES)
+    print(
+        f'{name:>6} | {size:>8} metrics | insert {insert_time / size * 1e6:8.2f} us/metric'
+        f' | session {by_session * 1e6:9.1f} us | node {by_node * 1e6:9.1f} us | rollups {rollups * 1e6:9.1f} us'
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000', help='Comma separated numbers of metrics to store')
+    parser.add_argument('--folder', default=None, help='Folder of the SQLite database files (a temporary one if unset)')
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory(dir=args.folder) as folder:
+        for size in (int(value) for value in args.sizes.split(',')):
+            run('inmem', MonitoringMetricsInMemService(), size)
+            run('sqlite', MonitoringMetricsSQLService(migrated_sqlite(pathlib.Path(folder) / f'{size}.db')), size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark of metric ingestion on SQLite with and without the Bloom filter of recent metric uids.
+
+Run with ``python -m monitor_server.tests.benchmarks.bench_uid_filter [--sizes 10000,100000] [--retries 0.1]``.
+A share of the batches is sent twice, as clients retrying would: those are refused as duplicates.
+"""
+
+import argparse
+import datetime
+import pathlib
+import random
+import tempfile
+import time
+
+from monitor_server.infrastructure.orm.config import UidFilterConfig
+from monitor_server.infrastructure.persistence.exceptions import EntityAlreadyExists
+from monitor_server.infrastructure.persistence.services import MonitoringMetricsSQLService
+from monitor_server.tests.sdk.persistence.generators import MachineGenerator, MetricGenerator, MonitorSessionGenerator
+from monitor_server.tests.sdk.persistence.sqlite import migrated_sqlite
+
+BATCH = 500
+START_DATE = datetime.datetime(2024, 1, 1, tzinfo=datetime.UTC)
+
+
+def run(name: str, service: MonitoringMetricsSQLService, size: int, retries: float) -> None:
+    session, machine = MonitorSessionGenerator()(), MachineGenerator()()
+    service.add_session(session)
+    service.add_machine(machine)
+    generator = MetricGenerator(START_DATE, lambda _: session.uid.hex, lambda _: machine.uid.hex)
+    randomizer = random.Random(size)
+    duplicates = 0
+    start = time.perf_counter()
+    for offset in range(0, size, BATCH):
+        batch = [generator() for _ in range(min(BATCH, size - offset))]
+        service.add_metrics(batch)
+        if randomizer.random() < retries:
+            try:
+                service.add_metrics(batch)
+            except EntityAlreadyExists:
+                duplicates += len(batch)
+    elapsed = time.perf_counter() - start
+    line = f'{name:>8} | {size:>8} metrics | {duplicates:>7} retried | ingest {elapsed / size * 1e6:8.2f} us/metric'
+    if service.uid_filter is not None:
+        statistics = service.uid_filter.statistics
+        line += (
+            f' | filter {statistics.memory / 1024:8.1f} KiB'
+            f' | false positives {statistics.false_positive_rate:.4f}'
+            f' (estimated {statistics.estimated_false_positive_rate:.4f})'
+        )
+    print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000', help='Comma separated numbers of metrics to ingest')
+    parser.add_argument('--retries', type=float, default=0.1, help='Share of the batches sent twice')
+    parser.add_argument('--folder', default=None, help='Folder of the SQLite database files (a temporary one if unset)')
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory(dir=args.folder) as folder:
+        for size in (int(value) for value in args.sizes.split(',')):
+            path = pathlib.Path(folder)
+            run('lookup', MonitoringMetricsSQLService(migrated_sqlite(path / f'lookup-{size}.db')), size, args.retries)
+            uid_filter = UidFilterConfig(capacity=size)
+            service = MonitoringMetricsSQLService(migrated_sqlite(path / f'bloom-{size}.db', uid_filter=uid_filter))
+            run('bloom', service, size, args.retries)
+
+
+if __name__ == '__main__':
+    main()
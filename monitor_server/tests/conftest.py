@@ -1,3 +1,4 @@
+import pathlib
 import typing as t
 
 import pytest
@@ -14,6 +15,7 @@ from monitor_server.infrastructure.persistence.metrics import (
     MetricRepository,
     MetricSQLRepository,
 )
+from monitor_server.infrastructure.persistence.segments import MetricSegmentRepository
 from monitor_server.infrastructure.persistence.services import (
     MonitoringMetricsInMemService,
     MonitoringMetricsService,
@@ -24,6 +26,7 @@ from monitor_server.infrastructure.persistence.sessions import (
     SessionRepository,
     SessionSQLRepository,
 )
+from monitor_server.tests.sdk.persistence.sqlite import migrated_sqlite
 
 INT_AND_UT_PARAMS = [pytest.param('int', marks=pytest.mark.int()), pytest.param('ut', marks=pytest.mark.ut())]
 
@@ -47,6 +50,11 @@ def orm(orm_config: ORMConfig) -> ORMEngine:
     return ORMEngine(orm_config)
 
 
+@pytest.fixture()
+def sqlite_orm(tmp_path: pathlib.Path) -> ORMEngine:
+    return migrated_sqlite(tmp_path / 'metrics.db')
+
+
 @pytest.fixture()
 def metrics_sql_service(orm: ORMEngine) -> t.Generator[MonitoringMetricsService, None, None]:
     service = MonitoringMetricsSQLService(orm)
@@ -102,7 +110,13 @@ def metrics_repository(request: pytest.FixtureRequest, orm) -> t.Iterator[Metric
         im_repo.truncate()
 
 
-@pytest.fixture(params=INT_AND_UT_PARAMS)
+@pytest.fixture(
+    params=[
+        *INT_AND_UT_PARAMS,
+        pytest.param('sqlite', marks=pytest.mark.ut()),
+        pytest.param('segments', marks=pytest.mark.ut()),
+    ]
+)
 def metrics_service(request: pytest.FixtureRequest, orm) -> t.Iterator[MonitoringMetricsService]:
     with_sql = False
     if request.param == 'int':
@@ -112,6 +126,12 @@ def metrics_service(request: pytest.FixtureRequest, orm) -> t.Iterator[Monitorin
         sql_repo = MonitoringMetricsSQLService(orm)
         yield sql_repo
         sql_repo.truncate_all()
+    elif request.param == 'sqlite':
+        yield MonitoringMetricsSQLService(request.getfixturevalue('sqlite_orm'))
+    elif request.param == 'segments':
+        # Small segments, so that metrics of a test span several of them
+        segments = MetricSegmentRepository(request.getfixturevalue('tmp_path') / 'segments', capacity=8)
+        yield MonitoringMetricsInMemService(metric_repository=segments)
     else:
         im_repo = MonitoringMetricsInMemService()
         yield im_repo
@@ -0,0 +1,75 @@
+import datetime
+import uuid
+
+import numpy as np
+
+from monitor_server.domain.models.batches import DictionaryColumn, MetricBatch
+from monitor_server.tests.sdk.persistence.generators import MetricGenerator
+
+
+class TestDictionaryColumn:
+    def test_it_encodes_each_distinct_value_once(self):
+        column = DictionaryColumn.encode(['b', 'a', 'b', 'c', 'a'])
+        assert column.values == ('b', 'a', 'c')
+        assert column.codes.tolist() == [0, 1, 0, 2, 1]
+        assert column.decode() == ['b', 'a', 'b', 'c', 'a']
+
+    def test_it_builds_a_mask_of_a_value(self):
+        column = DictionaryColumn.encode(['b', 'a', 'b'])
+        assert column.mask_of('b').tolist() == [True, False, True]
+        assert column.mask_of('z').tolist() == [False, False, False]
+
+    def test_it_groups_row_indices_by_value(self):
+        groups = DictionaryColumn.encode(['b', 'a', 'b', 'c', 'a']).groups()
+        assert {value: indices.tolist() for value, indices in groups.items()} == {'b': [0, 2], 'a': [1, 4], 'c': [3]}
+
+
+class TestMetricBatch:
+    def setup_method(self):
+        self.sessions = [uuid.uuid4().hex for _ in range(2)]
+        generator = MetricGenerator(
+            datetime.datetime(2024, 1, 31, 18, 24, 54, 123456, tzinfo=datetime.UTC),
+            lambda step: self.sessions[step % 2],
+            lambda _: 'node',
+        )
+        self.metrics = [
+            generator(component=f'component-{step % 3}', wall_time=float(step), cpu_usage=step / 10)
+            for step in range(1, 11)
+        ]
+
+    def test_it_round_trips_metrics(self):
+        batch = MetricBatch.from_metrics(self.metrics)
+        assert len(batch) == len(self.metrics)
+        assert batch.to_metrics() == self.metrics
+
+    def test_it_round_trips_naive_start_times(self):
+        naive = datetime.datetime(2024, 1, 1)  # noqa: DTZ001
+        metrics = [metric.model_copy(update={'item_start_time': naive}) for metric in self.metrics]
+        assert MetricBatch.from_metrics(metrics).to_metrics() == metrics
+
+    def test_it_stores_numeric_attributes_as_arrays(self):
+        batch = MetricBatch.from_metrics(self.metrics)
+        assert batch.wall_time.dtype == np.float64
+        assert batch.item_start_time.dtype == np.dtype('datetime64[us]')
+        assert batch.wall_time.tolist() == [float(step) for step in range(1, 11)]
+
+    def test_it_filters_rows_by_string_values(self):
+        batch = MetricBatch.from_metrics(self.metrics).where(session_id=self.sessions[0], component='component-1')
+        expected = [m for m in self.metrics if m.session_id == self.sessions[0] and m.component == 'component-1']
+        assert batch.to_metrics() == expected
+
+    def test_it_aggregates_per_group(self):
+        groups = MetricBatch.from_metrics(self.metrics).group_by('component')
+        assert sorted(groups) == ['component-0', 'component-1', 'component-2']
+        assert groups['component-1'].totals()['wall_time'] == 1 + 4 + 7 + 10
+
+    def test_an_empty_batch_has_no_metrics(self):
+        batch = MetricBatch.empty()
+        assert (len(batch), batch.to_metrics(), batch.totals()['cpu_usage']) == (0, [], 0.0)
+
+    def test_it_round_trips_through_plain_arrays(self, tmp_path):
+        path = tmp_path / 'batch.npz'
+        np.savez_compressed(path, **MetricBatch.from_metrics(self.metrics).to_arrays())
+        with np.load(path) as arrays:
+            assert MetricBatch.from_arrays(arrays).to_metrics() == self.metrics
+        assert MetricBatch.from_arrays(MetricBatch.empty().to_arrays()).to_metrics() == []
@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+from monitor_server.domain.models.rollups import AttributeRollup
+
+
+class TestAttributeRollup:
+    def test_it_derives_mean_and_standard_deviation(self):
+        values = [1.0, 4.0, 2.5, 8.0, 0.5]
+        rollup = AttributeRollup.of(values)
+        assert (rollup.count, rollup.minimum, rollup.maximum) == (5, 0.5, 8.0)
+        assert rollup.mean == pytest.approx(np.mean(values))
+        assert rollup.std == pytest.approx(np.std(values))
+
+    def test_merging_is_the_same_as_aggregating_all_values(self):
+        merged = AttributeRollup.of([1.0, 4.0]).merge(AttributeRollup.of([2.5, 8.0, 0.5]))
+        assert merged == AttributeRollup.of([1.0, 4.0, 2.5, 8.0, 0.5])
+
+    def test_an_empty_rollup_has_a_null_mean(self):
+        assert (AttributeRollup().mean, AttributeRollup().std, AttributeRollup().merge(AttributeRollup.of([3.0]))) == (
+            0.0,
+            0.0,
+            AttributeRollup.of([3.0]),
+        )
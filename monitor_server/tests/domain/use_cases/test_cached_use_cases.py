@@ -0,0 +1,64 @@
+from monitor_server.domain.models.abc import PageableRequest
+from monitor_server.domain.models.sessions import SessionListing
+from monitor_server.domain.use_cases.caching import CachedUseCase
+from monitor_server.domain.use_cases.machines.crud import ListMachine
+from monitor_server.domain.use_cases.sessions.crud import ListSession
+from monitor_server.infrastructure.orm.cache import LRUCache
+from monitor_server.infrastructure.persistence.machines import ExecutionContextRepository
+from monitor_server.infrastructure.persistence.sessions import SessionRepository
+from monitor_server.tests.sdk.persistence.generators import MachineGenerator, MonitorSessionGenerator
+
+
+class TestCachedUseCase:
+    def setup_method(self) -> None:
+        session_generator = MonitorSessionGenerator()
+        self.sessions = sorted((session_generator() for _ in range(12)), key=lambda session: session.uid)
+
+    def test_it_serves_repeated_requests_from_memory(self, session_repository: SessionRepository):
+        for session in self.sessions:
+            session_repository.create(session)
+        use_case = CachedUseCase(ListSession(session_repository), session_repository)
+        first = use_case.execute(PageableRequest(page_no=1, page_size=5))
+        second = use_case.execute(PageableRequest(page_no=1, page_size=5))
+        assert first == second == SessionListing(data=self.sessions[5:10], next_page=2)
+        assert (use_case.statistics.hits, use_case.statistics.misses) == (1, 1)
+
+    def test_it_keys_results_by_request(self, session_repository: SessionRepository):
+        for session in self.sessions:
+            session_repository.create(session)
+        use_case = CachedUseCase(ListSession(session_repository), session_repository)
+        assert use_case.execute(PageableRequest(page_no=0, page_size=5)).data == self.sessions[:5]
+        assert use_case.execute(PageableRequest(page_no=2, page_size=5)).data == self.sessions[10:]
+        assert use_case.execute(PageableRequest()).data == self.sessions
+        assert use_case.statistics.hits == 0
+
+    def test_writes_invalidate_cached_results(self, session_repository: SessionRepository):
+        use_case = CachedUseCase(ListSession(session_repository), session_repository)
+        assert use_case.execute(PageableRequest()).data == []
+        for session in self.sessions:
+            session_repository.create(session)
+        assert use_case.execute(PageableRequest()).data == self.sessions
+        session_repository.delete(self.sessions[0].uid.hex)
+        assert use_case.execute(PageableRequest()).data == self.sessions[1:]
+        session_repository.truncate()
+        assert use_case.execute(PageableRequest()).data == []
+        assert use_case.statistics.hits == 0
+
+    def test_it_serves_copies_of_cached_results(self, session_repository: SessionRepository):
+        for session in self.sessions:
+            session_repository.create(session)
+        use_case = CachedUseCase(ListSession(session_repository), session_repository)
+        use_case.execute(PageableRequest()).data.clear()
+        assert use_case.execute(PageableRequest()).data == self.sessions
+        assert use_case.statistics.hits == 1
+
+    def test_memory_is_bounded(self, execution_context_repository: ExecutionContextRepository):
+        machine_generator = MachineGenerator()
+        for _ in range(6):
+            execution_context_repository.create(machine_generator())
+        use_case = CachedUseCase(
+            ListMachine(execution_context_repository), execution_context_repository, LRUCache(max_size=2)
+        )
+        for page_no in range(3):
+            use_case.execute(PageableRequest(page_no=page_no, page_size=2))
+        assert (use_case.statistics.size, use_case.statistics.evictions) == (2, 1)
@@ -1,9 +1,20 @@
 import datetime
+import uuid
+
+import numpy as np
+import pytest
 
 from monitor_server.domain.models.common import CountInfo
-from monitor_server.domain.use_cases.common import CollectInfoUseCase
+from monitor_server.domain.models.statistics import SessionStatisticsRequest
+from monitor_server.domain.use_cases.common import CollectInfoUseCase, CollectSessionStatisticsUseCase
+from monitor_server.domain.use_cases.exceptions import SessionNotFound
 from monitor_server.infrastructure.persistence.services import MonitoringMetricsService
-from monitor_server.tests.sdk.persistence.generators import MachineGenerator, MetricGenerator, MonitorSessionGenerator
+from monitor_server.tests.sdk.persistence.generators import (
+    MachineGenerator,
+    MetricGenerator,
+    MonitorSessionGenerator,
+    constant_id,
+)
 
 
 class TestCollectInfoUseCase:
@@ -29,3 +40,98 @@ class TestCollectInfoUseCase:
         assert CollectInfoUseCase(metrics_service).execute() == CountInfo(
             metrics=len(metrics), sessions=len(sessions), machines=len(machines)
         )
+
+    def test_it_flags_the_counts_as_approximate_when_estimating(self, metrics_service: MonitoringMetricsService):
+        session, machine = MonitorSessionGenerator()(), MachineGenerator()()
+        metrics_generator = MetricGenerator(
+            session.start_date, constant_id(session.uid.hex), constant_id(machine.uid.hex)
+        )
+        metrics_service.add_metrics([metrics_generator() for _ in range(7)], session=session, machine=machine)
+        result = CollectInfoUseCase(metrics_service, approximate=True).execute()
+        assert result.approximate
+        # Backends without table statistics return the exact counts, the others an estimate within a factor of 2
+        for estimate, exact in ((result.metrics, 7), (result.sessions, 1), (result.machines, 1)):
+            assert exact / 2 <= estimate <= exact * 2
+
+
+class TestCollectSessionStatisticsUseCase:
+    @pytest.fixture()
+    def a_session_uid(self, metrics_service: MonitoringMetricsService) -> str:
+        sessions = [MonitorSessionGenerator()() for _ in range(2)]
+        a_machine = MachineGenerator()()
+        for session in sessions:
+            metrics_service.add_session(session)
+        metrics_service.add_machine(a_machine)
+        metrics_generator = MetricGenerator(
+            start_date=sessions[0].start_date,
+            session_uid_cb=lambda step: sessions[step % 2].uid.hex,
+            machine_uid_cb=lambda _: a_machine.uid.hex,
+        )
+        metrics_service.add_metrics([
+            metrics_generator(component=f'component-{step % 3}', wall_time=step * 1.5, memory_usage=step % 7 + 1)
+            for step in range(1, 61)
+        ])
+        self.wall_times = {
+            f'component-{c}': [step * 1.5 for step in range(1, 61) if step % 2 == 0 and step % 3 == c] for c in range(3)
+        }
+        return sessions[0].uid.hex
+
+    def test_it_computes_statistics_per_component(self, metrics_service: MonitoringMetricsService, a_session_uid: str):
+        result = CollectSessionStatisticsUseCase(metrics_service).execute(
+            SessionStatisticsRequest(session_id=a_session_uid)
+        )
+        assert sorted(result.components) == sorted(self.wall_times)
+        for component, wall_times in self.wall_times.items():
+            statistics = result.components[component]
+            assert statistics.count == len(wall_times)
+            assert statistics.wall_time.sum == pytest.approx(sum(wall_times))
+            assert statistics.wall_time.mean == pytest.approx(np.mean(wall_times))
+            assert (statistics.wall_time.min, statistics.wall_time.max) == (min(wall_times), max(wall_times))
+            percentiles = np.percentile(wall_times, [50, 95, 99])
+            assert [statistics.wall_time.p50, statistics.wall_time.p95, statistics.wall_time.p99] == pytest.approx(
+                percentiles
+            )
+
+    def test_it_computes_statistics_of_the_whole_session(
+        self, metrics_service: MonitoringMetricsService, a_session_uid: str
+    ):
+        result = CollectSessionStatisticsUseCase(metrics_service).execute(
+            SessionStatisticsRequest(session_id=a_session_uid)
+        )
+        wall_times = [value for values in self.wall_times.values() for value in values]
+        assert result.overall is not None
+        assert result.overall.count == 30
+        assert result.overall.wall_time.p50 == pytest.approx(np.percentile(wall_times, 50))
+        assert result.overall.user_time.sum == pytest.approx(30 * 0.8)
+
+    def test_it_aggregates_without_percentiles_in_the_repository(
+        self, metrics_service: MonitoringMetricsService, a_session_uid: str
+    ):
+        with_percentiles = CollectSessionStatisticsUseCase(metrics_service).execute(
+            SessionStatisticsRequest(session_id=a_session_uid)
+        )
+        result = CollectSessionStatisticsUseCase(metrics_service).execute(
+            SessionStatisticsRequest(session_id=a_session_uid, with_percentiles=False)
+        )
+        assert result.overall is not None
+        assert with_percentiles.overall is not None
+        assert result.overall.wall_time.p50 is None
+        assert result.overall.count == with_percentiles.overall.count
+        assert result.overall.memory_usage.sum == pytest.approx(with_percentiles.overall.memory_usage.sum)
+        for component, statistics in result.components.items():
+            assert statistics.wall_time.max == with_percentiles.components[component].wall_time.max
+            assert statistics.cpu_usage.mean == pytest.approx(with_percentiles.components[component].cpu_usage.mean)
+
+    def test_it_has_no_statistics_for_a_session_without_metrics(self, metrics_service: MonitoringMetricsService):
+        a_session = MonitorSessionGenerator()()
+        metrics_service.add_session(a_session)
+        result = CollectSessionStatisticsUseCase(metrics_service).execute(
+            SessionStatisticsRequest(session_id=a_session.uid.hex, with_percentiles=False)
+        )
+        assert (result.overall, result.components) == (None, {})
+
+    def test_it_raises_session_not_found_for_an_unknown_session(self, metrics_service: MonitoringMetricsService):
+        with pytest.raises(SessionNotFound):
+            CollectSessionStatisticsUseCase(metrics_service).execute(
+                SessionStatisticsRequest(session_id=uuid.uuid4().hex)
+            )
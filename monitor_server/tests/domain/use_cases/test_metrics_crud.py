@@ -11,6 +11,7 @@ from monitor_server.domain.models.sessions import MonitorSession
 from monitor_server.domain.use_cases.exceptions import InvalidMetric
 from monitor_server.domain.use_cases.metrics.crud import AddMetric, ListMetrics
 from monitor_server.infrastructure.persistence.services import MonitoringMetricsService
+from monitor_server.infrastructure.persistence.spool import IngestionSpool, SpoolReplayer
 from monitor_server.tests.sdk.persistence.generators import MachineGenerator, MetricGenerator, MonitorSessionGenerator
 
 
@@ -88,6 +89,20 @@ class TestAddMetric:
                 )
             )
 
+    def test_it_acknowledges_a_spooled_metric_before_writing_it(
+        self, metrics_service: MonitoringMetricsService, tmp_path: pathlib.Path
+    ):
+        spool = IngestionSpool(tmp_path)
+        metric = MetricGenerator(
+            self._start_date, lambda _: self.a_test_session.uid.hex, lambda _: self.a_machine.uid.hex
+        )()
+        assert AddMetric(metrics_service, spool=spool).execute(metric).uid == metric.uid.hex
+        assert metrics_service.count_metrics() == 0
+        metrics_service.add_session(self.a_test_session)
+        metrics_service.add_machine(self.a_machine)
+        SpoolReplayer(spool, metrics_service).drain()
+        assert metrics_service.get_metric(metric.uid.hex) == metric
+
 
 class TestListMetrics:
     def setup_method(self) -> None:
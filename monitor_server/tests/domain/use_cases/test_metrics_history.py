@@ -0,0 +1,110 @@
+import datetime
+import typing as t
+
+import numpy as np
+import pytest
+
+from monitor_server.domain.models.history import ItemHistoryRequest
+from monitor_server.domain.use_cases.metrics.history import GetItemHistory, _lttb
+from monitor_server.infrastructure.persistence.services import MonitoringMetricsService
+from monitor_server.tests.sdk.persistence.generators import MachineGenerator, MetricGenerator, MonitorSessionGenerator
+
+
+class TestGetItemHistory:
+    @pytest.fixture()
+    def a_start_time(self) -> datetime.datetime:
+        return datetime.datetime(2024, 1, 1, tzinfo=datetime.UTC)
+
+    @pytest.fixture()
+    def machines(self, metrics_service: MonitoringMetricsService, a_start_time: datetime.datetime) -> t.List[str]:
+        sessions = [MonitorSessionGenerator()(start_time=a_start_time) for _ in range(3)]
+        machines = [MachineGenerator()() for _ in range(2)]
+        for session in sessions:
+            metrics_service.add_session(session)
+        for machine in machines:
+            metrics_service.add_machine(machine)
+        generator = MetricGenerator(
+            a_start_time, lambda step: sessions[step % 3].uid.hex, lambda step: machines[(step // 2) % 2].uid.hex
+        )
+        # One run of the followed test every hour, on the first machine for odd hours, other tests interleaved
+        metrics = []
+        for hour in range(1, 41):
+            metrics.append(
+                generator(offset_from_start_date_sec=hour * 3600, variant='test[followed]', wall_time=float(hour))
+            )
+            metrics.append(generator(offset_from_start_date_sec=hour * 3600 + 1, variant='test[other]'))
+        metrics_service.add_metrics(metrics)
+        return [machine.uid.hex for machine in machines]
+
+    def request(self, **kwargs: t.Any) -> ItemHistoryRequest:
+        return ItemHistoryRequest(item_path='tests.this.item', variant='test[followed]', **kwargs)
+
+    def test_it_returns_the_runs_of_a_test_ordered_by_time(
+        self, metrics_service: MonitoringMetricsService, machines: t.List[str], a_start_time: datetime.datetime
+    ):
+        result = GetItemHistory(metrics_service.metric_repository()).execute(self.request())
+        assert result.total_points == 40
+        assert [point.value for point in result.points] == [float(hour) for hour in range(1, 41)]
+        assert result.points[0].time == a_start_time + datetime.timedelta(hours=1)
+        assert all(point.session_id for point in result.points)
+
+    def test_it_filters_by_node_and_time_range(
+        self, metrics_service: MonitoringMetricsService, machines: t.List[str], a_start_time: datetime.datetime
+    ):
+        request = self.request(
+            node_id=machines[0],
+            since=a_start_time + datetime.timedelta(hours=10),
+            until=a_start_time + datetime.timedelta(hours=20),
+        )
+        result = GetItemHistory(metrics_service.metric_repository()).execute(request)
+        assert [point.value for point in result.points] == [11.0, 13.0, 15.0, 17.0, 19.0]
+
+    def test_it_takes_naive_bounds_as_utc(
+        self, metrics_service: MonitoringMetricsService, machines: t.List[str], a_start_time: datetime.datetime
+    ):
+        naive_start_time = a_start_time.replace(tzinfo=None)
+        request = self.request(
+            since=naive_start_time + datetime.timedelta(hours=10),
+            until=naive_start_time + datetime.timedelta(hours=12),
+        )
+        result = GetItemHistory(metrics_service.metric_repository()).execute(request)
+        assert [point.value for point in result.points] == [10.0, 11.0, 12.0]
+
+    def test_it_summarizes_runs_in_buckets(self, metrics_service: MonitoringMetricsService, machines: t.List[str]):
+        result = GetItemHistory(metrics_service.metric_repository()).execute(
+            self.request(downsampling='buckets', max_points=4)
+        )
+        assert result.total_points == 40
+        assert len(result.points) == 4
+        assert [point.count for point in result.points] == [10, 10, 10, 10]
+        assert [(point.min, point.max) for point in result.points] == [(1, 10), (11, 20), (21, 30), (31, 40)]
+        assert [point.value for point in result.points] == [5.5, 15.5, 25.5, 35.5]
+
+    def test_it_keeps_a_bounded_number_of_runs_with_lttb(
+        self, metrics_service: MonitoringMetricsService, machines: t.List[str]
+    ):
+        result = GetItemHistory(metrics_service.metric_repository()).execute(
+            self.request(downsampling='lttb', max_points=10)
+        )
+        assert len(result.points) == 10
+        assert (result.points[0].value, result.points[-1].value) == (1.0, 40.0)
+
+    def test_it_returns_an_empty_history_for_an_unknown_test(self, metrics_service: MonitoringMetricsService):
+        result = GetItemHistory(metrics_service.metric_repository()).execute(
+            ItemHistoryRequest(item_path='unknown', variant='unknown', downsampling='buckets')
+        )
+        assert (result.total_points, result.points) == (0, [])
+
+
+class TestLargestTriangleThreeBuckets:
+    def test_it_keeps_the_extremes_of_a_signal(self):
+        times = np.arange(1000, dtype=np.int64)
+        values = np.zeros(1000)
+        values[[250, 700]] = [10.0, -10.0]
+        kept = _lttb(times, values, 10)
+        assert kept[0] == 0
+        assert kept[-1] == 999
+        assert {250, 700} <= set(kept.tolist())
+
+    def test_it_keeps_all_points_of_a_short_signal(self):
+        assert _lttb(np.arange(5), np.ones(5), 10).tolist() == [0, 1, 2, 3, 4]
@@ -0,0 +1,36 @@
+import pathlib
+from datetime import UTC, datetime, timedelta
+
+from monitor_server.domain.models.archives import ArchivePolicy
+from monitor_server.domain.use_cases.sessions.archiving import ArchiveSessions
+from monitor_server.infrastructure.persistence.archives import ColdArchive
+from monitor_server.infrastructure.persistence.services import MonitoringMetricsInMemService
+from monitor_server.tests.sdk.persistence.generators import (
+    MachineGenerator,
+    MetricGenerator,
+    MonitorSessionGenerator,
+    constant_id,
+)
+
+NOW = datetime(2024, 3, 1, tzinfo=UTC)
+
+
+class TestArchiveSessions:
+    def test_it_archives_old_sessions_except_sealed_ones(self, tmp_path: pathlib.Path):
+        service = MonitoringMetricsInMemService(archive=ColdArchive(tmp_path))
+        session_generator, machine = MonitorSessionGenerator(), MachineGenerator()()
+        sessions = [session_generator(start_time=NOW - timedelta(days=100 * age)) for age in range(4)]
+        for session in sessions:
+            generator = MetricGenerator(session.start_date, constant_id(session.uid.hex), lambda _: machine.uid.hex)
+            service.add_metrics([generator() for _ in range(2)], session=session, machine=machine)
+        service.seal_session(sessions[3].uid.hex)
+        use_case = ArchiveSessions(service, clock=lambda: NOW)
+
+        dry_run = use_case.execute(ArchivePolicy(older_than_days=150, dry_run=True))
+        assert [archived.session_id for archived in dry_run.sessions] == [sessions[2].uid.hex]
+        assert service.count_metrics() == 8
+
+        report = use_case.execute(ArchivePolicy(older_than_days=50))
+        assert [archived.session_id for archived in report.sessions] == [sessions[2].uid.hex, sessions[1].uid.hex]
+        assert service.count_metrics() == 4
+        assert use_case.execute(ArchivePolicy(older_than_days=50)).sessions == []
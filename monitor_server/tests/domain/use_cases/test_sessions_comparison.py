@@ -0,0 +1,105 @@
+import typing as t
+import uuid
+
+import pytest
+
+from monitor_server.domain.models.comparisons import SessionComparisonRequest
+from monitor_server.domain.models.machines import Machine
+from monitor_server.domain.models.sessions import MonitorSession
+from monitor_server.domain.use_cases.exceptions import SessionNotFound
+from monitor_server.domain.use_cases.sessions.comparison import CompareSessions
+from monitor_server.infrastructure.persistence.services import MonitoringMetricsService
+from monitor_server.tests.sdk.persistence.generators import (
+    MachineGenerator,
+    MetricGenerator,
+    MonitorSessionGenerator,
+    constant_id,
+)
+
+
+class TestCompareSessions:
+    @pytest.fixture()
+    def sessions(self, metrics_service: MonitoringMetricsService) -> t.Tuple[MonitorSession, MonitorSession]:
+        baseline, candidate = MonitorSessionGenerator()(), MonitorSessionGenerator()()
+        a_machine = MachineGenerator()()
+        for session in (baseline, candidate):
+            metrics_service.add_session(session)
+        metrics_service.add_machine(a_machine)
+        self.add_metrics(metrics_service, baseline, a_machine, {'a': 1.0, 'b': 2.0, 'c': 4.0, 'd': 1.0, 'gone': 3.0})
+        self.add_metrics(metrics_service, candidate, a_machine, {'a': 1.05, 'b': 3.0, 'c': 2.0, 'd': 1.5, 'new': 3.0})
+        return baseline, candidate
+
+    @staticmethod
+    def add_metrics(
+        metrics_service: MonitoringMetricsService,
+        session: MonitorSession,
+        machine: Machine,
+        wall_times: t.Dict[str, float],
+    ) -> None:
+        generator = MetricGenerator(session.start_date, lambda _: session.uid.hex, lambda _: machine.uid.hex)
+        for variant, wall_time in wall_times.items():
+            metrics_service.add_metric(
+                generator(variant=variant, component=f'component-{variant}', wall_time=wall_time)
+            )
+
+    def request(self, sessions: t.Tuple[MonitorSession, MonitorSession], **kwargs: t.Any) -> SessionComparisonRequest:
+        return SessionComparisonRequest(
+            baseline_session_id=sessions[0].uid.hex, candidate_session_id=sessions[1].uid.hex, **kwargs
+        )
+
+    def test_it_compares_common_tests_by_impact(self, metrics_service: MonitoringMetricsService, sessions):
+        result = CompareSessions(metrics_service).execute(self.request(sessions))
+        assert (result.compared, result.only_in_baseline, result.only_in_candidate) == (4, 1, 1)
+        assert [c.variant for c in result.data] == ['b', 'd', 'a', 'c']
+        assert [c.delta for c in result.data] == pytest.approx([1.0, 0.5, 0.05, -2.0])
+        assert [c.ratio for c in result.data] == pytest.approx([1.5, 1.5, 1.05, 0.5])
+        assert result.data[0].component == 'component-b'
+
+    def test_it_flags_regressions_beyond_thresholds(self, metrics_service: MonitoringMetricsService, sessions):
+        result = CompareSessions(metrics_service).execute(self.request(sessions, regression_delta=0.75))
+        assert result.regressions == 1
+        assert [c.variant for c in result.data if c.regression] == ['b']
+
+    def test_it_keeps_only_regressions(self, metrics_service: MonitoringMetricsService, sessions):
+        result = CompareSessions(metrics_service).execute(self.request(sessions, only_regressions=True))
+        assert [c.variant for c in result.data] == ['b', 'd']
+        assert all(c.regression for c in result.data)
+
+    def test_it_pages_the_comparison(self, metrics_service: MonitoringMetricsService, sessions):
+        first = CompareSessions(metrics_service).execute(self.request(sessions, page_no=0, page_size=3))
+        last = CompareSessions(metrics_service).execute(self.request(sessions, page_no=1, page_size=3))
+        assert ([c.variant for c in first.data], first.next_page) == (['b', 'd', 'a'], 1)
+        assert ([c.variant for c in last.data], last.next_page) == (['c'], None)
+
+    def test_it_compares_another_attribute(self, metrics_service: MonitoringMetricsService, sessions):
+        result = CompareSessions(metrics_service).execute(self.request(sessions, attribute='user_time'))
+        assert result.regressions == 0
+        assert {c.delta for c in result.data} == {0.0}
+
+    def test_it_matches_tests_on_both_path_and_variant(self, metrics_service: MonitoringMetricsService):
+        baseline, candidate = MonitorSessionGenerator()(), MonitorSessionGenerator()()
+        a_machine = MachineGenerator()()
+        metrics_service.bulk_add(machines=[a_machine], sessions=[baseline, candidate])
+        # Distinct values come in another order in each session, so do their dictionary codes
+        runs = [
+            (baseline, [('x', 'a', 1.0), ('y', 'a', 2.0), ('x', 'b', 3.0)]),
+            (candidate, [('x', 'b', 4.0), ('y', 'b', 5.0), ('y', 'a', 6.0)]),
+        ]
+        for session, tests in runs:
+            generator = MetricGenerator(
+                session.start_date, constant_id(session.uid.hex), constant_id(a_machine.uid.hex)
+            )
+            for item_path, variant, wall_time in tests:
+                metrics_service.add_metric(generator(item_path=item_path, variant=variant, wall_time=wall_time))
+        result = CompareSessions(metrics_service).execute(self.request((baseline, candidate)))
+        assert (result.compared, result.only_in_baseline, result.only_in_candidate) == (2, 1, 1)
+        assert [(c.item_path, c.variant, c.delta) for c in result.data] == [('y', 'a', 4.0), ('x', 'b', 1.0)]
+
+    def test_it_raises_session_not_found_for_an_unknown_session(
+        self, metrics_service: MonitoringMetricsService, sessions
+    ):
+        request = SessionComparisonRequest(
+            baseline_session_id=sessions[0].uid.hex, candidate_session_id=uuid.uuid4().hex
+        )
+        with pytest.raises(SessionNotFound):
+            CompareSessions(metrics_service).execute(request)
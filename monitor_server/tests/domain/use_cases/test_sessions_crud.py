@@ -64,3 +64,10 @@ class TestListSessions:
             session_repository.create(session)
         result = use_case.execute(PageableRequest(page_no=1, page_size=5))
         assert result == SessionListing(data=self.sessions[5:10], next_page=2)
+
+    def test_it_flags_pages_bounded_by_an_estimate_as_approximate(self, session_repository: SessionRepository):
+        use_case = ListSession(session_repository)
+        for session in self.sessions:
+            session_repository.create(session)
+        result = use_case.execute(PageableRequest(page_no=1, page_size=5, approximate=True))
+        assert (result.data, result.approximate) == (self.sessions[5:10], True)
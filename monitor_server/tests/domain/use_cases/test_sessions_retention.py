@@ -0,0 +1,107 @@
+import typing as t
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from monitor_server.domain.models.retention import PruningProgress, RetentionPolicy
+from monitor_server.domain.models.sessions import MonitorSession
+from monitor_server.domain.use_cases.sessions.retention import PruneSessions
+from monitor_server.infrastructure.persistence.services import MonitoringMetricsService
+from monitor_server.tests.sdk.persistence.generators import (
+    MachineGenerator,
+    MetricGenerator,
+    MonitorSessionGenerator,
+    constant_id,
+)
+
+NOW = datetime(2024, 3, 1, tzinfo=UTC)
+
+
+class TestPruneSessions:
+    @pytest.fixture()
+    def sessions(self, metrics_service: MonitoringMetricsService) -> t.List[MonitorSession]:
+        """Sessions started 1, 11, ..., 51 days ago, 3 metrics each. Branches alternate between main and dev."""
+        session_generator, machine = MonitorSessionGenerator(), MachineGenerator()()
+        sessions = [
+            session_generator(start_time=NOW - timedelta(days=1 + 10 * age), tags={'branch': ('main', 'dev')[age % 2]})
+            for age in range(6)
+        ]
+        for session in sessions:
+            generator = MetricGenerator(session.start_date, constant_id(session.uid.hex), lambda _: machine.uid.hex)
+            metrics_service.add_metrics([generator() for _ in range(3)], session=session, machine=machine)
+        return sessions
+
+    def prune(
+        self,
+        metrics_service: MonitoringMetricsService,
+        progress: t.List[PruningProgress] | None = None,
+        **policy: t.Any,
+    ):
+        pauses: t.List[float] = []
+        use_case = PruneSessions(
+            metrics_service,
+            on_progress=progress.append if progress is not None else None,
+            sleep=pauses.append,
+            clock=lambda: NOW,
+        )
+        return use_case.execute(RetentionPolicy(**policy)), pauses
+
+    def test_it_prunes_sessions_older_than_the_given_days_oldest_first(
+        self, metrics_service: MonitoringMetricsService, sessions: t.List[MonitorSession]
+    ):
+        report, _ = self.prune(metrics_service, keep_days=25)
+        assert report.sessions == [session.uid.hex for session in reversed(sessions[3:])]
+        assert report.metrics == 9
+        assert metrics_service.count_sessions() == 3
+        assert metrics_service.count_metrics() == 9
+        assert metrics_service.get_rollups(sessions[5].uid.hex).overall is None
+
+    def test_it_keeps_the_latest_sessions_of_each_tag(
+        self, metrics_service: MonitoringMetricsService, sessions: t.List[MonitorSession]
+    ):
+        report, _ = self.prune(metrics_service, keep_last=1, per_tag='branch')
+        assert sorted(report.sessions) == sorted(session.uid.hex for session in sessions[2:])
+        assert metrics_service.count_metrics() == 6
+
+    def test_a_session_kept_by_any_rule_is_not_pruned(
+        self, metrics_service: MonitoringMetricsService, sessions: t.List[MonitorSession]
+    ):
+        report, _ = self.prune(metrics_service, keep_days=5, keep_last=3)
+        assert report.sessions == [session.uid.hex for session in reversed(sessions[3:])]
+
+    def test_it_keeps_sealed_sessions_unless_told_otherwise(
+        self, metrics_service: MonitoringMetricsService, sessions: t.List[MonitorSession]
+    ):
+        metrics_service.seal_session(sessions[5].uid.hex)
+        report, _ = self.prune(metrics_service, keep_days=45)
+        assert report.sessions == []
+        report, _ = self.prune(metrics_service, keep_days=45, keep_sealed=False)
+        assert report.sessions == [sessions[5].uid.hex]
+        assert metrics_service.snapshot_repository().load(sessions[5].uid.hex) is None
+
+    def test_it_deletes_by_chunks_and_reports_progress(
+        self, metrics_service: MonitoringMetricsService, sessions: t.List[MonitorSession]
+    ):
+        progress: t.List[PruningProgress] = []
+        _, pauses = self.prune(metrics_service, progress, keep_days=45, chunk_size=2, pause=0.5)
+        session_id = sessions[5].uid.hex
+        assert progress == [
+            PruningProgress(session_id=session_id, sessions_done=0, sessions_total=1, metrics_deleted=2),
+            PruningProgress(session_id=session_id, sessions_done=0, sessions_total=1, metrics_deleted=3),
+            PruningProgress(session_id=session_id, sessions_done=1, sessions_total=1, metrics_deleted=3),
+        ]
+        assert pauses == [0.5]
+
+    def test_a_dry_run_deletes_nothing(
+        self, metrics_service: MonitoringMetricsService, sessions: t.List[MonitorSession]
+    ):
+        report, _ = self.prune(metrics_service, keep_days=25, dry_run=True)
+        assert (len(report.sessions), report.metrics, report.dry_run) == (3, 0, True)
+        assert metrics_service.count_metrics() == 18
+
+    def test_a_policy_without_rules_keeps_everything(
+        self, metrics_service: MonitoringMetricsService, sessions: t.List[MonitorSession]
+    ):
+        report, _ = self.prune(metrics_service)
+        assert report.sessions == []
+        assert metrics_service.count_sessions() == len(sessions)
@@ -0,0 +1,23 @@
+import pytest
+
+from monitor_server.domain.models.snapshots import SealedSession, SealSessionRequest
+from monitor_server.domain.use_cases.exceptions import SessionNotFound, SessionSealed
+from monitor_server.domain.use_cases.metrics.crud import AddMetric
+from monitor_server.domain.use_cases.sessions.sealing import SealSession
+from monitor_server.infrastructure.persistence.services import MonitoringMetricsService
+from monitor_server.tests.sdk.persistence.generators import MachineGenerator, MetricGenerator, MonitorSessionGenerator
+
+
+class TestSealSession:
+    def test_it_seals_a_session(self, metrics_service: MonitoringMetricsService):
+        session, machine = MonitorSessionGenerator()(), MachineGenerator()()
+        generator = MetricGenerator(session.start_date, lambda _: session.uid.hex, lambda _: machine.uid.hex)
+        metrics_service.add_metrics([generator() for _ in range(3)], session=session, machine=machine)
+        result = SealSession(metrics_service).execute(SealSessionRequest(session_id=session.uid.hex))
+        assert result == SealedSession(session_id=session.uid.hex, metrics=3, size=result.size)
+        with pytest.raises(SessionSealed):
+            AddMetric(metrics_service).execute(generator())
+
+    def test_it_raises_session_not_found_for_an_unknown_session(self, metrics_service: MonitoringMetricsService):
+        with pytest.raises(SessionNotFound):
+            SealSession(metrics_service).execute(SealSessionRequest(session_id='abcd'))
@@ -0,0 +1,42 @@
+import math
+import uuid
+
+import pytest
+
+from monitor_server.infrastructure.orm.bloom import BloomFilter
+
+
+class TestBloomFilter:
+    def test_it_never_misses_a_key_added(self):
+        keys = [uuid.uuid4().hex for _ in range(1000)]
+        bloom = BloomFilter(capacity=1000)
+        assert bloom.update(keys) == 1000
+        assert all(bloom.might_contain(key) for key in keys)
+        assert bloom.statistics.maybe_present == 1000
+
+    def test_its_false_positive_rate_stays_close_to_the_error_rate(self):
+        bloom = BloomFilter(capacity=2000, error_rate=0.01)
+        bloom.update(uuid.uuid4().hex for _ in range(2000))
+        false_positives = sum(bloom.might_contain(uuid.uuid4().hex) for _ in range(20000))
+        bloom.record_false_positives(false_positives)
+        statistics = bloom.statistics
+        assert (statistics.hashes, statistics.memory) == (7, 2 * math.ceil(statistics.bits / 8))
+        assert 0.005 < statistics.estimated_false_positive_rate < 0.015
+        assert statistics.false_positive_rate == false_positives / 20000 < 0.02
+
+    def test_it_forgets_the_oldest_keys(self):
+        keys = [uuid.uuid4().hex for _ in range(300)]
+        bloom = BloomFilter(capacity=100, error_rate=0.001)
+        bloom.update(keys)
+        assert all(key in bloom for key in keys[100:])
+        assert sum(key in bloom for key in keys[:100]) < 5
+        assert bloom.statistics.entries == 100
+        bloom.clear()
+        assert not any(key in bloom for key in keys)
+
+    @pytest.mark.parametrize(
+        ('capacity', 'error_rate', 'invalid'), [(0, 0.01, 'capacity'), (10, 0.0, 'error_rate'), (10, 1.0, 'error_rate')]
+    )
+    def test_it_rejects_an_invalid_sizing(self, capacity: int, error_rate: float, invalid: str):
+        with pytest.raises(ValueError, match=invalid):
+            BloomFilter(capacity=capacity, error_rate=error_rate)
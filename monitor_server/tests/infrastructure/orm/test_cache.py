@@ -0,0 +1,84 @@
+import pytest
+
+from monitor_server.domain.models.sessions import MonitorSession
+from monitor_server.infrastructure.orm.cache import CacheStatistics, CachingRepository, LRUCache
+from monitor_server.infrastructure.persistence.exceptions import EntityNotFound
+from monitor_server.infrastructure.persistence.models import Session
+from monitor_server.infrastructure.persistence.sessions import SessionInMemRepository
+from monitor_server.tests.sdk.persistence.generators import MonitorSessionGenerator
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestLRUCache:
+    def test_it_evicts_the_least_recently_used_entry(self):
+        cache: LRUCache[str, int] = LRUCache(max_size=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        assert cache.get('a') == 1
+        cache.put('c', 3)
+        assert (cache.get('b'), cache.get('a'), cache.get('c')) == (None, 1, 3)
+        assert cache.statistics == CacheStatistics(size=2, max_size=2, hits=3, misses=1, evictions=1)
+
+    def test_entries_expire_after_the_ttl(self):
+        clock = FakeClock()
+        cache: LRUCache[str, int] = LRUCache(max_size=2, ttl=10, clock=clock)
+        cache.put('a', 1)
+        clock.now = 9.9
+        assert cache.get('a') == 1
+        clock.now = 10
+        assert cache.get('a') is None
+        assert (len(cache), cache.statistics.expirations, cache.statistics.hit_ratio) == (0, 1, 0.5)
+
+    def test_it_rejects_an_empty_capacity(self):
+        with pytest.raises(ValueError, match='max_size'):
+            LRUCache(max_size=0)
+
+
+class TestCachingRepository:
+    def setup_method(self):
+        self.sessions = SessionInMemRepository()
+        self.repository: CachingRepository[MonitorSession, Session] = CachingRepository(
+            self.sessions, LRUCache(max_size=8)
+        )
+        self.session = self.repository.create(MonitorSessionGenerator()())
+
+    def test_it_reads_an_item_once(self):
+        assert self.repository.get(self.session.uid.hex) == self.session
+        self.sessions.delete(self.session.uid.hex)
+        assert self.repository.get(self.session.uid.hex) == self.session
+        assert (self.repository.statistics.hits, self.repository.statistics.misses) == (1, 1)
+
+    def test_cached_items_cannot_be_altered_by_callers(self):
+        self.repository.get(self.session.uid.hex).tags['altered'] = True
+        assert 'altered' not in self.repository.get(self.session.uid.hex).tags
+
+    def test_it_does_not_cache_unknown_items(self):
+        with pytest.raises(EntityNotFound):
+            self.repository.get('abcd')
+        assert self.repository.statistics.size == 0
+
+    def test_it_invalidates_an_updated_item(self):
+        self.repository.get(self.session.uid.hex)
+        updated = self.session.model_copy(update={'scm_revision': 'another_revision'})
+        self.repository.update(updated)
+        assert self.repository.get(self.session.uid.hex) == updated
+
+    def test_it_invalidates_a_deleted_item(self):
+        self.repository.get(self.session.uid.hex)
+        self.repository.delete(self.session.uid.hex)
+        with pytest.raises(EntityNotFound):
+            self.repository.get(self.session.uid.hex)
+
+    def test_it_drops_all_items_on_truncate(self):
+        self.repository.get(self.session.uid.hex)
+        self.repository.truncate()
+        assert self.repository.statistics.size == 0
+        with pytest.raises(EntityNotFound):
+            self.repository.get(self.session.uid.hex)
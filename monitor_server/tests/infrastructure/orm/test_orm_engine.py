@@ -1,5 +1,5 @@
 import pytest
-from sqlalchemy import text
+from sqlalchemy import inspect, text
 
 from monitor_server.infrastructure.orm.config import ORMConfig
 from monitor_server.infrastructure.orm.engine import ORMEngine
@@ -16,3 +16,23 @@ class TestORMEngine:
         my_orm = ORMEngine(orm_config)
         data = my_orm.session.execute(text('SELECT 1 FROM DUAL')).first()
         assert data == (1,)
+
+
+class TestSQLiteEngine:
+    def test_it_builds_a_file_url_without_server_settings(self):
+        config = ORMConfig(driver='sqlite', database='/var/lib/monitor/metrics.db', session={})  # type: ignore[arg-type]
+        assert config.url == 'sqlite:////var/lib/monitor/metrics.db'
+
+    def test_server_settings_are_required_by_other_drivers(self):
+        with pytest.raises(ValueError, match='host'):
+            ORMConfig(username='monitor', password='secret', port=3306, database='metrics', session={})  # type: ignore[arg-type]
+
+    def test_it_applies_the_configured_pragmas(self, sqlite_orm: ORMEngine):
+        session = sqlite_orm.session
+        pragmas = {name: session.execute(text(f'PRAGMA {name}')).scalar() for name in ('journal_mode', 'foreign_keys')}
+        assert pragmas == {'journal_mode': 'wal', 'foreign_keys': 1}
+        assert session.execute(text('PRAGMA mmap_size')).scalar() == sqlite_orm.config.sqlite.mmap_size
+
+    def test_migrations_index_the_links_of_metrics(self, sqlite_orm: ORMEngine):
+        indexes = {index['name'] for index in inspect(sqlite_orm.engine).get_indexes('TestMetric')}
+        assert {'ix_TestMetric_sid', 'ix_TestMetric_xid'} <= indexes
@@ -1,14 +1,15 @@
 import typing as t
 
 import pytest
-from sqlalchemy import String
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, create_engine, func, insert, select, text
+from sqlalchemy.orm import Mapped, Session, mapped_column
 
 from monitor_server.domain.models.abc import Entity
 from monitor_server.infrastructure.orm.declarative import ORMModel
 from monitor_server.infrastructure.orm.errors import ORMInvalidMapping
 from monitor_server.infrastructure.orm.pageable import PageableStatement, PaginatedResponse
-from monitor_server.infrastructure.orm.repositories import CRUDRepositoryBase
+from monitor_server.infrastructure.orm.repositories import CRUDRepositoryBase, SQLRepository
+from monitor_server.infrastructure.orm.truncation import delete_by_chunks, truncate_tables
 
 
 class MyTestModel(ORMModel):
@@ -129,3 +130,43 @@ class TestAbstractRepository:
 
         with pytest.raises(ORMInvalidMapping, match='no domain object found for repository ATestRepository'):
             ATestRepository()
+
+
+class MyTestSQLRepository(SQLRepository[MyTestEntity, MyTestModel]): ...
+
+
+@pytest.fixture()
+def sqlite_session() -> t.Iterator[Session]:
+    engine = create_engine('sqlite://')
+    ORMModel.metadata.create_all(engine, tables=[MyTestModel.__table__])  # type: ignore[list-item]
+    with Session(engine) as session:
+        yield session
+
+
+class TestSQLRepositoryEstimateCount:
+    def test_it_falls_back_to_the_exact_count_when_no_statistics_are_available(self, sqlite_session: Session):
+        sqlite_session.execute(insert(MyTestModel), [{'data': f'row {i}'} for i in range(12)])
+        assert MyTestSQLRepository(sqlite_session).estimate_count() == 12
+
+    def test_it_reads_the_row_count_from_the_planner_statistics(self, sqlite_session: Session):
+        sqlite_session.execute(insert(MyTestModel), [{'data': f'row {i}'} for i in range(12)])
+        sqlite_session.execute(text('ANALYZE'))
+        sqlite_session.execute(insert(MyTestModel), [{'data': f'row {i}'} for i in range(3)])
+        repository = MyTestSQLRepository(sqlite_session)
+        assert (repository.estimate_count(), repository.count()) == (12, 15)
+
+
+class TestTruncateTables:
+    def test_it_deletes_and_vacuums_on_sqlite(self, sqlite_session: Session):
+        sqlite_session.execute(insert(MyTestModel), [{'data': f'row {i}'} for i in range(12)])
+        sqlite_session.commit()
+        report = truncate_tables(sqlite_session, [MyTestModel])
+        assert (report.strategy, report.tables) == ('delete_vacuum', ('MyTestModel',))
+        assert report.duration >= 0
+        assert sqlite_session.execute(select(func.count()).select_from(MyTestModel)).scalar_one() == 0
+
+    def test_chunked_deletes_remove_all_rows(self, sqlite_session: Session):
+        sqlite_session.execute(insert(MyTestModel), [{'data': f'row {i}'} for i in range(12)])
+        sqlite_session.commit()
+        assert delete_by_chunks(sqlite_session, MyTestModel.__table__, chunk_size=5) == 12  # type: ignore[arg-type]
+        assert sqlite_session.execute(select(func.count()).select_from(MyTestModel)).scalar_one() == 0
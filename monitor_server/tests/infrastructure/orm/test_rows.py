@@ -0,0 +1,34 @@
+import datetime
+import uuid
+
+from monitor_server.domain.models.metrics import Metric
+from monitor_server.infrastructure.orm.presenter import presenter
+from monitor_server.infrastructure.orm.rows import compact_row_of
+from monitor_server.infrastructure.persistence.models import TestMetric
+from monitor_server.tests.sdk.persistence.generators import MetricGenerator
+
+
+class TestCompactRow:
+    def setup_method(self):
+        self.session_id, self.node_id = uuid.uuid4().hex, uuid.uuid4().hex
+        self.generator = MetricGenerator(
+            datetime.datetime(2024, 1, 1, tzinfo=datetime.UTC), lambda _: self.session_id, lambda _: self.node_id
+        )
+
+    def test_it_holds_one_slot_per_model_column(self):
+        row_type = compact_row_of(TestMetric)
+        assert row_type.__slots__ == tuple(TestMetric.__table__.columns.keys())
+        assert not hasattr(row_type.of(presenter.to_orm(self.generator(), as_=TestMetric), {}), '__dict__')
+
+    def test_it_shares_repeated_strings_between_rows(self):
+        row_type, pool = compact_row_of(TestMetric, frozenset({'sid', 'component'})), {}
+        first, second = (row_type.of(presenter.to_orm(self.generator(), as_=TestMetric), pool) for _ in range(2))
+        assert first.sid is second.sid
+        assert first.component is second.component
+        assert set(pool) == {self.session_id, 'component'}
+
+    def test_it_is_converted_back_to_the_domain_object(self):
+        a_metric: Metric = self.generator()
+        row = compact_row_of(TestMetric).of(presenter.to_orm(a_metric, as_=TestMetric), {})
+        assert row.uid == a_metric.uid.hex
+        assert presenter.from_row(row, as_=Metric) == a_metric
@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from monitor_server.infrastructure.orm.sorted_keys import SortedKeys
+
+
+class TestSortedKeys:
+    def setup_method(self):
+        self.keys = [f'{i:08x}' for i in random.Random(42).sample(range(10_000), 500)]
+
+    def test_it_keeps_keys_ordered_whatever_the_insertion_order(self):
+        assert list(SortedKeys(self.keys, load=8)) == sorted(self.keys)
+
+    def test_it_ignores_a_key_added_twice(self):
+        keys = SortedKeys(self.keys, load=8)
+        keys.add(self.keys[10])
+        assert len(keys) == len(self.keys)
+
+    def test_it_discards_keys(self):
+        keys = SortedKeys(self.keys, load=8)
+        for key in self.keys[::2]:
+            keys.discard(key)
+        keys.discard('unknown')
+        assert list(keys) == sorted(self.keys[1::2])
+        assert len(keys) == len(self.keys[1::2])
+
+    def test_it_tells_whether_it_contains_a_key(self):
+        keys = SortedKeys(self.keys[:100], load=8)
+        assert all(key in keys for key in self.keys[:100])
+        assert not any(key in keys for key in self.keys[100:])
+
+    @pytest.mark.parametrize(('start', 'stop'), [(0, 5), (13, 29), (490, 510), (600, 700)])
+    def test_it_slices_by_position(self, start: int, stop: int):
+        assert SortedKeys(self.keys, load=8)[start:stop] == sorted(self.keys)[start:stop]
+
+    def test_it_gets_a_key_by_position(self):
+        keys = SortedKeys(self.keys, load=8)
+        assert (keys[0], keys[-1]) == (min(self.keys), max(self.keys))
+
+    def test_it_is_empty_once_cleared(self):
+        keys = SortedKeys(self.keys, load=8)
+        keys.clear()
+        assert (len(keys), list(keys), 'a' in keys) == (0, [], False)
+
+    @pytest.mark.parametrize('position', [None, 0, 7, 250, 499])
+    def test_it_returns_the_keys_following_a_given_one(self, position: int | None):
+        ordered = sorted(self.keys)
+        key = None if position is None else ordered[position]
+        start = 0 if position is None else position + 1
+        assert SortedKeys(self.keys, load=8).after(key, 20) == ordered[start : start + 20]
+
+    def test_it_returns_the_keys_following_a_missing_one(self):
+        ordered = sorted(self.keys)
+        assert SortedKeys(self.keys, load=8).after(ordered[3] + '0', 5) == ordered[4:9]
+
+    def test_it_slices_consistently_after_changes(self):
+        keys = SortedKeys(self.keys, load=8)
+        assert keys[100:110] == sorted(self.keys)[100:110]
+        for key in self.keys[:50]:
+            keys.discard(key)
+        assert keys[100:110] == sorted(self.keys[50:])[100:110]
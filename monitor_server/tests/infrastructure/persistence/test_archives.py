@@ -0,0 +1,149 @@
+import pathlib
+import typing as t
+
+import pytest
+
+from monitor_server.domain.models.aggregates import ValidationSuiteFilter
+from monitor_server.domain.models.machines import Machine
+from monitor_server.domain.models.metrics import Metric
+from monitor_server.domain.models.sessions import MonitorSession
+from monitor_server.infrastructure.orm.engine import ORMEngine
+from monitor_server.infrastructure.orm.errors import ORMError
+from monitor_server.infrastructure.persistence.archives import ColdArchive
+from monitor_server.infrastructure.persistence.exceptions import EntitySealed
+from monitor_server.infrastructure.persistence.services import (
+    MonitoringMetricsInMemService,
+    MonitoringMetricsService,
+    MonitoringMetricsSQLService,
+)
+from monitor_server.tests.conftest import INT_AND_UT_PARAMS
+from monitor_server.tests.sdk.persistence.generators import MetricGenerator
+
+
+@pytest.fixture(params=INT_AND_UT_PARAMS)
+def archiving_service(
+    request: pytest.FixtureRequest, orm: ORMEngine, tmp_path: pathlib.Path
+) -> t.Iterator[MonitoringMetricsService]:
+    service: MonitoringMetricsService
+    if request.param == 'int':
+        service = MonitoringMetricsSQLService(orm, archive=ColdArchive(tmp_path))
+    else:
+        service = MonitoringMetricsInMemService(archive=ColdArchive(tmp_path))
+    yield service
+    service.truncate_all()
+
+
+class TestArchivedSessions:
+    @pytest.fixture()
+    def metrics(
+        self, archiving_service: MonitoringMetricsService, a_session: MonitorSession, a_machine: Machine
+    ) -> t.List[Metric]:
+        generator = MetricGenerator(a_session.start_date, lambda _: a_session.uid.hex, lambda _: a_machine.uid.hex)
+        metrics = [generator() for _ in range(25)]
+        archiving_service.add_metrics(metrics, session=a_session, machine=a_machine)
+        return sorted(metrics, key=lambda metric: metric.uid)
+
+    def test_it_moves_metrics_to_monthly_files_by_chunks(
+        self,
+        archiving_service: MonitoringMetricsService,
+        a_session: MonitorSession,
+        metrics: t.List[Metric],
+        tmp_path: pathlib.Path,
+    ):
+        archived = archiving_service.archive_session(a_session.uid.hex, chunk_size=10)
+        assert (archived.metrics, archived.location) == (25, f'{a_session.start_date:%Y-%m}/{a_session.uid.hex}')
+        assert len(list((tmp_path / archived.location).glob('part-*.npz'))) == 3
+        assert archiving_service.count_metrics() == 0
+        assert archiving_service.archive_repository().location_of(a_session.uid.hex) == archived.location
+
+    def test_it_reads_suites_back_from_the_archive(
+        self, archiving_service: MonitoringMetricsService, a_session: MonitorSession, metrics: t.List[Metric]
+    ):
+        pages = [
+            ValidationSuiteFilter(session_id=a_session.uid.hex),
+            *(ValidationSuiteFilter(session_id=a_session.uid.hex, page_no=no, page_size=10) for no in range(3)),
+        ]
+        expected = [archiving_service.get_test_suite(page) for page in pages]
+        archiving_service.archive_session(a_session.uid.hex, chunk_size=10)
+        assert archiving_service.get_session(a_session.uid.hex) == a_session
+        assert [archiving_service.get_test_suite(page) for page in pages] == expected
+        rollup = archiving_service.get_rollups(a_session.uid.hex).overall
+        assert rollup is not None
+        assert rollup.count == len(metrics)
+
+    def test_it_reads_pages_across_archive_parts(
+        self,
+        archiving_service: MonitoringMetricsService,
+        a_session: MonitorSession,
+        metrics: t.List[Metric],
+        tmp_path: pathlib.Path,
+    ):
+        archived = archiving_service.archive_session(a_session.uid.hex, chunk_size=10)
+        archive = ColdArchive(tmp_path)
+        assert archive.read(archived.location, offset=8, limit=5) == metrics[8:13]
+        assert archive.read(archived.location, offset=20, limit=10) == metrics[20:]
+        assert archive.read(archived.location, offset=30, limit=10) == []
+        page = ValidationSuiteFilter(session_id=a_session.uid.hex, page_no=1, page_size=12)
+        suite = archiving_service.get_test_suite(page)
+        assert (suite.metrics, suite.next_page) == (metrics[12:24], 2)
+
+    def test_archiving_a_session_again_keeps_its_archive(
+        self,
+        archiving_service: MonitoringMetricsService,
+        a_session: MonitorSession,
+        metrics: t.List[Metric],
+        tmp_path: pathlib.Path,
+    ):
+        archived = archiving_service.archive_session(a_session.uid.hex, chunk_size=10)
+        assert archiving_service.archive_session(a_session.uid.hex, chunk_size=10) == archived
+        assert len(list((tmp_path / archived.location).glob('part-*.npz'))) == 3
+        suite = archiving_service.get_test_suite(ValidationSuiteFilter(session_id=a_session.uid.hex))
+        assert suite.metrics == metrics
+
+    def test_sealing_an_archived_session_keeps_its_metrics(
+        self, archiving_service: MonitoringMetricsService, a_session: MonitorSession, metrics: t.List[Metric]
+    ):
+        archiving_service.archive_session(a_session.uid.hex, chunk_size=10)
+        sealed = archiving_service.seal_session(a_session.uid.hex)
+        assert sealed.metrics == len(metrics)
+        suite = archiving_service.get_test_suite(ValidationSuiteFilter(session_id=a_session.uid.hex))
+        assert suite.metrics == metrics
+
+    def test_rebuilding_rollups_keeps_those_of_archived_sessions(
+        self, archiving_service: MonitoringMetricsService, a_session: MonitorSession, metrics: t.List[Metric]
+    ):
+        rollups = archiving_service.get_rollups(a_session.uid.hex)
+        archiving_service.archive_session(a_session.uid.hex)
+        assert archiving_service.rebuild_rollups() == 1
+        assert archiving_service.rebuild_rollups(a_session.uid.hex) == 1
+        assert archiving_service.get_rollups(a_session.uid.hex) == rollups
+
+    def test_it_rejects_metrics_added_to_an_archived_session(
+        self,
+        archiving_service: MonitoringMetricsService,
+        a_session: MonitorSession,
+        a_valid_metric: Metric,
+        metrics: t.List[Metric],
+    ):
+        archiving_service.archive_session(a_session.uid.hex)
+        with pytest.raises(EntitySealed):
+            archiving_service.add_metric(a_valid_metric)
+
+    def test_deleting_an_archived_session_removes_its_files(
+        self,
+        archiving_service: MonitoringMetricsService,
+        a_session: MonitorSession,
+        metrics: t.List[Metric],
+        tmp_path: pathlib.Path,
+    ):
+        archived = archiving_service.archive_session(a_session.uid.hex)
+        archiving_service.delete_session(a_session.uid.hex)
+        assert not (tmp_path / archived.location).exists()
+        assert archiving_service.archive_repository().location_of(a_session.uid.hex) is None
+
+    def test_it_cannot_archive_without_an_archive(
+        self, metrics_service: MonitoringMetricsService, a_session: MonitorSession
+    ):
+        metrics_service.add_session(a_session)
+        with pytest.raises(ORMError, match='No cold archive is configured'):
+            metrics_service.archive_session(a_session.uid.hex)
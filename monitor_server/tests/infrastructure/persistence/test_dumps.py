@@ -0,0 +1,113 @@
+import json
+import pathlib
+import typing as t
+
+import pytest
+
+from monitor_server.domain.models.aggregates import ValidationSuiteFilter
+from monitor_server.domain.models.machines import Machine
+from monitor_server.domain.models.metrics import Metric
+from monitor_server.domain.models.sessions import MonitorSession
+from monitor_server.infrastructure.persistence.archives import ColdArchive
+from monitor_server.infrastructure.persistence.dumps import MANIFEST, RESTORE_STATE, DatasetDump, DumpProgress
+from monitor_server.infrastructure.persistence.services import MonitoringMetricsInMemService, MonitoringMetricsService
+from monitor_server.tests.sdk.persistence.generators import MetricGenerator, MonitorSessionGenerator, constant_id
+
+
+class TestDatasetDump:
+    @pytest.fixture()
+    def metrics(
+        self, metrics_service: MonitoringMetricsService, a_session: MonitorSession, a_machine: Machine
+    ) -> t.List[Metric]:
+        generator = MetricGenerator(a_session.start_date, lambda _: a_session.uid.hex, lambda _: a_machine.uid.hex)
+        metrics = [generator() for _ in range(25)]
+        metrics_service.add_metrics(metrics, session=a_session, machine=a_machine)
+        return sorted(metrics, key=lambda metric: metric.uid)
+
+    def test_it_exports_records_by_parts(
+        self, metrics_service: MonitoringMetricsService, metrics: t.List[Metric], tmp_path: pathlib.Path
+    ):
+        progress: t.List[DumpProgress] = []
+        report = DatasetDump(tmp_path).export(metrics_service, chunk_size=10, on_progress=progress.append)
+        assert report.records == {'machines': 1, 'sessions': 1, 'metrics': 25, 'snapshots': 0}
+        manifest = json.loads((tmp_path / MANIFEST).read_text())
+        assert manifest['parts']['metrics'] == [
+            'metrics-00000.ndjson.gz',
+            'metrics-00001.ndjson.gz',
+            'metrics-00002.ndjson.gz',
+        ]
+        assert [(p.kind, p.records) for p in progress][-1] == ('metrics', 25)
+
+    def test_it_restores_an_export(
+        self,
+        metrics_service: MonitoringMetricsService,
+        a_session: MonitorSession,
+        a_machine: Machine,
+        metrics: t.List[Metric],
+        tmp_path: pathlib.Path,
+    ):
+        rollups = metrics_service.get_rollups(a_session.uid.hex)
+        dump = DatasetDump(tmp_path)
+        dump.export(metrics_service, chunk_size=10)
+        metrics_service.truncate_all()
+        report = dump.restore(metrics_service)
+        assert (report.total, report.skipped_parts) == (27, 0)
+        assert metrics_service.get_session(a_session.uid.hex) == a_session
+        assert metrics_service.get_machine(a_machine.uid.hex) == a_machine
+        assert [metrics_service.get_metric(metric.uid.hex) for metric in metrics] == metrics
+        assert metrics_service.get_rollups(a_session.uid.hex).overall == rollups.overall
+        assert not (tmp_path / RESTORE_STATE).exists()
+
+    def test_it_resumes_an_interrupted_restore(
+        self,
+        metrics_service: MonitoringMetricsService,
+        a_session: MonitorSession,
+        a_machine: Machine,
+        metrics: t.List[Metric],
+        tmp_path: pathlib.Path,
+    ):
+        dump = DatasetDump(tmp_path)
+        dump.export(metrics_service, chunk_size=10)
+        metrics_service.truncate_all()
+        # Interrupted right after committing sessions, before recording it
+        metrics_service.bulk_add(machines=[a_machine], sessions=[a_session])
+        (tmp_path / RESTORE_STATE).write_text(json.dumps(['machines-00000.ndjson.gz']))
+        report = dump.restore(metrics_service)
+        assert (report.records, report.skipped_parts) == (
+            {'machines': 0, 'sessions': 1, 'metrics': 25, 'snapshots': 0},
+            1,
+        )
+        assert metrics_service.count_metrics() == 25
+
+    def test_it_keeps_sealed_sessions_and_archived_metrics(
+        self, a_session: MonitorSession, a_machine: Machine, tmp_path: pathlib.Path
+    ):
+        source = MonitoringMetricsInMemService(archive=ColdArchive(tmp_path / 'source'))
+        sealed = MonitorSessionGenerator()(start_time=a_session.start_date)
+        source.bulk_add(machines=[a_machine], sessions=[a_session, sealed])
+        for session in (a_session, sealed):
+            generator = MetricGenerator(
+                session.start_date, constant_id(session.uid.hex), constant_id(a_machine.uid.hex)
+            )
+            source.add_metrics([generator() for _ in range(5)])
+        source.archive_session(a_session.uid.hex)
+        source.seal_session(sealed.uid.hex)
+        suites = [source.get_test_suite(ValidationSuiteFilter(session_id=s.uid.hex)) for s in (a_session, sealed)]
+        dump = DatasetDump(tmp_path / 'dump')
+        assert dump.export(source, chunk_size=4).records == {
+            'machines': 1,
+            'sessions': 2,
+            'metrics': 10,
+            'snapshots': 1,
+        }
+        target = MonitoringMetricsInMemService()
+        dump.restore(target)
+        assert [
+            target.get_test_suite(ValidationSuiteFilter(session_id=s.uid.hex)) for s in (a_session, sealed)
+        ] == suites
+        assert target.snapshot_repository().sealed_among([a_session.uid.hex, sealed.uid.hex]) == {sealed.uid.hex}
+        assert target.count_metrics() == 10
+
+    def test_it_refuses_an_incomplete_export(self, tmp_path: pathlib.Path, metrics_service: MonitoringMetricsService):
+        with pytest.raises(FileNotFoundError):
+            DatasetDump(tmp_path).restore(metrics_service)
@@ -109,3 +109,27 @@ class TestExecutionContextRepository:
         for xc in [generator() for _ in range(3)]:
             execution_context_repository.create(xc)
         assert execution_context_repository.count() == 3
+
+    def test_it_streams_all_execution_contexts_ordered_by_uid(
+        self, execution_context_repository: ExecutionContextRepository
+    ):
+        machine_generator: MachineGenerator = MachineGenerator()
+        machines = [machine_generator() for _ in range(12)]
+        for machine in machines:
+            execution_context_repository.create(machine)
+        stream = execution_context_repository.stream(chunk_size=5)
+        assert isinstance(stream, t.Iterator)
+        assert list(stream) == sorted(machines, key=lambda m: m.uid)
+
+    def test_it_lists_pages_in_uid_order_after_deletions(
+        self, execution_context_repository: ExecutionContextRepository
+    ):
+        machine_generator: MachineGenerator = MachineGenerator()
+        machines = sorted((machine_generator() for _ in range(12)), key=lambda m: m.uid)
+        for machine in machines:
+            execution_context_repository.create(machine)
+        for machine in machines[1:6:2]:
+            execution_context_repository.delete(machine.uid.hex)
+        remaining = [m for m in machines if m not in machines[1:6:2]]
+        page = execution_context_repository.list(PageableStatement(page_no=1, page_size=4))
+        assert page == PaginatedResponse[t.List[Machine]](data=remaining[4:8], page_no=1, next_page=2)
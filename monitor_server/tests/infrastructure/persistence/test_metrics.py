@@ -1,13 +1,15 @@
+import pathlib
 import typing as t
 import uuid
 from datetime import timedelta
 
 import pytest
 
-from monitor_server.domain.models.aggregates import ValidationSuite
+from monitor_server.domain.models.aggregates import ValidationSuite, ValidationSuiteFilter
 from monitor_server.domain.models.machines import Machine
 from monitor_server.domain.models.metrics import Metric
 from monitor_server.domain.models.sessions import MonitorSession
+from monitor_server.infrastructure.orm.config import UidFilterConfig
 from monitor_server.infrastructure.orm.pageable import PageableStatement, PaginatedResponse
 from monitor_server.infrastructure.persistence.exceptions import (
     EntityAlreadyExists,
@@ -15,8 +17,9 @@ from monitor_server.infrastructure.persistence.exceptions import (
     LinkedEntityMissing,
 )
 from monitor_server.infrastructure.persistence.metrics import MetricRepository
-from monitor_server.infrastructure.persistence.services import MonitoringMetricsService
-from monitor_server.tests.sdk.persistence.generators import MetricGenerator, MonitorSessionGenerator
+from monitor_server.infrastructure.persistence.services import MonitoringMetricsService, MonitoringMetricsSQLService
+from monitor_server.tests.sdk.persistence.generators import MachineGenerator, MetricGenerator, MonitorSessionGenerator
+from monitor_server.tests.sdk.persistence.sqlite import migrated_sqlite
 from monitor_server.tests.sdk.persistence.views import EntityView
 
 
@@ -187,7 +190,7 @@ class TestMetricRepository:
             metrics_service.add_session(session)
         metrics_service.add_machine(a_machine)
         metrics_service.add_metrics(entities.all_())
-        a_result = metrics_service.get_test_suite(sessions[0].uid.hex)
+        a_result = metrics_service.get_test_suite(ValidationSuiteFilter(session_id=sessions[0].uid.hex))
         expected = ValidationSuite(
             uid=sessions[0].uid,
             scm_revision=sessions[0].scm_revision,
@@ -196,3 +199,211 @@ class TestMetricRepository:
             metrics=sorted(entities.view(sessions[0].uid.hex), key=lambda m: m.uid.hex),
         )
         assert a_result == expected
+
+    def test_it_gets_a_page_of_a_test_suite(self, metrics_service: MonitoringMetricsService, a_machine: Machine):
+        session = MonitorSessionGenerator()()
+        metrics_generator = MetricGenerator(session.start_date, lambda _: session.uid.hex, lambda _: a_machine.uid.hex)
+        metrics = sorted((metrics_generator() for _ in range(12)), key=lambda m: m.uid.hex)
+        metrics_service.add_metrics(metrics, session, a_machine)
+        a_result = metrics_service.get_test_suite(
+            ValidationSuiteFilter(session_id=session.uid.hex, page_no=1, page_size=5)
+        )
+        assert (a_result.uid, a_result.metrics, a_result.next_page) == (session.uid, metrics[5:10], 2)
+
+    def test_it_gets_the_last_page_of_a_test_suite_without_next_page(
+        self, metrics_service: MonitoringMetricsService, a_machine: Machine
+    ):
+        session = MonitorSessionGenerator()()
+        metrics_generator = MetricGenerator(session.start_date, lambda _: session.uid.hex, lambda _: a_machine.uid.hex)
+        metrics = sorted((metrics_generator() for _ in range(12)), key=lambda m: m.uid.hex)
+        metrics_service.add_metrics(metrics, session, a_machine)
+        a_result = metrics_service.get_test_suite(
+            ValidationSuiteFilter(session_id=session.uid.hex, page_no=2, page_size=5)
+        )
+        assert (a_result.metrics, a_result.next_page) == (metrics[10:], None)
+
+    def test_it_gets_a_test_suite_header_when_the_page_is_out_of_bounds(
+        self, metrics_service: MonitoringMetricsService, a_machine: Machine
+    ):
+        session = MonitorSessionGenerator()()
+        metrics_generator = MetricGenerator(session.start_date, lambda _: session.uid.hex, lambda _: a_machine.uid.hex)
+        metrics_service.add_metrics([metrics_generator() for _ in range(3)], session, a_machine)
+        a_result = metrics_service.get_test_suite(
+            ValidationSuiteFilter(session_id=session.uid.hex, page_no=4, page_size=5)
+        )
+        assert (a_result.uid, a_result.metrics, a_result.next_page) == (session.uid, [], None)
+
+    def test_it_raises_entity_not_found_when_getting_the_test_suite_of_an_unknown_session(
+        self, metrics_service: MonitoringMetricsService
+    ):
+        an_id = uuid.uuid4().hex
+        with pytest.raises(EntityNotFound, match=an_id):
+            metrics_service.get_test_suite(ValidationSuiteFilter(session_id=an_id, page_no=0, page_size=5))
+
+    def test_it_iterates_over_a_test_suite_by_chunks(
+        self, metrics_service: MonitoringMetricsService, a_machine: Machine
+    ):
+        session = MonitorSessionGenerator()()
+        metrics_generator = MetricGenerator(session.start_date, lambda _: session.uid.hex, lambda _: a_machine.uid.hex)
+        metrics = sorted((metrics_generator() for _ in range(12)), key=lambda m: m.uid.hex)
+        metrics_service.add_metrics(metrics, session, a_machine)
+        chunks = list(metrics_service.iter_test_suite(session.uid.hex, chunk_size=5))
+        assert [len(chunk.metrics) for chunk in chunks] == [5, 5, 2]
+        assert [metric for chunk in chunks for metric in chunk.metrics] == metrics
+
+    def test_it_streams_all_metrics_ordered_by_uid(
+        self, metrics_service: MonitoringMetricsService, a_session: MonitorSession, a_machine: Machine
+    ):
+        metric_generator = MetricGenerator(
+            a_session.start_date, lambda _: a_session.uid.hex, lambda _: a_machine.uid.hex
+        )
+        metrics = [metric_generator() for _ in range(12)]
+        metrics_service.add_metrics(metrics, a_session, a_machine)
+        stream = metrics_service.metric_repository().stream(chunk_size=5)
+        assert isinstance(stream, t.Iterator)
+        assert list(stream) == sorted(metrics, key=lambda m: m.uid.hex)
+
+    def test_it_iterates_over_the_metrics_of_a_session_and_a_machine(self, metrics_service: MonitoringMetricsService):
+        sessions = [MonitorSessionGenerator()() for _ in range(2)]
+        machines = [MachineGenerator()() for _ in range(2)]
+        for session, machine in zip(sessions, machines, strict=True):
+            metrics_service.add_session(session)
+            metrics_service.add_machine(machine)
+        entities: EntityView = EntityView(lambda m: f'{m.session_id}/{m.node_id}')
+        metrics_generator = MetricGenerator(
+            start_date=sessions[0].start_date,
+            session_uid_cb=lambda i: sessions[i % 2].uid.hex,
+            machine_uid_cb=lambda i: machines[(i // 2) % 2].uid.hex,
+        )
+        for _ in range(20):
+            entities.add(metrics_generator())
+        metrics_service.add_metrics(entities.all_())
+        a_result = metrics_service.metric_repository().iter_all_of(
+            session_id=sessions[0].uid.hex, node_id=machines[1].uid.hex, chunk_size=2
+        )
+        expected = entities.view(f'{sessions[0].uid.hex}/{machines[1].uid.hex}')
+        assert list(a_result) == sorted(expected, key=lambda m: m.uid.hex)
+
+    def test_it_lists_an_updated_metric_under_its_new_session(
+        self, metrics_service: MonitoringMetricsService, a_machine: Machine, a_valid_metric: Metric
+    ):
+        sessions = [MonitorSessionGenerator()() for _ in range(2)]
+        for session in sessions:
+            metrics_service.add_session(session)
+        metrics_service.add_machine(a_machine)
+        a_metric = a_valid_metric.model_copy(update={'session_id': sessions[0].uid.hex})
+        metrics_service.add_metric(a_metric)
+        metrics_service.metric_repository().update(a_metric.model_copy(update={'session_id': sessions[1].uid.hex}))
+        repository = metrics_service.metric_repository()
+        assert repository.get_all_of(session_id=sessions[0].uid.hex).data == []
+        assert [m.uid for m in repository.get_all_of(session_id=sessions[1].uid.hex).data] == [a_metric.uid]
+
+    def test_it_no_longer_lists_a_deleted_metric(
+        self, metrics_service: MonitoringMetricsService, a_session: MonitorSession, a_machine: Machine
+    ):
+        metric_generator = MetricGenerator(
+            a_session.start_date, lambda _: a_session.uid.hex, lambda _: a_machine.uid.hex
+        )
+        metrics = sorted((metric_generator() for _ in range(5)), key=lambda m: m.uid.hex)
+        metrics_service.add_metrics(metrics, a_session, a_machine)
+        metrics_service.metric_repository().delete(metrics[2].uid.hex)
+        a_result = metrics_service.metric_repository().get_all_of(
+            session_id=a_session.uid.hex, node_id=a_machine.uid.hex, page_info=PageableStatement(page_no=0, page_size=3)
+        )
+        assert a_result == PaginatedResponse[t.List[Metric]](data=metrics[:2] + metrics[3:4], page_no=0, next_page=1)
+
+    def test_it_gets_the_metrics_of_a_session_as_a_batch(self, metrics_service: MonitoringMetricsService):
+        sessions = [MonitorSessionGenerator()() for _ in range(2)]
+        a_machine = MachineGenerator()()
+        for session in sessions:
+            metrics_service.add_session(session)
+        metrics_service.add_machine(a_machine)
+        metrics_generator = MetricGenerator(
+            sessions[0].start_date, lambda step: sessions[step % 2].uid.hex, lambda _: a_machine.uid.hex
+        )
+        metrics = [metrics_generator(wall_time=float(step)) for step in range(1, 9)]
+        for metric in metrics:
+            metrics_service.add_metric(metric)
+        batch = metrics_service.metric_repository().get_batch_of(session_id=sessions[1].uid.hex)
+        expected = sorted((m for m in metrics if m.session_id == sessions[1].uid.hex), key=lambda m: m.uid.hex)
+        assert batch.uid.tolist() == [m.uid.hex for m in expected]
+        assert batch.wall_time.sum() == sum(m.wall_time for m in expected)
+        assert batch.to_metrics() == expected
+
+    def test_it_deletes_the_metrics_of_a_session_by_chunks(
+        self, metrics_service: MonitoringMetricsService, a_session: MonitorSession, a_machine: Machine
+    ):
+        other_session = MonitorSessionGenerator()()
+        metrics_service.add_session(other_session)
+        metric_generator = MetricGenerator(
+            a_session.start_date, lambda _: a_session.uid.hex, lambda _: a_machine.uid.hex
+        )
+        metrics = sorted((metric_generator() for _ in range(5)), key=lambda m: m.uid.hex)
+        metrics_service.add_metrics(metrics, a_session, a_machine)
+        other = MetricGenerator(a_session.start_date, lambda _: other_session.uid.hex, lambda _: a_machine.uid.hex)()
+        metrics_service.add_metric(other)
+        repository = metrics_service.metric_repository()
+        assert repository.delete_chunk_of(a_session.uid.hex, chunk_size=2) == 2
+        assert repository.get_all_of(session_id=a_session.uid.hex).data == metrics[2:]
+        assert [repository.delete_chunk_of(a_session.uid.hex, chunk_size=2) for _ in range(3)] == [2, 1, 0]
+        assert repository.get_all_of(session_id=other_session.uid.hex).data == [other]
+
+
+@pytest.fixture()
+def metrics(a_session: MonitorSession, a_machine: Machine) -> t.List[Metric]:
+    generator = MetricGenerator(a_session.start_date, lambda _: a_session.uid.hex, lambda _: a_machine.uid.hex)
+    return [generator() for _ in range(20)]
+
+
+class TestMetricUidFilter:
+    @staticmethod
+    def _service(path: pathlib.Path) -> MonitoringMetricsSQLService:
+        return MonitoringMetricsSQLService(migrated_sqlite(path, uid_filter=UidFilterConfig(capacity=100)))
+
+    def test_it_only_looks_up_the_uids_which_may_be_stored(
+        self, tmp_path: pathlib.Path, metrics: t.List[Metric], a_session: MonitorSession, a_machine: Machine
+    ):
+        service = self._service(tmp_path / 'metrics.db')
+        assert service.add_metrics(metrics[:10], a_session, a_machine) == 10
+        with pytest.raises(EntityAlreadyExists) as error:
+            service.add_metrics([*metrics[10:], metrics[7]])
+        assert error.value.entity_id == metrics[7].uid.hex
+        statistics = service.uid_filter.statistics  # type: ignore[union-attr]
+        assert (statistics.lookups, statistics.entries) == (21, 10)
+        assert statistics.maybe_present - statistics.false_positives == 1
+        assert service.count_metrics() == 10
+
+    def test_it_is_bypassed_on_a_partitioned_table(
+        self, tmp_path: pathlib.Path, metrics: t.List[Metric], a_session: MonitorSession, a_machine: Machine
+    ):
+        service = self._service(tmp_path / 'metrics.db')
+        assert service.add_metrics(metrics[:10], a_session, a_machine) == 10
+        # uid is no longer the primary key of a partitioned table: forgotten uids must still be refused
+        service.metric_repository().partitioned = True  # type: ignore[attr-defined]
+        service.uid_filter.clear()  # type: ignore[union-attr]
+        with pytest.raises(EntityAlreadyExists) as error:
+            service.add_metric(metrics[3])
+        assert error.value.entity_id == metrics[3].uid.hex
+        assert service.uid_filter.statistics.lookups == 10  # type: ignore[union-attr]
+        assert service.add_metrics(metrics[10:]) == 10
+
+    def test_it_is_warmed_from_the_database(
+        self, tmp_path: pathlib.Path, metrics: t.List[Metric], a_session: MonitorSession, a_machine: Machine
+    ):
+        self._service(tmp_path / 'metrics.db').add_metrics(metrics, a_session, a_machine)
+        service = self._service(tmp_path / 'metrics.db')
+        assert service.uid_filter.statistics.entries == 20  # type: ignore[union-attr]
+        assert all(metric.uid.hex in service.uid_filter for metric in metrics)  # type: ignore[operator]
+        with pytest.raises(EntityAlreadyExists):
+            service.add_metric(metrics[3])
+
+    def test_it_tells_which_metric_refers_to_an_unknown_session(
+        self, tmp_path: pathlib.Path, metrics: t.List[Metric], a_session: MonitorSession, a_machine: Machine
+    ):
+        service = self._service(tmp_path / 'metrics.db')
+        service.add_session(a_session)
+        service.add_machine(a_machine)
+        unknown = metrics[5].model_copy(update={'session_id': uuid.uuid4().hex})
+        with pytest.raises(LinkedEntityMissing, match=unknown.session_id):
+            service.add_metrics([*metrics[:5], unknown, *metrics[6:]])
+        assert service.count_metrics() == 0
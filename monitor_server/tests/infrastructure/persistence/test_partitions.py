@@ -0,0 +1,43 @@
+from datetime import UTC, datetime
+
+import pytest
+
+from monitor_server.infrastructure.orm.engine import ORMEngine
+from monitor_server.infrastructure.persistence.partitions import (
+    MetricPartitions,
+    Partition,
+    monthly_partitions,
+    next_month,
+    partition_clause,
+)
+
+
+class TestMonthlyPartitions:
+    def test_it_bounds_each_month_by_the_next_one(self):
+        partitions = monthly_partitions(datetime(2024, 11, 17, tzinfo=UTC), datetime(2025, 1, 1, tzinfo=UTC))
+        assert partitions == [
+            Partition(name='p202411', upper_bound=datetime(2024, 12, 1, tzinfo=UTC)),
+            Partition(name='p202412', upper_bound=datetime(2025, 1, 1, tzinfo=UTC)),
+            Partition(name='p202501', upper_bound=datetime(2025, 2, 1, tzinfo=UTC)),
+        ]
+
+    def test_it_has_no_partition_when_the_range_is_empty(self):
+        assert monthly_partitions(datetime(2024, 3, 1, tzinfo=UTC), datetime(2024, 2, 1, tzinfo=UTC)) == []
+
+    def test_next_month_wraps_years(self):
+        assert next_month(datetime(2024, 12, 1, tzinfo=UTC)) == datetime(2025, 1, 1, tzinfo=UTC)
+
+    def test_it_renders_partition_clauses(self):
+        assert partition_clause(Partition(name='p202402', upper_bound=datetime(2024, 3, 1, tzinfo=UTC))) == (
+            "PARTITION p202402 VALUES LESS THAN ('2024-03-01 00:00:00')"
+        )
+        assert partition_clause(Partition(name='p_future')) == 'PARTITION p_future VALUES LESS THAN (MAXVALUE)'
+
+
+@pytest.mark.int
+class TestMetricPartitions:
+    def test_helpers_do_nothing_on_a_table_not_partitioned(self, orm: ORMEngine):
+        partitions = MetricPartitions(orm.session)
+        assert partitions.list() == []
+        assert partitions.create_ahead(months=2) == []
+        assert partitions.drop_before(datetime.now(tz=UTC)) == []
@@ -0,0 +1,126 @@
+import datetime
+import typing as t
+
+import pytest
+
+from monitor_server.domain.models.machines import Machine
+from monitor_server.domain.models.metrics import Metric
+from monitor_server.domain.models.rollups import ROLLUP_ATTRIBUTES, Rollup, SessionRollups
+from monitor_server.domain.models.sessions import MonitorSession
+from monitor_server.infrastructure.persistence.exceptions import EntityAlreadyExists
+from monitor_server.infrastructure.persistence.services import MonitoringMetricsService
+from monitor_server.tests.sdk.persistence.generators import MetricGenerator, MonitorSessionGenerator
+
+
+def assert_same_rollups(actual: SessionRollups, expected: t.List[Metric]):
+    if not expected:
+        assert actual == SessionRollups(session_id=actual.session_id)
+        return
+    expected_overall = Rollup.of(actual.session_id, expected)
+    by_component: t.Dict[str, t.List[Metric]] = {}
+    for metric in expected:
+        by_component.setdefault(metric.component, []).append(metric)
+    assert sorted(actual.components) == sorted(by_component)
+    pairs = [(actual.overall, expected_overall)] + [
+        (actual.components[component], Rollup.of(actual.session_id, metrics, component=component))
+        for component, metrics in by_component.items()
+    ]
+    for rollup, expected_rollup in pairs:
+        assert rollup is not None
+        for attribute in ROLLUP_ATTRIBUTES:
+            actual_values, expected_values = rollup.attributes[attribute], expected_rollup.attributes[attribute]
+            assert actual_values.count == expected_values.count
+            assert actual_values.total == pytest.approx(expected_values.total)
+            assert actual_values.squares == pytest.approx(expected_values.squares)
+            assert (actual_values.minimum, actual_values.maximum) == pytest.approx((
+                expected_values.minimum,
+                expected_values.maximum,
+            ))
+
+
+class TestRollups:
+    @pytest.fixture()
+    def sessions(
+        self, metrics_service: MonitoringMetricsService, a_session: MonitorSession, a_machine: Machine
+    ) -> t.List[MonitorSession]:
+        sessions = [a_session, MonitorSessionGenerator()(start_time=a_session.start_date)]
+        for session in sessions:
+            metrics_service.add_session(session)
+        metrics_service.add_machine(a_machine)
+        return sessions
+
+    @pytest.fixture()
+    def generator(self, sessions: t.List[MonitorSession], a_machine: Machine) -> MetricGenerator:
+        return MetricGenerator(
+            datetime.datetime(2024, 2, 14, 9, 41, 22, tzinfo=datetime.UTC),
+            lambda step: sessions[step % 2].uid.hex,
+            lambda _: a_machine.uid.hex,
+        )
+
+    @staticmethod
+    def of_session(metrics: t.List[Metric], session: MonitorSession) -> t.List[Metric]:
+        return [metric for metric in metrics if metric.session_id == session.uid.hex]
+
+    def test_it_has_no_rollup_for_a_session_without_metrics(
+        self, metrics_service: MonitoringMetricsService, sessions: t.List[MonitorSession]
+    ):
+        assert metrics_service.get_rollups(sessions[0].uid.hex) == SessionRollups(session_id=sessions[0].uid.hex)
+
+    def test_it_maintains_rollups_as_metrics_are_added(
+        self, metrics_service: MonitoringMetricsService, sessions: t.List[MonitorSession], generator: MetricGenerator
+    ):
+        metrics = [
+            generator(component=f'component-{step % 3}', wall_time=step * 1.5, memory_usage=step % 7)
+            for step in range(40)
+        ]
+        metrics_service.add_metrics(metrics[:25])
+        for metric in metrics[25:]:
+            metrics_service.add_metric(metric)
+        for session in sessions:
+            assert_same_rollups(metrics_service.get_rollups(session.uid.hex), self.of_session(metrics, session))
+
+    def test_it_keeps_rollups_in_line_with_metrics_when_ingestion_fails(
+        self, metrics_service: MonitoringMetricsService, sessions: t.List[MonitorSession], generator: MetricGenerator
+    ):
+        metrics = [generator(component=f'component-{step % 2}') for step in range(10)]
+        metrics[7] = metrics[3]
+        with pytest.raises(EntityAlreadyExists):
+            metrics_service.add_metrics(metrics)
+        # Nothing of the batch is kept
+        assert metrics_service.count_metrics() == 0
+        assert_same_rollups(metrics_service.get_rollups(sessions[0].uid.hex), [])
+
+    def test_it_only_accounts_for_updated_and_deleted_metrics_once_rebuilt(
+        self, metrics_service: MonitoringMetricsService, sessions: t.List[MonitorSession], generator: MetricGenerator
+    ):
+        metrics = [generator(component=f'component-{step % 2}', wall_time=float(step)) for step in range(20)]
+        metrics_service.add_metrics(metrics)
+        session_id, added = sessions[0].uid.hex, self.of_session(metrics, sessions[0])
+        repository = metrics_service.metric_repository()
+        repository.update(added[2].model_copy(update={'wall_time': 100.0}))
+        repository.delete(added[4].uid.hex)
+        stored = list(repository.iter_all_of(session_id=session_id))
+        assert len(stored) == len(added) - 1
+        assert_same_rollups(metrics_service.get_rollups(session_id), added)
+        metrics_service.rebuild_rollups(session_id)
+        assert_same_rollups(metrics_service.get_rollups(session_id), stored)
+
+    def test_it_rebuilds_rollups_of_all_sessions(
+        self, metrics_service: MonitoringMetricsService, sessions: t.List[MonitorSession], generator: MetricGenerator
+    ):
+        metrics = [generator(component=f'component-{step % 4}', cpu_usage=step / 10) for step in range(30)]
+        metrics_service.add_metrics(metrics)
+        metrics_service.rollup_repository().truncate()
+        assert metrics_service.rebuild_rollups() == len(sessions)
+        for session in sessions:
+            assert_same_rollups(metrics_service.get_rollups(session.uid.hex), self.of_session(metrics, session))
+
+    def test_it_rebuilds_rollups_of_a_single_session(
+        self, metrics_service: MonitoringMetricsService, sessions: t.List[MonitorSession], generator: MetricGenerator
+    ):
+        metrics = [generator(component=f'component-{step % 4}') for step in range(30)]
+        metrics_service.add_metrics(metrics)
+        metrics_service.rollup_repository().truncate()
+        assert metrics_service.rebuild_rollups(sessions[0].uid.hex) == 1
+        assert_same_rollups(metrics_service.get_rollups(sessions[0].uid.hex), self.of_session(metrics, sessions[0]))
+        assert_same_rollups(metrics_service.get_rollups(sessions[1].uid.hex), [])
@@ -0,0 +1,69 @@
+import pathlib
+import typing as t
+
+import numpy as np
+import pytest
+
+from monitor_server.domain.models.machines import Machine
+from monitor_server.domain.models.metrics import Metric
+from monitor_server.domain.models.sessions import MonitorSession
+from monitor_server.infrastructure.orm.errors import ORMError
+from monitor_server.infrastructure.persistence.exceptions import EntityAlreadyExists
+from monitor_server.infrastructure.persistence.segments import MetricSegmentRepository, Segment
+from monitor_server.tests.sdk.persistence.generators import MetricGenerator
+
+
+@pytest.fixture()
+def metrics(a_session: MonitorSession, a_machine: Machine) -> t.List[Metric]:
+    generator = MetricGenerator(a_session.start_date, lambda _: a_session.uid.hex, lambda _: a_machine.uid.hex)
+    return sorted((generator() for _ in range(20)), key=lambda metric: metric.uid)
+
+
+class TestMetricSegmentRepository:
+    def test_it_reopens_a_store(self, metrics: t.List[Metric], a_session: MonitorSession, tmp_path: pathlib.Path):
+        repository = MetricSegmentRepository(tmp_path, capacity=8)
+        repository.bulk_create(metrics)
+        repository.delete(metrics[3].uid.hex)
+        reopened = MetricSegmentRepository(tmp_path)
+        expected = metrics[:3] + metrics[4:]
+        assert len(list(tmp_path.glob('segment-*.bin'))) == 3
+        assert reopened.count() == 19
+        assert reopened.get_all_of(session_id=a_session.uid.hex).data == expected
+        with pytest.raises(EntityAlreadyExists):
+            reopened.create(metrics[15])
+
+    def test_it_finds_a_metric_created_again_in_a_full_segment(self, metrics: t.List[Metric], tmp_path: pathlib.Path):
+        repository = MetricSegmentRepository(tmp_path, capacity=4)
+        repository.bulk_create(metrics[:4])
+        repository.delete(metrics[1].uid.hex)
+        repository.create(metrics[1])
+        assert repository.get(metrics[1].uid.hex) == metrics[1]
+        with pytest.raises(EntityAlreadyExists):
+            repository.create(metrics[1])
+
+    def test_it_ignores_what_an_interrupted_append_left(self, metrics: t.List[Metric], tmp_path: pathlib.Path):
+        MetricSegmentRepository(tmp_path, capacity=8).bulk_create(metrics[:2])
+        # Values written but not counted yet, and a dictionary line cut short
+        Segment(tmp_path / 'segment-00000.bin')._columns['uid'][2] = metrics[2].uid.hex.encode()  # noqa: SLF001
+        with (tmp_path / 'strings.ndjson').open('ab') as file:
+            file.write(b'"tests.this.it')
+        reopened = MetricSegmentRepository(tmp_path)
+        assert reopened.list().data == metrics[:2]
+        reopened.create(metrics[2])
+        assert MetricSegmentRepository(tmp_path).get(metrics[2].uid.hex) == metrics[2]
+
+    def test_its_batches_are_views_of_the_segments(self, metrics: t.List[Metric], tmp_path: pathlib.Path):
+        repository = MetricSegmentRepository(tmp_path, capacity=10)
+        repository.bulk_create(metrics)
+        repository.delete(metrics[12].uid.hex)
+        first, second = repository.batches()
+        segment = repository._segments[0]  # noqa: SLF001
+        assert np.shares_memory(first.wall_time, segment.column('wall_time'))
+        assert np.shares_memory(first.component.codes, segment.column('component'))
+        assert first.to_metrics() == metrics[:10]
+        assert second.to_metrics() == metrics[10:12] + metrics[13:]
+
+    def test_it_refuses_a_file_which_is_not_a_segment(self, tmp_path: pathlib.Path):
+        (tmp_path / 'segment-00000.bin').write_bytes(b'PK' * 64)
+        with pytest.raises(ORMError, match='not a metric segment'):
+            MetricSegmentRepository(tmp_path)
@@ -179,3 +179,25 @@ class TestMonitoringMetricsService:
         for machine in machines:
             metrics_service.add_machine(machine)
         assert len(machines) == metrics_service.count_machines()
+
+    def test_truncating_all_clears_every_table_and_cache(
+        self,
+        metrics_service: MonitoringMetricsService,
+        a_valid_metric: Metric,
+        a_session: MonitorSession,
+        a_machine: Machine,
+    ):
+        metrics_service.add_metrics([a_valid_metric], session=a_session, machine=a_machine)
+        metrics_service.seal_session(a_session.uid.hex)
+        assert metrics_service.get_session(a_session.uid.hex) == a_session
+        report = metrics_service.truncate_all()
+        assert report.strategy != 'chunked'
+        assert (
+            metrics_service.count_metrics(),
+            metrics_service.count_sessions(),
+            metrics_service.count_machines(),
+        ) == (0, 0, 0)
+        assert metrics_service.get_rollups(a_session.uid.hex).overall is None
+        assert metrics_service.snapshot_repository().load(a_session.uid.hex) is None
+        with pytest.raises(EntityNotFound):
+            metrics_service.get_session(a_session.uid.hex)
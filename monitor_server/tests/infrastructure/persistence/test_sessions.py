@@ -93,3 +93,12 @@ class TestSessionRepository:
         assert session_repository.list(PageableStatement(page_no=10, page_size=5)) == PaginatedResponse[
             t.List[MonitorSession]
         ](data=[], page_no=10, next_page=None)
+
+    def test_it_streams_all_sessions_ordered_by_uid(self, session_repository: SessionRepository):
+        session_generator: MonitorSessionGenerator = MonitorSessionGenerator()
+        sessions = [session_generator() for _ in range(12)]
+        for session in sessions:
+            session_repository.create(session)
+        stream = session_repository.stream(chunk_size=5)
+        assert isinstance(stream, t.Iterator)
+        assert list(stream) == sorted(sessions, key=lambda m: m.uid)
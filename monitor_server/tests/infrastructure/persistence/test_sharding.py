@@ -0,0 +1,119 @@
+import pathlib
+import typing as t
+import uuid
+
+import pytest
+
+from monitor_server.domain.models.aggregates import ValidationSuiteFilter
+from monitor_server.domain.models.machines import Machine
+from monitor_server.domain.models.metrics import Metric
+from monitor_server.domain.models.sessions import MonitorSession
+from monitor_server.infrastructure.orm.pageable import PageableStatement
+from monitor_server.infrastructure.persistence.exceptions import EntityAlreadyExists, EntityNotFound
+from monitor_server.infrastructure.persistence.services import (
+    MonitoringMetricsInMemService,
+    MonitoringMetricsService,
+    MonitoringMetricsSQLService,
+)
+from monitor_server.infrastructure.persistence.sharding import HashRing, ShardedMonitoringMetricsService
+from monitor_server.tests.sdk.persistence.generators import MetricGenerator, MonitorSessionGenerator
+from monitor_server.tests.sdk.persistence.sqlite import migrated_sqlite
+
+
+@pytest.fixture(params=['inmem', 'sqlite'])
+def sharded_service(request: pytest.FixtureRequest, tmp_path: pathlib.Path) -> ShardedMonitoringMetricsService:
+    shards: t.List[MonitoringMetricsService]
+    if request.param == 'sqlite':
+        shards = [MonitoringMetricsSQLService(migrated_sqlite(tmp_path / f'shard-{i}.db')) for i in range(3)]
+    else:
+        shards = [MonitoringMetricsInMemService() for _ in range(3)]
+    return ShardedMonitoringMetricsService(shards)
+
+
+@pytest.fixture()
+def sessions(sharded_service: ShardedMonitoringMetricsService) -> t.List[MonitorSession]:
+    generator = MonitorSessionGenerator()
+    sessions = [generator() for _ in range(12)]
+    for session in sessions:
+        sharded_service.add_session(session)
+    return sorted(sessions, key=lambda session: session.uid.hex)
+
+
+def _metrics_of(session: MonitorSession, machine: Machine, count: int) -> t.List[Metric]:
+    generator = MetricGenerator(session.start_date, lambda _: session.uid.hex, lambda _: machine.uid.hex)
+    return [generator() for _ in range(count)]
+
+
+class TestHashRing:
+    def test_it_spreads_keys_over_all_shards(self):
+        ring = HashRing(4)
+        shards = [ring.shard_of(uuid.uuid4().hex) for _ in range(4000)]
+        assert all(shards.count(shard) > 600 for shard in range(4))
+
+    def test_adding_a_shard_moves_few_keys(self):
+        keys = [uuid.uuid4().hex for _ in range(4000)]
+        before, after = HashRing(4), HashRing(5)
+        moved = sum(before.shard_of(key) != after.shard_of(key) for key in keys)
+        assert moved < len(keys) / 3
+        assert all(after.shard_of(key) == 4 for key in keys if before.shard_of(key) != after.shard_of(key))
+
+
+class TestShardedMonitoringMetricsService:
+    def test_metrics_live_on_the_shard_of_their_session(
+        self, sharded_service: ShardedMonitoringMetricsService, sessions: t.List[MonitorSession], a_machine: Machine
+    ):
+        sharded_service.add_machine(a_machine)
+        for session in sessions:
+            sharded_service.add_metrics(_metrics_of(session, a_machine, 5))
+        assert all(shard.count_machines() == 1 for shard in sharded_service.shards)
+        assert sum(shard.count_sessions() > 0 for shard in sharded_service.shards) > 1
+        for session in sessions:
+            shard = sharded_service.shard_of(session.uid.hex)
+            assert shard.get_session(session.uid.hex) == session
+            assert shard.get_rollups(session.uid.hex).overall.count == 5  # type: ignore[union-attr]
+        assert (sharded_service.count_sessions(), sharded_service.count_metrics()) == (12, 60)
+        assert sharded_service.count_machines() == 1
+
+    def test_it_refuses_a_machine_all_shards_already_have(
+        self, sharded_service: ShardedMonitoringMetricsService, a_machine: Machine
+    ):
+        sharded_service.shards[0].add_machine(a_machine)
+        sharded_service.add_machine(a_machine)
+        with pytest.raises(EntityAlreadyExists):
+            sharded_service.add_machine(a_machine)
+
+    def test_it_lists_sessions_merged_by_uid(
+        self, sharded_service: ShardedMonitoringMetricsService, sessions: t.List[MonitorSession]
+    ):
+        repository = sharded_service.session_repository()
+        pages = [repository.list(PageableStatement(page_no=page_no, page_size=5)) for page_no in range(3)]
+        assert [page.next_page for page in pages] == [1, 2, None]
+        assert [session for page in pages for session in page.data] == sessions
+        assert repository.list().data == sessions
+        assert repository.count() == 12
+
+    def test_it_finds_metrics_and_suites_on_their_shard(
+        self, sharded_service: ShardedMonitoringMetricsService, sessions: t.List[MonitorSession], a_machine: Machine
+    ):
+        metrics = _metrics_of(sessions[0], a_machine, 3)
+        sharded_service.add_metrics(metrics, machine=a_machine)
+        assert sharded_service.get_metric(metrics[1].uid.hex) == metrics[1]
+        suite = sharded_service.get_test_suite(ValidationSuiteFilter(session_id=sessions[0].uid.hex))
+        assert sorted(suite.metrics, key=lambda metric: metric.uid) == sorted(metrics, key=lambda metric: metric.uid)
+        with pytest.raises(EntityNotFound):
+            sharded_service.get_metric(uuid.uuid4().hex)
+
+    def test_it_deletes_a_session_from_its_shard(
+        self, sharded_service: ShardedMonitoringMetricsService, sessions: t.List[MonitorSession], a_machine: Machine
+    ):
+        sharded_service.add_metrics(_metrics_of(sessions[0], a_machine, 3), machine=a_machine)
+        sharded_service.delete_session(sessions[0].uid.hex)
+        assert (sharded_service.count_sessions(), sharded_service.count_metrics()) == (11, 0)
+
+    def test_it_bulk_loads_each_shard(self, sharded_service: ShardedMonitoringMetricsService, a_machine: Machine):
+        generator = MonitorSessionGenerator()
+        sessions = [generator() for _ in range(6)]
+        metrics = [metric for session in sessions for metric in _metrics_of(session, a_machine, 2)]
+        assert sharded_service.bulk_add(machines=[a_machine], sessions=sessions, metrics=metrics) == 19
+        assert all(shard.count_machines() == 1 for shard in sharded_service.shards)
+        assert sharded_service.metric_repository().count() == 12
@@ -0,0 +1,87 @@
+import typing as t
+
+import pytest
+
+from monitor_server.domain.models.aggregates import ValidationSuiteFilter
+from monitor_server.domain.models.machines import Machine
+from monitor_server.domain.models.metrics import Metric
+from monitor_server.domain.models.sessions import MonitorSession
+from monitor_server.domain.models.snapshots import SealedSession
+from monitor_server.infrastructure.persistence.exceptions import EntityNotFound, EntitySealed
+from monitor_server.infrastructure.persistence.services import MonitoringMetricsService
+from monitor_server.tests.sdk.persistence.generators import MetricGenerator
+
+
+class TestSealedSessions:
+    @pytest.fixture()
+    def metrics(
+        self, metrics_service: MonitoringMetricsService, a_session: MonitorSession, a_machine: Machine
+    ) -> t.List[Metric]:
+        generator = MetricGenerator(a_session.start_date, lambda _: a_session.uid.hex, lambda _: a_machine.uid.hex)
+        metrics = [generator() for _ in range(25)]
+        metrics_service.add_metrics(metrics, session=a_session, machine=a_machine)
+        return sorted(metrics, key=lambda metric: metric.uid)
+
+    def test_it_serves_the_same_suite_once_sealed(
+        self, metrics_service: MonitoringMetricsService, a_session: MonitorSession, metrics: t.List[Metric]
+    ):
+        pages = [
+            ValidationSuiteFilter(session_id=a_session.uid.hex),
+            *(ValidationSuiteFilter(session_id=a_session.uid.hex, page_no=no, page_size=10) for no in range(4)),
+        ]
+        expected = [metrics_service.get_test_suite(page) for page in pages]
+        sealed = metrics_service.seal_session(a_session.uid.hex)
+        assert (sealed.session_id, sealed.metrics) == (a_session.uid.hex, len(metrics))
+        assert [metrics_service.get_test_suite(page) for page in pages] == expected
+        assert [suite.next_page for suite in expected[1:]] == [1, 2, None, None]
+
+    def test_it_reads_the_snapshot_back_from_the_store(
+        self, metrics_service: MonitoringMetricsService, a_session: MonitorSession, metrics: t.List[Metric]
+    ):
+        metrics_service.seal_session(a_session.uid.hex)
+        # Rows are gone from the metric table, the suite is still served from its snapshot
+        for metric in metrics:
+            metrics_service.metric_repository().delete(metric.uid.hex)
+        snapshot = metrics_service.snapshot_repository().load(a_session.uid.hex)
+        assert snapshot is not None
+        assert snapshot.metrics == len(metrics)
+        assert metrics_service.get_test_suite(ValidationSuiteFilter(session_id=a_session.uid.hex)).metrics == metrics
+
+    def test_it_rejects_metrics_added_to_a_sealed_session(
+        self,
+        metrics_service: MonitoringMetricsService,
+        a_session: MonitorSession,
+        a_valid_metric: Metric,
+        metrics: t.List[Metric],
+    ):
+        metrics_service.seal_session(a_session.uid.hex)
+        with pytest.raises(EntitySealed, match=f'Session "{a_session.uid.hex}" is sealed'):
+            metrics_service.add_metric(a_valid_metric)
+        with pytest.raises(EntitySealed):
+            metrics_service.add_metrics([a_valid_metric])
+        assert metrics_service.count_metrics() == len(metrics)
+
+    def test_unsealing_a_session_accepts_metrics_again(
+        self,
+        metrics_service: MonitoringMetricsService,
+        a_session: MonitorSession,
+        a_valid_metric: Metric,
+        metrics: t.List[Metric],
+    ):
+        metrics_service.seal_session(a_session.uid.hex)
+        metrics_service.unseal_session(a_session.uid.hex)
+        metrics_service.add_metric(a_valid_metric)
+        suite = metrics_service.get_test_suite(ValidationSuiteFilter(session_id=a_session.uid.hex))
+        assert len(suite.metrics) == len(metrics) + 1
+
+    def test_it_cannot_seal_an_unknown_session(self, metrics_service: MonitoringMetricsService):
+        with pytest.raises(EntityNotFound):
+            metrics_service.seal_session('abcd')
+
+    def test_sealing_an_empty_session_stores_an_empty_suite(
+        self, metrics_service: MonitoringMetricsService, a_session: MonitorSession
+    ):
+        metrics_service.add_session(a_session)
+        sealed = metrics_service.seal_session(a_session.uid.hex)
+        assert sealed == SealedSession(session_id=a_session.uid.hex, metrics=0, size=sealed.size)
+        assert metrics_service.get_test_suite(ValidationSuiteFilter(session_id=a_session.uid.hex)).metrics == []
@@ -0,0 +1,167 @@
+import json
+import pathlib
+import time
+import typing as t
+
+import pytest
+
+from monitor_server.domain.models.machines import Machine
+from monitor_server.domain.models.metrics import Metric
+from monitor_server.domain.models.sessions import MonitorSession
+from monitor_server.infrastructure.orm.errors import ORMError
+from monitor_server.infrastructure.persistence.services import MonitoringMetricsInMemService
+from monitor_server.infrastructure.persistence.spool import (
+    CHECKPOINT,
+    REJECTED,
+    IngestionSpool,
+    ReplayReport,
+    SpoolReplayer,
+)
+from monitor_server.tests.sdk.persistence.generators import MetricGenerator
+
+
+class FlakyService(MonitoringMetricsInMemService):
+    """Service whose database can be taken down"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.down = False
+
+    def add_metrics(
+        self, metrics: t.List[Metric], session: MonitorSession | None = None, machine: Machine | None = None
+    ) -> int:
+        if self.down:
+            raise ORMError('Lost connection to server during query')
+        return super().add_metrics(metrics, session, machine)
+
+
+@pytest.fixture()
+def service() -> FlakyService:
+    return FlakyService()
+
+
+@pytest.fixture()
+def spool(tmp_path: pathlib.Path) -> IngestionSpool:
+    return IngestionSpool(tmp_path, max_file_size=4096)
+
+
+@pytest.fixture()
+def metrics(a_session: MonitorSession, a_machine: Machine) -> t.List[Metric]:
+    generator = MetricGenerator(a_session.start_date, lambda _: a_session.uid.hex, lambda _: a_machine.uid.hex)
+    return [generator() for _ in range(30)]
+
+
+def _spool_by_tens(
+    spool: IngestionSpool, metrics: t.List[Metric], a_session: MonitorSession, a_machine: Machine
+) -> None:
+    for start in range(0, len(metrics), 10):
+        spool.append(metrics[start : start + 10], session=a_session, machine=a_machine)
+
+
+class TestSpoolReplayer:
+    def test_it_drains_the_spool_in_chunks(
+        self,
+        spool: IngestionSpool,
+        service: FlakyService,
+        metrics: t.List[Metric],
+        a_session: MonitorSession,
+        a_machine: Machine,
+    ):
+        _spool_by_tens(spool, metrics, a_session, a_machine)
+        assert len(list(spool.folder.glob('spool-*.ndjson'))) > 1
+        report = SpoolReplayer(spool, service, chunk_size=20).drain()
+        assert (report.batches, report.added, report.error) == (3, 30, None)
+        assert service.get_rollups(a_session.uid.hex).overall.count == 30  # type: ignore[union-attr]
+        assert spool.backlog == 0
+        assert len(list(spool.folder.glob('spool-*.ndjson'))) == 1
+
+    def test_it_keeps_metrics_spooled_while_the_database_is_down(
+        self,
+        spool: IngestionSpool,
+        service: FlakyService,
+        metrics: t.List[Metric],
+        a_session: MonitorSession,
+        a_machine: Machine,
+    ):
+        _spool_by_tens(spool, metrics, a_session, a_machine)
+        replayer = SpoolReplayer(spool, service)
+        service.down = True
+        report = replayer.drain()
+        assert (report.added, report.error) == (0, 'Lost connection to server during query')
+        assert spool.backlog > 0
+        service.down = False
+        assert replayer.drain().added == 30
+        assert service.count_metrics() == 30
+
+    def test_it_skips_metrics_written_before_a_crash(
+        self,
+        spool: IngestionSpool,
+        service: FlakyService,
+        metrics: t.List[Metric],
+        a_session: MonitorSession,
+        a_machine: Machine,
+    ):
+        spool = IngestionSpool(spool.folder / 'single')
+        _spool_by_tens(spool, metrics, a_session, a_machine)
+        spool.append(metrics[:5])
+        assert SpoolReplayer(spool, service).drain().duplicates == 5
+        # Died after writing, before acknowledging
+        (spool.folder / CHECKPOINT).unlink()
+        report = SpoolReplayer(IngestionSpool(spool.folder), service).drain()
+        assert (report.added, report.duplicates) == (0, 35)
+        assert service.count_metrics() == 30
+
+    def test_it_sets_aside_what_cannot_be_written(
+        self,
+        spool: IngestionSpool,
+        service: FlakyService,
+        metrics: t.List[Metric],
+        a_session: MonitorSession,
+        a_machine: Machine,
+    ):
+        spool.append(metrics[:3], machine=a_machine)
+        with spool.folder.joinpath('spool-00000000.ndjson').open('ab') as file:
+            file.write(b'{"metrics": "garbage"}\n')
+        replayer = SpoolReplayer(spool, service)
+        assert (replayer.drain().rejected, spool.backlog) == (4, 0)
+        rejected = [json.loads(line) for line in (spool.folder / REJECTED).read_text().splitlines()]
+        assert rejected[0]['reason'].startswith(f'Session {a_session.uid.hex} cannot be found')
+        assert rejected[-1] == {'reason': 'unreadable', 'record': '{"metrics": "garbage"}'}
+        spool.append(metrics[3:6], session=a_session)
+        assert replayer.drain().added == 3
+
+    def test_it_drops_a_batch_cut_short_by_a_crash(
+        self,
+        spool: IngestionSpool,
+        service: FlakyService,
+        metrics: t.List[Metric],
+        a_session: MonitorSession,
+        a_machine: Machine,
+    ):
+        spool.append(metrics[:2], session=a_session, machine=a_machine)
+        with spool.folder.joinpath('spool-00000000.ndjson').open('ab') as file:
+            file.write(b'{"metrics": [')
+        reopened = IngestionSpool(spool.folder)
+        reopened.append(metrics[2:4])
+        assert SpoolReplayer(reopened, service).drain().added == 4
+
+    def test_it_drains_in_the_background(
+        self,
+        spool: IngestionSpool,
+        service: FlakyService,
+        metrics: t.List[Metric],
+        a_session: MonitorSession,
+        a_machine: Machine,
+    ):
+        reports: t.List[ReplayReport] = []
+        replayer = SpoolReplayer(spool, service, interval=0.01, on_report=reports.append)
+        replayer.start()
+        try:
+            _spool_by_tens(spool, metrics, a_session, a_machine)
+            deadline = time.monotonic() + 5
+            while service.count_metrics() < 30 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            replayer.stop()
+        assert service.count_metrics() == 30
+        assert sum(report.added for report in reports) == 30
@@ -11,6 +11,11 @@ from monitor_server.domain.models.sessions import MonitorSession
 EntityIdCallBack = t.Callable[[int], str]
 
 
+def constant_id(uid: str) -> EntityIdCallBack:
+    """Callback giving the same uid at every step"""
+    return lambda _: uid
+
+
 class MetricGenerator:
     def __init__(
         self, start_date: datetime.datetime, session_uid_cb: EntityIdCallBack, machine_uid_cb: EntityIdCallBack
@@ -0,0 +1,26 @@
+import pathlib
+import typing as t
+
+from alembic import command
+from alembic.config import Config
+
+import monitor_server.application.db as migrations
+from monitor_server.infrastructure.orm.config import ORMConfig, SessionConfig
+from monitor_server.infrastructure.orm.engine import ORMEngine
+
+
+def migrated_sqlite(path: pathlib.Path, **settings: t.Any) -> ORMEngine:
+    """An engine on a SQLite database file brought to the latest revision by the alembic migrations, configured with
+    the extra settings given"""
+    orm_config = ORMConfig(
+        driver='sqlite',
+        database=str(path),
+        session=SessionConfig(autoflush=False, expire_on_commit=False),
+        **settings,
+    )
+    # No ini file: alembic would otherwise reconfigure logging
+    alembic_config = Config()
+    alembic_config.set_main_option('script_location', str(pathlib.Path(migrations.__file__).parent))
+    alembic_config.set_main_option('sqlalchemy.url', orm_config.url)
+    command.upgrade(alembic_config, 'head')
+    return ORMEngine(orm_config)